@@ -0,0 +1,47 @@
+"""Tokens/second of fixed max_length padding versus length-bucketed dynamic padding.
+
+Run from the ai-service root:
+
+    python -m benchmarks.bench_padding --model model_serving/legal_bert/model.onnx
+"""
+import argparse
+import time
+
+from benchmarks.corpus import sample_edits
+from service.suggestion_service import LegalSuggestionEngine
+
+def run(engine: LegalSuggestionEngine, texts, batch_size: int) -> dict:
+    engine.real_tokens = engine.padded_tokens = 0
+    started = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        engine.generate_suggestions_batch(texts[offset:offset + batch_size])
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": elapsed,
+        "real_tokens_per_s": engine.real_tokens / elapsed,
+        "padded_tokens": engine.padded_tokens,
+        "padding_overhead": engine.padded_tokens / max(engine.real_tokens, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="model_serving/legal_bert/model.onnx")
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--long-fraction", type=float, default=0.1)
+    args = parser.parse_args()
+
+    texts = sample_edits(args.requests, long_fraction=args.long_fraction)
+    engine = LegalSuggestionEngine(args.model)
+    engine.generate_suggestions_batch(texts[:args.batch_size])  # warm up
+
+    for padding in ("max_length", "dynamic"):
+        engine.padding = padding
+        result = run(engine, texts, args.batch_size)
+        print(
+            f"{padding:>10}: {result['real_tokens_per_s']:10.0f} tokens/s  "
+            f"{result['seconds']:7.2f}s  padded/real={result['padding_overhead']:.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Logits-to-suggestions: per-item Python loop versus the vectorized decoder.
+
+Run from the ai-service root (no model needed):
+
+    python -m benchmarks.bench_postprocess --windows 4096
+"""
+import argparse
+import timeit
+from collections import defaultdict
+
+import numpy as np
+
+from service.postprocess import decode
+from service.suggestion_service import LABELS, _create_suggestion, format_suggestions
+
+def loop_decode(logits, text_index, starts, ends, texts):
+    """The previous per-window, per-label Python implementation"""
+    predictions = np.argmax(logits, axis=-1)
+    spans = [defaultdict(list) for _ in texts]
+    for row in range(len(logits)):
+        for i, pred in enumerate(predictions[row]):
+            if pred != 0:
+                merged = spans[text_index[row]][i]
+                confidence = logits[row][i][pred]
+                if merged and starts[row] <= merged[-1][1]:
+                    start, end, best = merged[-1]
+                    merged[-1] = (start, max(end, ends[row]), max(best, confidence))
+                else:
+                    merged.append((starts[row], ends[row], confidence))
+    results = []
+    for text, by_label in zip(texts, spans):
+        results.append([
+            _create_suggestion(LABELS[i], float(c), text[s:e], int(s), int(e))
+            for i in sorted(by_label) for s, e, c in by_label[i]
+        ])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--windows", type=int, default=4096)
+    parser.add_argument("--windows-per-text", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    logits = rng.normal(size=(args.windows, len(LABELS), 3)).astype(np.float32)
+    text_index = np.arange(args.windows, dtype=np.int32) // args.windows_per_text
+    position = np.arange(args.windows, dtype=np.int32) % args.windows_per_text
+    starts, ends = position * 1500, position * 1500 + 2000
+    texts = ["x" * 8000] * (int(text_index[-1]) + 1)
+
+    timings = {
+        "python loop": lambda: loop_decode(logits, text_index, starts, ends, texts),
+        "vectorized decode": lambda: decode(logits, text_index, starts, ends),
+        "vectorized + JSON": lambda: format_suggestions(decode(logits, text_index, starts, ends), texts),
+        "thresholds + top-2": lambda: decode(logits, text_index, starts, ends, [0.6] * len(LABELS), 2),
+    }
+    for name, fn in timings.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:>20}: {best * 1000:8.2f} ms for {args.windows} windows")
+
+if __name__ == "__main__":
+    main()
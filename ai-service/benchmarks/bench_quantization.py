@@ -0,0 +1,63 @@
+"""CPU latency, throughput and label agreement of the FP32 and INT8 models.
+
+Run from the ai-service root after quantizing:
+
+    python -m model_serving.onnx_utils quantize
+    python -m benchmarks.bench_quantization --threads 4
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import sample_edits
+from model_serving.onnx_utils import create_session, quantized_path
+from service.suggestion_service import LegalSuggestionEngine
+
+def measure(engine: LegalSuggestionEngine, texts, batch_size: int) -> dict:
+    latencies = []
+    for text in texts[:200]:
+        started = time.perf_counter()
+        engine.generate_suggestions(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        engine.generate_suggestions_batch(texts[offset:offset + batch_size])
+    elapsed = time.perf_counter() - started
+
+    windows = engine._windows(texts)
+    predictions = np.argmax(engine._run([w.input_ids for w in windows]), axis=-1)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "docs_per_s": len(texts) / elapsed,
+        "predictions": predictions
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="model_serving/legal_bert/model.onnx")
+    parser.add_argument("--int8-model")
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = sample_edits(args.requests)
+    results = {}
+    for variant, path in (("fp32", args.model), ("int8", args.int8_model or quantized_path(args.model))):
+        session = create_session(path, intra_op_num_threads=args.threads)
+        engine = LegalSuggestionEngine(path, session=session)
+        engine.generate_suggestions_batch(texts[:args.batch_size])  # warm up
+        results[variant] = measure(engine, texts, args.batch_size)
+        r = results[variant]
+        print(f"{variant}: p50={r['p50_ms']:.1f}ms p99={r['p99_ms']:.1f}ms throughput={r['docs_per_s']:.1f} docs/s")
+
+    fp32, int8 = results["fp32"]["predictions"], results["int8"]["predictions"]
+    label_agreement = float(np.mean(fp32 == int8))
+    flag_agreement = float(np.mean((fp32 != 0) == (int8 != 0)))
+    print(f"label agreement={label_agreement:.4f} issue/no-issue agreement={flag_agreement:.4f}")
+
+if __name__ == "__main__":
+    main()
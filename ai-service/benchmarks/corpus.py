@@ -0,0 +1,34 @@
+import random
+from typing import List
+
+CLAUSES = [
+    "The Receiving Party shall hold the Confidential Information in strict confidence.",
+    "This Agreement shall be governed by the laws of the State of New York.",
+    "Either party may terminate this Agreement upon thirty (30) days written notice.",
+    "The Supplier warrants that the Goods will be free from material defects.",
+    "Payment shall be made within a reasonable time following receipt of invoice.",
+    "Neither party shall be liable for any indirect or consequential loss.",
+    "The Licensee may not sublicense the Software without prior written consent.",
+    "Any dispute arising hereunder shall be referred to binding arbitration.",
+    "The Employee agrees not to solicit clients of the Company for twelve months.",
+    "Notices shall be delivered by hand or sent by registered mail to the addresses above.",
+]
+
+def sample_edits(count: int, long_fraction: float = 0.1, seed: int = 7) -> List[str]:
+    """Editor-like traffic: mostly one or two clauses, occasionally a full page"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        if rng.random() < long_fraction:
+            size = rng.randint(25, 60)
+        else:
+            size = rng.randint(1, 3)
+        texts.append(" ".join(rng.choice(CLAUSES) for _ in range(size)))
+    return texts
+
+def sample_document(paragraphs: int = 40, seed: int = 11) -> str:
+    rng = random.Random(seed)
+    return "\n\n".join(
+        " ".join(rng.choice(CLAUSES) for _ in range(rng.randint(2, 8)))
+        for _ in range(paragraphs)
+    )
@@ -0,0 +1,184 @@
+"""ONNX Runtime session construction and offline model preparation.
+
+Quantize the bundled model (run from the ai-service root):
+
+    python -m model_serving.onnx_utils quantize \
+        --input model_serving/legal_bert/model.onnx \
+        --output model_serving/legal_bert/model.int8.onnx
+
+Prepare a copy whose weights can be shared by several worker processes:
+
+    python -m model_serving.onnx_utils share --input model_serving/legal_bert/model.onnx
+"""
+import argparse
+import logging
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import onnxruntime as ort
+
+logger = logging.getLogger(__name__)
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+def quantized_path(model_path: str) -> str:
+    """Conventional location of the INT8 copy of ``model_path``"""
+    path = Path(model_path)
+    return str(path.with_name(f"{path.stem}.int8{path.suffix}"))
+
+def shared_path(model_path: str) -> str:
+    """Conventional location of the shared-weights copy of ``model_path``"""
+    path = Path(model_path)
+    return str(path.with_name(f"{path.stem}.shared{path.suffix}"))
+
+def resolve_model_path(model_path: str, variant: str = "fp32") -> str:
+    if variant == "fp32":
+        return model_path
+    if variant == "int8":
+        path = quantized_path(model_path)
+        if not Path(path).exists():
+            raise FileNotFoundError(
+                f"INT8 model {path} not found; create it with "
+                "`python -m model_serving.onnx_utils quantize`"
+            )
+        return path
+    raise ValueError(f"Unknown model variant {variant!r}")
+
+def create_session(
+    model_path: str,
+    graph_optimization_level: str = "all",
+    intra_op_num_threads: int = 0,
+    inter_op_num_threads: int = 0,
+    execution_mode: str = "sequential",
+    enable_cpu_mem_arena: bool = True,
+    enable_mem_pattern: bool = True,
+    optimized_model_path: Optional[str] = None,
+    shared_weights: bool = False
+) -> ort.InferenceSession:
+    """Build a CPU inference session with explicit threading and memory options.
+
+    Thread counts of 0 let ONNX Runtime pick one thread per physical core.
+    ``enable_mem_pattern`` only pays off for repeated input shapes, which the
+    length buckets in the suggestion engine provide.
+
+    With ``shared_weights`` the model is expected to come from
+    :func:`export_shared_model`: its initializers live in a page-aligned
+    external file that ONNX Runtime memory-maps, so every process loading it
+    shares the same page-cache pages. Graph optimization and weight
+    prepacking are disabled because both would make private copies of the
+    weights; the export already applied the optimizations offline.
+    """
+    options = ort.SessionOptions()
+    if shared_weights:
+        graph_optimization_level = "disable"
+        options.add_session_config_entry("session.disable_prepacking", "1")
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[graph_optimization_level]
+    options.intra_op_num_threads = intra_op_num_threads
+    options.inter_op_num_threads = inter_op_num_threads
+    options.execution_mode = EXECUTION_MODES[execution_mode]
+    options.enable_cpu_mem_arena = enable_cpu_mem_arena
+    options.enable_mem_pattern = enable_mem_pattern
+    if optimized_model_path:
+        options.optimized_model_filepath = optimized_model_path
+
+    session = ort.InferenceSession(
+        model_path,
+        sess_options=options,
+        providers=["CPUExecutionProvider"]
+    )
+    logger.info(
+        "ONNX session for %s: optimization=%s intra_op=%s inter_op=%s mode=%s",
+        model_path, graph_optimization_level, intra_op_num_threads,
+        inter_op_num_threads, execution_mode
+    )
+    return session
+
+def quantize_model(input_path: str, output_path: str, per_channel: bool = False) -> str:
+    """Write a dynamically quantized (INT8 weights) copy of an FP32 model"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        model_input=input_path,
+        model_output=output_path,
+        weight_type=QuantType.QInt8,
+        per_channel=per_channel
+    )
+    before = Path(input_path).stat().st_size
+    after = Path(output_path).stat().st_size
+    logger.info("Quantized %s -> %s (%.1f MB -> %.1f MB)", input_path, output_path, before / 1e6, after / 1e6)
+    return output_path
+
+def export_shared_model(
+    input_path: str,
+    output_path: Optional[str] = None,
+    min_size_in_bytes: int = 1024
+) -> str:
+    """Optimize a model offline and move its weights to a page-aligned file.
+
+    Writes ``<output>`` (graph only) and ``<output stem>.weights``. Aligning
+    each initializer to the page size lets ONNX Runtime map it straight from
+    the file instead of copying it into a private buffer.
+    """
+    import onnx
+    from onnx.external_data_helper import set_external_data
+
+    output_path = output_path or shared_path(input_path)
+    output = Path(output_path)
+    weights_name = f"{output.stem}.weights"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        optimized = os.path.join(tmp, "optimized.onnx")
+        create_session(input_path, graph_optimization_level="all", optimized_model_path=optimized)
+        model = onnx.load(optimized)
+
+    page = mmap.ALLOCATIONGRANULARITY
+    with open(output.with_name(weights_name), "wb") as weights:
+        for tensor in model.graph.initializer:
+            if not tensor.HasField("raw_data") or len(tensor.raw_data) < min_size_in_bytes:
+                continue
+            weights.write(b"\0" * (-weights.tell() % page))
+            offset = weights.tell()
+            weights.write(tensor.raw_data)
+            set_external_data(tensor, location=weights_name, offset=offset, length=len(tensor.raw_data))
+            tensor.data_location = onnx.TensorProto.EXTERNAL
+            tensor.ClearField("raw_data")
+
+    onnx.save_model(model, output_path)
+    logger.info("Exported shared-weights model %s (+ %s)", output_path, weights_name)
+    return output_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ONNX model preparation")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    quantize = commands.add_parser("quantize", help="Create a dynamically quantized INT8 model")
+    quantize.add_argument("--input", default="model_serving/legal_bert/model.onnx")
+    quantize.add_argument("--output")
+    quantize.add_argument("--per-channel", action="store_true")
+
+    share = commands.add_parser("share", help="Export a model whose weights worker processes can share")
+    share.add_argument("--input", default="model_serving/legal_bert/model.onnx")
+    share.add_argument("--output")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "quantize":
+        quantize_model(args.input, args.output or quantized_path(args.input), args.per_channel)
+    elif args.command == "share":
+        export_shared_model(args.input, args.output)
+
+if __name__ == "__main__":
+    main()
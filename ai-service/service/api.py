@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Literal
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from service.batching import MicroBatcher
+from service.cache import SuggestionCache
+from service.config import settings
+from service.incremental import IncrementalSuggestionStore, RevisionConflict, UnknownDocument
+from service.metrics import StreamMetrics
+from service.pipeline import SuggestionPipeline
+from service.schemas import (
+    DocumentEditRequest,
+    DocumentSuggestions,
+    DocumentSyncRequest,
+    SuggestRequest,
+    SuggestResponse
+)
+from service.suggestion_service import LegalSuggestionEngine
+from service.workers import InferenceWorkerPool
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Served while the model loads; everything else under /api/ai waits for it
+PROBE_PATHS = {"/api/ai/health", "/api/ai/ready"}
+
+async def start_engine(app: FastAPI, started: float) -> None:
+    """Load and warm up the model, then start the micro-batcher"""
+    loop = asyncio.get_running_loop()
+    if settings.INFERENCE_WORKERS > 0:
+        engine = None
+        workers = app.state.workers = InferenceWorkerPool(settings.INFERENCE_WORKERS)
+        await workers.start()
+        model_version = workers.model_version
+        load_seconds, warmup_seconds = workers.load_seconds, workers.warmup_seconds
+        run_batch = workers.run_batch
+        max_in_flight = settings.INFERENCE_WORKERS
+    else:
+        # Loading and warmup block for seconds; keep the loop free for probes
+        engine = await loop.run_in_executor(None, LegalSuggestionEngine.from_settings, settings)
+        workers = None
+        model_version = engine.model_version
+        if settings.WARMUP_BATCH_SIZES:
+            await loop.run_in_executor(None, engine.warmup, settings.WARMUP_BATCH_SIZES)
+        load_seconds, warmup_seconds = engine.load_seconds, engine.warmup_seconds
+        max_in_flight = settings.BATCH_MAX_IN_FLIGHT
+
+        async def run_batch(texts):
+            # ONNX Runtime releases the GIL, so the event loop keeps accepting
+            # requests (and filling the next batch) while a batch is running.
+            return await loop.run_in_executor(None, engine.generate_suggestions_batch, texts)
+
+    batcher = app.state.batcher = MicroBatcher(
+        run_batch,
+        max_batch_size=settings.BATCH_MAX_SIZE,
+        max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+        max_in_flight=max_in_flight
+    )
+    await batcher.start()
+    cache = SuggestionCache(
+        model_version,
+        max_entries=settings.SUGGESTION_CACHE_SIZE,
+        ttl_seconds=settings.SUGGESTION_CACHE_TTL_SECONDS,
+        disk_path=settings.SUGGESTION_CACHE_DIR
+    )
+    app.state.engine = engine
+    app.state.cache = cache
+    app.state.pipeline = SuggestionPipeline(batcher, cache)
+    app.state.documents = IncrementalSuggestionStore(
+        app.state.pipeline,
+        max_documents=settings.INCREMENTAL_MAX_DOCUMENTS
+    )
+    app.state.stream_metrics = StreamMetrics()
+    app.state.startup = {
+        "model_load_seconds": load_seconds,
+        "warmup_seconds": warmup_seconds,
+        "ready_after_seconds": time.perf_counter() - started,
+        "first_request_ms": None
+    }
+    app.state.ready = True
+    logger.info(
+        "Suggestion engine %s ready in %.2fs (load %.2fs, warmup %.2fs; %s variant, %d worker processes)",
+        model_version, app.state.startup["ready_after_seconds"], load_seconds, warmup_seconds,
+        settings.MODEL_VARIANT, settings.INFERENCE_WORKERS
+    )
+
+async def _start_in_background(app: FastAPI) -> None:
+    try:
+        await start_engine(app, time.perf_counter())
+    except Exception as e:
+        logger.exception("Suggestion engine failed to start")
+        app.state.startup_error = f"{type(e).__name__}: {e}"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Accept connections at once and load the model in the background.
+
+    Liveness checks are answered while the model loads, and readiness stays
+    503 until warmup has finished.
+    """
+    app.state.ready = False
+    app.state.startup_error = None
+    app.state.workers = None
+    app.state.batcher = None
+    starting = asyncio.create_task(_start_in_background(app))
+
+    yield
+
+    starting.cancel()
+    await asyncio.gather(starting, return_exceptions=True)
+    if app.state.batcher:
+        await app.state.batcher.stop()
+    if app.state.workers:
+        await app.state.workers.stop()
+
+app = FastAPI(
+    title="LegalDraft AI Service",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+@app.middleware("http")
+async def reject_until_ready(request: Request, call_next):
+    if not getattr(request.app.state, "ready", False) and request.url.path not in PROBE_PATHS:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": "Warming up"})
+    return await call_next(request)
+
+@app.middleware("http")
+async def record_first_request(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    startup = getattr(request.app.state, "startup", None)
+    if startup and startup["first_request_ms"] is None and request.url.path.startswith("/api/ai/suggest"):
+        startup["first_request_ms"] = (time.perf_counter() - started) * 1000
+        logger.info("First suggestion request served in %.1fms", startup["first_request_ms"])
+    return response
+
+@app.get("/api/ai/health")
+async def health(request: Request):
+    """Liveness probe; fails only if the model could not be loaded, so the pod is restarted"""
+    error = getattr(request.app.state, "startup_error", None)
+    if error:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error)
+    return {"status": "OK"}
+
+@app.get("/api/ai/ready")
+async def ready(request: Request):
+    """Readiness probe; only succeeds once the model is loaded and warmed up"""
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Warming up")
+    return {"status": "ready", **request.app.state.startup}
+
+@app.post("/api/ai/suggest", response_model=SuggestResponse)
+async def suggest(payload: SuggestRequest, request: Request):
+    """Score a draft and return drafting suggestions"""
+    suggestions = await request.app.state.pipeline.suggest(payload.content)
+    return {"suggestions": suggestions}
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream"
+}
+
+def _encode_event(event: dict, fmt: str) -> str:
+    if fmt == "sse":
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+async def _stream_events(request: Request, content: str, fmt: str) -> AsyncIterator[str]:
+    metrics = request.app.state.stream_metrics
+    metrics.streams += 1
+    started = time.perf_counter()
+    first_suggestion = False
+    chunks = total = 0
+    stream = request.app.state.pipeline.stream(
+        content,
+        chunk_paragraphs=settings.STREAM_CHUNK_PARAGRAPHS,
+        max_pending=settings.STREAM_MAX_PENDING_CHUNKS
+    )
+    try:
+        async for suggestions in stream:
+            if await request.is_disconnected():
+                metrics.cancelled += 1
+                return
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if chunks == 0:
+                metrics.time_to_first_chunk_ms.observe(elapsed_ms)
+            if suggestions and not first_suggestion:
+                metrics.time_to_first_suggestion_ms.observe(elapsed_ms)
+                first_suggestion = True
+            chunks += 1
+            total += len(suggestions)
+            yield _encode_event({"type": "suggestions", "chunk": chunks - 1, "suggestions": suggestions}, fmt)
+        yield _encode_event({"type": "done", "chunks": chunks, "total": total}, fmt)
+        metrics.duration_ms.observe((time.perf_counter() - started) * 1000)
+    except asyncio.CancelledError:
+        metrics.cancelled += 1
+        raise
+    finally:
+        await stream.aclose()
+
+@app.post("/api/ai/suggest/stream")
+async def suggest_stream(
+    payload: SuggestRequest,
+    request: Request,
+    format: Literal["ndjson", "sse"] = "ndjson"
+):
+    """Stream suggestions chunk by chunk as NDJSON lines or server-sent events"""
+    return StreamingResponse(
+        _stream_events(request, payload.content, format),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.put("/api/ai/documents/{document_id}", response_model=DocumentSuggestions)
+async def sync_document(document_id: str, payload: DocumentSyncRequest, request: Request):
+    """Register the full text of a document for incremental suggestions"""
+    revision, suggestions = await request.app.state.documents.sync(document_id, payload.content)
+    return {"document_id": document_id, "revision": revision, "suggestions": suggestions}
+
+@app.post("/api/ai/documents/{document_id}/edits", response_model=DocumentSuggestions)
+async def apply_document_edits(document_id: str, payload: DocumentEditRequest, request: Request):
+    """Re-score only the edited paragraphs and return the merged suggestion set"""
+    try:
+        revision, suggestions = await request.app.state.documents.apply(
+            document_id,
+            payload.base_revision,
+            [edit.dict() for edit in payload.edits]
+        )
+    except UnknownDocument:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document {document_id} is not synced"
+        )
+    except RevisionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "current_revision": e.current_revision}
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    return {"document_id": document_id, "revision": revision, "suggestions": suggestions}
+
+@app.delete("/api/ai/documents/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def forget_document(document_id: str, request: Request):
+    """Drop the stored paragraph state for a document"""
+    request.app.state.documents.forget(document_id)
+    return None
+
+@app.get("/api/ai/metrics")
+async def metrics(request: Request):
+    """Batching and cache metrics for throughput/latency tuning"""
+    workers = request.app.state.workers
+    return {
+        "startup": request.app.state.startup,
+        "batcher": request.app.state.batcher.stats(),
+        "workers": workers.stats() if workers else None,
+        "cache": request.app.state.cache.stats(),
+        "documents": request.app.state.documents.stats(),
+        "streaming": request.app.state.stream_metrics.summary()
+    }
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from service.metrics import Distribution
+
+BatchRunner = Callable[[List[str]], Awaitable[List[List[Dict]]]]
+
+class MicroBatcher:
+    """Coalesce concurrent suggestion requests into batched inference calls.
+
+    Requests are queued and dispatched as a single batch once
+    ``max_batch_size`` items are waiting or the oldest item has waited
+    ``max_wait_ms``. Each caller receives only its own slice of the batch.
+    """
+
+    def __init__(
+        self,
+        run_batch: BatchRunner,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        max_in_flight: int = 1
+    ):
+        self._run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_in_flight = max_in_flight
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatches: set = set()
+
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes = Distribution()
+        self.queue_wait_ms = Distribution()
+        self.inference_ms = Distribution()
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._worker = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        await asyncio.gather(*self._dispatches, return_exceptions=True)
+        while self._queue and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Suggestion batcher stopped"))
+
+    async def submit(self, text: str) -> List[Dict]:
+        return (await self.submit_many([text]))[0]
+
+    async def submit_many(self, texts: List[str]) -> List[List[Dict]]:
+        if self._worker is None:
+            raise RuntimeError("Suggestion batcher is not running")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._queue.put_nowait((text, future, time.perf_counter()))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _collect(self) -> None:
+        while True:
+            first = await self._queue.get()
+            # Wait for a free inference slot before closing the batch so that
+            # requests arriving meanwhile ride along instead of queueing behind it.
+            await self._slots.acquire()
+            batch = [first]
+            deadline = first[2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list) -> None:
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.queue_wait_ms.observe((started - enqueued) * 1000)
+        self.batches += 1
+        self.items += len(batch)
+        self.batch_sizes.observe(len(batch))
+        try:
+            results = await self._run_batch([text for text, _, _ in batch])
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.inference_ms.observe((time.perf_counter() - started) * 1000)
+            self._slots.release()
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._dispatches),
+            "batches": self.batches,
+            "items": self.items,
+            "batch_size": self.batch_sizes.summary(),
+            "queue_wait_ms": self.queue_wait_ms.summary(),
+            "inference_ms": self.inference_ms.summary(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+WORD = re.compile(r"\S+")
+CONTEXT_MAX_CHARS = 200
+
+def normalize(text: str) -> str:
+    """Collapse whitespace so reflowed but unchanged paragraphs share a key"""
+    return " ".join(text.split())
+
+def clip_context(context: str) -> str:
+    return context[:CONTEXT_MAX_CHARS] + "..." if len(context) > CONTEXT_MAX_CHARS else context
+
+def _words(text: str) -> List[Tuple[int, int, int]]:
+    """(raw offset, normalized offset, length) of each word of ``text``"""
+    words = []
+    position = 0
+    for match in WORD.finditer(text):
+        length = match.end() - match.start()
+        words.append((match.start(), position, length))
+        position += length + 1
+    return words
+
+def _map_offset(offset: int, words: List[Tuple[int, int, int]], source: int, target: int, end: bool) -> int:
+    k = bisect_right([word[source] for word in words], offset) - 1
+    if k < 0:
+        return words[0][target] if words else 0
+    inside = offset - words[k][source]
+    if inside <= words[k][2]:
+        return words[k][target] + inside
+    # Inside whitespace: a span end stays after the word before it, a start
+    # moves to the word after it.
+    if end or k + 1 == len(words):
+        return words[k][target] + words[k][2]
+    return words[k + 1][target]
+
+def _move(text: str, suggestions: List[Dict], source: int, target: int) -> List[Dict]:
+    words = _words(text)
+    return [
+        {
+            **suggestion,
+            "start": _map_offset(suggestion["start"], words, source, target, end=False),
+            "end": _map_offset(suggestion["end"], words, source, target, end=True)
+        }
+        for suggestion in suggestions
+    ]
+
+def to_normalized(text: str, suggestions: List[Dict]) -> List[Dict]:
+    """Move spans relative to ``text`` onto ``normalize(text)``"""
+    return _move(text, suggestions, 0, 1)
+
+def from_normalized(text: str, suggestions: List[Dict]) -> List[Dict]:
+    """Move spans relative to ``normalize(text)`` back onto ``text``"""
+    moved = _move(text, suggestions, 1, 0)
+    for suggestion in moved:
+        if "context" in suggestion:
+            suggestion["context"] = clip_context(text[suggestion["start"]:suggestion["end"]])
+    return moved
+
+def rebase(suggestions: List[Dict], old_text: str, new_text: str) -> List[Dict]:
+    """Carry spans over to a paragraph that differs from the old one only in whitespace"""
+    return from_normalized(new_text, to_normalized(old_text, suggestions))
+
+class SuggestionCache:
+    """Bounded LRU of per-paragraph suggestions with TTL expiry.
+
+    Keys are a hash of the model version and the normalized paragraph text,
+    so a model upgrade never serves stale results. Spans are stored against
+    the normalized text and mapped back onto the caller's text on lookup,
+    so a reflowed paragraph gets offsets into its own whitespace. When ``disk_path`` is set,
+    entries are also written through to a sharded directory of JSON files
+    that can be shared between pods and survives restarts.
+    """
+
+    def __init__(
+        self,
+        model_version: str,
+        max_entries: int = 20000,
+        ttl_seconds: float = 86400,
+        disk_path: Optional[str] = None
+    ):
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = Path(disk_path) if disk_path else None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, text: str) -> str:
+        payload = f"{self.model_version}\0{normalize(text)}".encode()
+        return hashlib.sha256(payload).hexdigest()
+
+    async def get(self, text: str) -> Optional[List[Dict]]:
+        key = self.key(text)
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, suggestions = entry
+            if not self._expired(stored_at):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return from_normalized(text, suggestions)
+            del self._entries[key]
+            self.expirations += 1
+
+        if self.disk_path is not None:
+            loop = asyncio.get_running_loop()
+            entry = await loop.run_in_executor(None, self._read_disk, key)
+            if entry is not None:
+                self._remember(key, *entry)
+                self.disk_hits += 1
+                return from_normalized(text, entry[1])
+
+        self.misses += 1
+        return None
+
+    async def put(self, text: str, suggestions: List[Dict]) -> None:
+        key = self.key(text)
+        stored_at = time.time()
+        normalized = to_normalized(text, suggestions)
+        self._remember(key, stored_at, normalized)
+        if self.disk_path is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_disk, key, stored_at, normalized)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        }
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, stored_at: float, suggestions: List[Dict]) -> None:
+        self._entries[key] = (stored_at, suggestions)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_file(self, key: str) -> Path:
+        return self.disk_path / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        path = self._disk_file(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry["stored_at"]):
+            self.expirations += 1
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        return entry["stored_at"], entry["suggestions"]
+
+    def _write_disk(self, key: str, stored_at: float, suggestions: List[Dict]) -> None:
+        path = self._disk_file(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so concurrent readers on other pods
+        # never observe a partially written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"stored_at": stored_at, "suggestions": suggestions}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,72 @@
+import os
+from typing import List, Optional
+from pydantic_settings import BaseSettings
+
+class Settings(BaseSettings):
+    MODEL_PATH: str = os.getenv("MODEL_PATH", "model_serving/legal_bert/model.onnx")
+    TOKENIZER_PATH: str = os.getenv("TOKENIZER_PATH", "model_serving/legal_bert/tokenizer.json")
+    # "int8" serves the dynamically quantized copy produced by
+    # `python -m model_serving.onnx_utils quantize`
+    MODEL_VARIANT: str = "fp32"
+    # Defaults to a hash of the model file when empty
+    MODEL_VERSION: str = ""
+    MAX_SEQUENCE_LENGTH: int = 512
+
+    # ONNX Runtime session options; 0 threads lets ORT use all physical cores
+    ORT_GRAPH_OPTIMIZATION_LEVEL: str = "all"
+    ORT_INTRA_OP_THREADS: int = 0
+    ORT_INTER_OP_THREADS: int = 0
+    ORT_EXECUTION_MODE: str = "sequential"
+    ORT_ENABLE_CPU_MEM_ARENA: bool = True
+    ORT_ENABLE_MEM_PATTERN: bool = True
+
+    # Dummy batches run for every length bucket at each of these batch sizes
+    # before the service reports ready; empty disables warmup.
+    WARMUP_BATCH_SIZES: List[int] = [1, 8]
+
+    # INFERENCE_WORKERS > 0 runs inference in that many worker processes.
+    # SHARE_MODEL_WEIGHTS loads the `onnx_utils share` export when present so
+    # workers map one copy of the weights instead of each holding their own.
+    INFERENCE_WORKERS: int = 0
+    SHARE_MODEL_WEIGHTS: bool = True
+
+    # "dynamic" pads each length bucket to its longest sequence;
+    # "max_length" pads everything to MAX_SEQUENCE_LENGTH (legacy behaviour).
+    PADDING_STRATEGY: str = "dynamic"
+    LENGTH_BUCKETS: List[int] = [64, 128, 256, 512]
+
+    # Documents longer than MAX_SEQUENCE_LENGTH are scored as overlapping
+    # windows sharing WINDOW_STRIDE tokens.
+    WINDOW_STRIDE: int = 64
+
+    # Suggestion post-processing: a label is reported when its predicted
+    # issue class reaches LABEL_THRESHOLDS[label] probability (order:
+    # Clarity, Compliance, Ambiguity, Completeness); at most TOP_K_PER_SPAN
+    # labels are reported per scored window.
+    LABEL_THRESHOLDS: List[float] = [0.0, 0.0, 0.0, 0.0]
+    TOP_K_PER_SPAN: int = 4
+
+    # Micro-batching: a batch is dispatched once it holds BATCH_MAX_SIZE
+    # requests or the oldest request has waited BATCH_MAX_WAIT_MS.
+    BATCH_MAX_SIZE: int = 16
+    BATCH_MAX_WAIT_MS: float = 5.0
+    BATCH_MAX_IN_FLIGHT: int = 1
+
+    # Per-paragraph suggestion cache; SUGGESTION_CACHE_DIR enables a
+    # write-through on-disk tier (e.g. a shared volume).
+    SUGGESTION_CACHE_SIZE: int = 20000
+    SUGGESTION_CACHE_TTL_SECONDS: int = 86400
+    SUGGESTION_CACHE_DIR: Optional[str] = os.getenv("SUGGESTION_CACHE_DIR")
+
+    # Documents tracked by the incremental (paragraph edit) endpoint
+    INCREMENTAL_MAX_DOCUMENTS: int = 1000
+
+    # Streaming endpoint: paragraphs scored per streamed chunk, and how many
+    # chunks may be scored ahead of a slow client
+    STREAM_CHUNK_PARAGRAPHS: int = 8
+    STREAM_MAX_PENDING_CHUNKS: int = 2
+
+    class Config:
+        case_sensitive = True
+
+settings = Settings()
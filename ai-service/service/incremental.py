@@ -0,0 +1,145 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from service.cache import rebase
+from service.pipeline import SuggestionPipeline, split_paragraphs
+
+PARAGRAPH_SEPARATOR = "\n\n"
+
+class UnknownDocument(Exception):
+    pass
+
+class RevisionConflict(Exception):
+    def __init__(self, current_revision: int):
+        super().__init__(f"Document is at revision {current_revision}")
+        self.current_revision = current_revision
+
+@dataclass
+class DocumentState:
+    revision: int = 0
+    paragraphs: List[str] = field(default_factory=list)
+    fingerprints: List[str] = field(default_factory=list)
+    suggestions: List[List[Dict]] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+class IncrementalSuggestionStore:
+    """Per-document paragraph state so live edits only re-score what changed.
+
+    Clients sync the full text once, then send paragraph edits against the
+    revision they last saw. Documents are kept in an LRU bounded by
+    ``max_documents``; an evicted document simply has to be synced again.
+    """
+
+    def __init__(self, pipeline: SuggestionPipeline, max_documents: int = 1000):
+        self.pipeline = pipeline
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[str, DocumentState]" = OrderedDict()
+        self.paragraphs_received = 0
+        self.paragraphs_rescored = 0
+
+    async def sync(self, document_id: str, content: str) -> Tuple[int, List[Dict]]:
+        """Replace the stored state with the full document text"""
+        state = self._documents.get(document_id) or DocumentState()
+        async with state.lock:
+            paragraphs = [p.text for p in split_paragraphs(content)]
+            state.paragraphs = paragraphs
+            state.fingerprints = [self.pipeline.cache.key(p) for p in paragraphs]
+            state.suggestions = await self._score(paragraphs)
+            state.revision += 1
+            self._remember(document_id, state)
+            return state.revision, self._merge(state)
+
+    async def apply(
+        self,
+        document_id: str,
+        base_revision: int,
+        edits: List[Dict]
+    ) -> Tuple[int, List[Dict]]:
+        """Apply ordered paragraph edits made against ``base_revision``"""
+        state = self._documents.get(document_id)
+        if state is None:
+            raise UnknownDocument(document_id)
+
+        async with state.lock:
+            if state.revision != base_revision:
+                raise RevisionConflict(state.revision)
+
+            paragraphs = list(state.paragraphs)
+            fingerprints = list(state.fingerprints)
+            suggestions: List[Optional[List[Dict]]] = list(state.suggestions)
+            for edit in edits:
+                index, op = edit["index"], edit["op"]
+                upper = len(paragraphs) if op == "insert" else len(paragraphs) - 1
+                if not 0 <= index <= upper:
+                    raise ValueError(f"Paragraph index {index} out of range for {op}")
+                if op == "delete":
+                    del paragraphs[index], fingerprints[index], suggestions[index]
+                    continue
+
+                text = (edit.get("text") or "").strip()
+                fingerprint = self.pipeline.cache.key(text)
+                if op == "insert":
+                    paragraphs.insert(index, text)
+                    fingerprints.insert(index, fingerprint)
+                    suggestions.insert(index, None)
+                elif fingerprints[index] != fingerprint:
+                    paragraphs[index] = text
+                    fingerprints[index] = fingerprint
+                    suggestions[index] = None
+                else:
+                    # Only whitespace changed: keep the findings, moved onto the new text
+                    if suggestions[index] is not None:
+                        suggestions[index] = rebase(suggestions[index], paragraphs[index], text)
+                    paragraphs[index] = text
+                self.paragraphs_received += 1
+
+            stale = [i for i, s in enumerate(suggestions) if s is None]
+            if stale:
+                fresh = await self._score([paragraphs[i] for i in stale])
+                for index, scored in zip(stale, fresh):
+                    suggestions[index] = scored
+
+            state.paragraphs = paragraphs
+            state.fingerprints = fingerprints
+            state.suggestions = suggestions
+            state.revision += 1
+            self._remember(document_id, state)
+            return state.revision, self._merge(state)
+
+    def forget(self, document_id: str) -> None:
+        self._documents.pop(document_id, None)
+
+    def stats(self) -> Dict:
+        return {
+            "documents": len(self._documents),
+            "paragraphs_received": self.paragraphs_received,
+            "paragraphs_rescored": self.paragraphs_rescored
+        }
+
+    async def _score(self, paragraphs: List[str]) -> List[List[Dict]]:
+        results, inferred = await self.pipeline.score_paragraphs_counted(paragraphs)
+        self.paragraphs_rescored += inferred
+        return results
+
+    def _remember(self, document_id: str, state: DocumentState) -> None:
+        self._documents[document_id] = state
+        self._documents.move_to_end(document_id)
+        while len(self._documents) > self.max_documents:
+            self._documents.popitem(last=False)
+
+    def _merge(self, state: DocumentState) -> List[Dict]:
+        """Suggestions in document coordinates, paragraphs joined by blank lines"""
+        merged = []
+        offset = 0
+        for index, (paragraph, suggestions) in enumerate(zip(state.paragraphs, state.suggestions)):
+            for suggestion in suggestions:
+                merged.append({
+                    **suggestion,
+                    "paragraph": index,
+                    "start": suggestion["start"] + offset,
+                    "end": suggestion["end"] + offset
+                })
+            offset += len(paragraph) + len(PARAGRAPH_SEPARATOR)
+        return merged
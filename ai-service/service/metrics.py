@@ -0,0 +1,53 @@
+from collections import deque
+from typing import Dict
+
+class Distribution:
+    """Rolling window of recent observations with summary percentiles"""
+
+    def __init__(self, window: int = 2048):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max
+        }
+
+class StreamMetrics:
+    """Latency of streamed suggestion responses"""
+
+    def __init__(self):
+        self.streams = 0
+        self.cancelled = 0
+        self.time_to_first_chunk_ms = Distribution()
+        self.time_to_first_suggestion_ms = Distribution()
+        self.duration_ms = Distribution()
+
+    def summary(self) -> Dict:
+        return {
+            "streams": self.streams,
+            "cancelled": self.cancelled,
+            "time_to_first_chunk_ms": self.time_to_first_chunk_ms.summary(),
+            "time_to_first_suggestion_ms": self.time_to_first_suggestion_ms.summary(),
+            "duration_ms": self.duration_ms.summary()
+        }
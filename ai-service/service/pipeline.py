@@ -0,0 +1,123 @@
+import asyncio
+import re
+from typing import AsyncIterator, Dict, List, NamedTuple, Tuple
+
+from service.batching import MicroBatcher
+from service.cache import SuggestionCache, rebase
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+class Paragraph(NamedTuple):
+    offset: int
+    text: str
+
+def split_paragraphs(text: str) -> List[Paragraph]:
+    """Split on blank lines, keeping each paragraph's character offset"""
+    paragraphs = []
+    position = 0
+    for match in PARAGRAPH_BREAK.finditer(text):
+        _append_paragraph(paragraphs, text, position, match.start())
+        position = match.end()
+    _append_paragraph(paragraphs, text, position, len(text))
+    return paragraphs
+
+def _append_paragraph(paragraphs: List[Paragraph], text: str, start: int, end: int) -> None:
+    chunk = text[start:end]
+    stripped = chunk.strip()
+    if stripped:
+        paragraphs.append(Paragraph(start + chunk.index(stripped), stripped))
+
+def shift(suggestions: List[Dict], offset: int) -> List[Dict]:
+    """Move paragraph-relative suggestion spans into document coordinates"""
+    return [
+        {**suggestion, "start": suggestion["start"] + offset, "end": suggestion["end"] + offset}
+        for suggestion in suggestions
+    ]
+
+class SuggestionPipeline:
+    """Per-paragraph scoring where only uncached paragraphs reach the model"""
+
+    def __init__(self, batcher: MicroBatcher, cache: SuggestionCache):
+        self.batcher = batcher
+        self.cache = cache
+
+    async def suggest(self, content: str) -> List[Dict]:
+        paragraphs = split_paragraphs(content)
+        scored = await self.score_paragraphs([p.text for p in paragraphs])
+        suggestions = []
+        for paragraph, paragraph_suggestions in zip(paragraphs, scored):
+            suggestions.extend(shift(paragraph_suggestions, paragraph.offset))
+        return suggestions
+
+    async def score_paragraphs(self, texts: List[str]) -> List[List[Dict]]:
+        """Suggestions for each paragraph, with spans relative to the paragraph"""
+        results, _ = await self.score_paragraphs_counted(texts)
+        return results
+
+    async def score_paragraphs_counted(self, texts: List[str]) -> Tuple[List[List[Dict]], int]:
+        """Like ``score_paragraphs``, also returning how many paragraphs reached the model"""
+        results = list(await asyncio.gather(*(self.cache.get(text) for text in texts)))
+
+        # Identical paragraphs (repeated boilerplate) are inferred once.
+        pending = {}
+        for index, result in enumerate(results):
+            if result is None:
+                pending.setdefault(self.cache.key(texts[index]), []).append(index)
+
+        if pending:
+            groups = list(pending.values())
+            fresh = await self.batcher.submit_many([texts[group[0]] for group in groups])
+            for group, suggestions in zip(groups, fresh):
+                first = texts[group[0]]
+                await self.cache.put(first, suggestions)
+                for index in group:
+                    # Paragraphs grouped by key may differ in whitespace
+                    results[index] = suggestions if index == group[0] else rebase(suggestions, first, texts[index])
+        return results, len(pending)
+
+    async def stream(
+        self,
+        content: str,
+        chunk_paragraphs: int = 8,
+        max_pending: int = 2
+    ) -> AsyncIterator[List[Dict]]:
+        """Yield document-coordinate suggestions chunk by chunk, in order.
+
+        At most ``max_pending`` chunks are scored ahead of the consumer, so a
+        slow client holds back inference instead of buffering results.
+        Closing the generator (e.g. on client disconnect) cancels any chunk
+        still being scored.
+        """
+        paragraphs = split_paragraphs(content)
+        chunks = [
+            paragraphs[i:i + chunk_paragraphs]
+            for i in range(0, len(paragraphs), chunk_paragraphs)
+        ]
+        pending: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        # Every scoring task, including one whose put is still blocked on the queue
+        tasks: List[asyncio.Future] = []
+
+        async def produce():
+            for chunk in chunks:
+                task = asyncio.ensure_future(self.score_paragraphs([p.text for p in chunk]))
+                tasks.append(task)
+                await pending.put((chunk, task))
+            await pending.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    break
+                chunk, task = item
+                scored = await task
+                suggestions = []
+                for paragraph, paragraph_suggestions in zip(chunk, scored):
+                    suggestions.extend(shift(paragraph_suggestions, paragraph.offset))
+                yield suggestions
+        finally:
+            producer.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(producer, *tasks, return_exceptions=True)
@@ -0,0 +1,88 @@
+import numpy as np
+from typing import NamedTuple, Optional, Sequence
+
+class SuggestionArrays(NamedTuple):
+    """Flagged spans for a batch, one element per suggestion"""
+    text_index: np.ndarray  # int32, position of the source text in the batch
+    label: np.ndarray       # int16, index into the engine's labels
+    confidence: np.ndarray  # float32, softmax probability of the predicted class
+    start: np.ndarray       # int32, character offsets into the source text
+    end: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.label)
+
+def softmax(logits: np.ndarray, axis: int = -1) -> np.ndarray:
+    shifted = logits - logits.max(axis=axis, keepdims=True)
+    exp = np.exp(shifted, dtype=np.float32)
+    return exp / exp.sum(axis=axis, keepdims=True)
+
+def decode(
+    logits: np.ndarray,
+    text_index: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    thresholds: Optional[Sequence[float]] = None,
+    top_k: Optional[int] = None
+) -> SuggestionArrays:
+    """Turn (windows, labels, classes) logits into merged suggestion spans.
+
+    A label is flagged for a window when its predicted class is not 0 and the
+    class probability reaches that label's threshold; at most ``top_k`` labels
+    are kept per window. Overlapping windows of the same text flagging the same
+    label are merged into one span carrying the highest confidence. Windows
+    must be ordered by text and then by position, as the tokenizer emits them.
+    """
+    probs = softmax(logits)
+    predicted = probs.argmax(axis=-1)
+    confidence = np.take_along_axis(probs, predicted[..., None], axis=-1)[..., 0]
+
+    mask = predicted != 0
+    if thresholds is not None:
+        mask &= confidence >= np.asarray(thresholds, dtype=np.float32)[None, :]
+    num_labels = logits.shape[1]
+    if top_k is not None and top_k < num_labels:
+        ranked = np.where(mask, confidence, -np.inf)
+        order = np.argsort(-ranked, axis=1, kind="stable")
+        keep = np.zeros_like(mask)
+        np.put_along_axis(keep, order[:, :top_k], True, axis=1)
+        mask &= keep
+
+    windows, labels = np.nonzero(mask)
+    if windows.size == 0:
+        return _empty()
+
+    texts = text_index[windows]
+    span_start = starts[windows]
+    span_end = ends[windows]
+    conf = confidence[windows, labels]
+
+    # Group by (text, label) keeping window order, then start a new span
+    # whenever a window does not overlap the previous one.
+    order = np.lexsort((windows, labels, texts))
+    texts, labels = texts[order], labels[order]
+    span_start, span_end, conf = span_start[order], span_end[order], conf[order]
+
+    new_span = np.ones(len(order), dtype=bool)
+    new_span[1:] = (
+        (texts[1:] != texts[:-1])
+        | (labels[1:] != labels[:-1])
+        | (span_start[1:] > span_end[:-1])
+    )
+    heads = np.flatnonzero(new_span)
+    return SuggestionArrays(
+        text_index=texts[heads].astype(np.int32),
+        label=labels[heads].astype(np.int16),
+        confidence=np.maximum.reduceat(conf, heads).astype(np.float32),
+        start=span_start[heads].astype(np.int32),
+        end=np.maximum.reduceat(span_end, heads).astype(np.int32)
+    )
+
+def _empty() -> SuggestionArrays:
+    return SuggestionArrays(
+        text_index=np.empty(0, dtype=np.int32),
+        label=np.empty(0, dtype=np.int16),
+        confidence=np.empty(0, dtype=np.float32),
+        start=np.empty(0, dtype=np.int32),
+        end=np.empty(0, dtype=np.int32)
+    )
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List, Dict, Literal, Optional
+
+class SuggestRequest(BaseModel):
+    content: str
+
+class SuggestResponse(BaseModel):
+    suggestions: List[Dict]
+
+class ParagraphEdit(BaseModel):
+    op: Literal["replace", "insert", "delete"]
+    index: int
+    text: Optional[str] = None
+
+class DocumentSyncRequest(BaseModel):
+    content: str
+
+class DocumentEditRequest(BaseModel):
+    base_revision: int
+    edits: List[ParagraphEdit]
+
+class DocumentSuggestions(BaseModel):
+    document_id: str
+    revision: int
+    suggestions: List[Dict]
@@ -1,58 +1,251 @@
+import hashlib
+import logging
+import time
 import numpy as np
-from transformers import AutoTokenizer
+from transformers import PreTrainedTokenizerFast
 import onnxruntime as ort
-from typing import List, Dict
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, NamedTuple, Optional, Sequence
+from model_serving.onnx_utils import create_session, resolve_model_path, shared_path
+from service.cache import clip_context
+from service.postprocess import SuggestionArrays, decode
+
+logger = logging.getLogger(__name__)
+
+# Fast tokenizer shipped in the image next to the model
+TOKENIZER_PATH = str(Path(__file__).resolve().parents[1] / "model_serving" / "legal_bert" / "tokenizer.json")
+
+# Sequences are grouped by the smallest bucket they fit in so that a short
+# clause is never batched with (and padded up to) a full page.
+LENGTH_BUCKETS = (64, 128, 256, 512)
+
+LABELS = ["Clarity", "Compliance", "Ambiguity", "Completeness"]
+
+RECOMMENDATIONS = {
+    "Clarity": "Consider simplifying language or defining terms explicitly",
+    "Compliance": "Verify against current regulations in target jurisdiction",
+    "Ambiguity": "Add specificity to avoid multiple interpretations",
+    "Completeness": "Include necessary clauses for enforceability"
+}
+
+class Window(NamedTuple):
+    text_index: int
+    input_ids: List[int]
+    start: int
+    end: int
+
+def file_digest(path: str) -> str:
+    """Short content hash used to version cached suggestions"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
 
 class LegalSuggestionEngine:
-    def __init__(self, model_path: str, tokenizer_name: str = "nlpaueb/legal-bert-base-uncased"):
-        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
-        self.session = ort.InferenceSession(model_path)
-        self.labels = ["Clarity", "Compliance", "Ambiguity", "Completeness"]
+    def __init__(
+        self,
+        model_path: str,
+        tokenizer_path: str = TOKENIZER_PATH,
+        max_length: int = 512,
+        length_buckets: Sequence[int] = LENGTH_BUCKETS,
+        padding: str = "dynamic",
+        stride: int = 64,
+        model_version: str = "",
+        session: Optional[ort.InferenceSession] = None,
+        thresholds: Optional[Sequence[float]] = None,
+        top_k: Optional[int] = None
+    ):
+        started = time.perf_counter()
+        # Loading tokenizer.json directly avoids any hub lookup at startup.
+        self.tokenizer = PreTrainedTokenizerFast(
+            tokenizer_file=tokenizer_path,
+            unk_token="[UNK]",
+            sep_token="[SEP]",
+            pad_token="[PAD]",
+            cls_token="[CLS]",
+            mask_token="[MASK]",
+            model_max_length=max_length
+        )
+        self.session = session or create_session(model_path)
+        self.labels = LABELS
+        self.model_version = model_version or file_digest(model_path)
+        self.max_length = max_length
+        self.length_buckets = sorted(b for b in length_buckets if b < max_length) + [max_length]
+        self.padding = padding
+        # Number of tokens shared by consecutive windows of a long document
+        self.stride = stride
+        # Minimum class probability per label, and max labels kept per window
+        self.thresholds = thresholds
+        self.top_k = top_k
+        self.pad_token_id = self.tokenizer.pad_token_id or 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.load_seconds = time.perf_counter() - started
+        self.warmup_seconds = 0.0
         
+    @classmethod
+    def from_settings(cls, settings) -> "LegalSuggestionEngine":
+        """Build the engine and its tuned ONNX session from service settings"""
+        started = time.perf_counter()
+        model_path = resolve_model_path(settings.MODEL_PATH, settings.MODEL_VARIANT)
+        session_path = model_path
+        shared_weights = settings.SHARE_MODEL_WEIGHTS and Path(shared_path(model_path)).exists()
+        if shared_weights:
+            session_path = shared_path(model_path)
+        elif settings.INFERENCE_WORKERS > 1:
+            logger.warning(
+                "No shared-weights export at %s; each of the %d workers holds its own copy of the model",
+                shared_path(model_path), settings.INFERENCE_WORKERS
+            )
+        session = create_session(
+            session_path,
+            graph_optimization_level=settings.ORT_GRAPH_OPTIMIZATION_LEVEL,
+            intra_op_num_threads=settings.ORT_INTRA_OP_THREADS,
+            inter_op_num_threads=settings.ORT_INTER_OP_THREADS,
+            execution_mode=settings.ORT_EXECUTION_MODE,
+            enable_cpu_mem_arena=settings.ORT_ENABLE_CPU_MEM_ARENA,
+            enable_mem_pattern=settings.ORT_ENABLE_MEM_PATTERN,
+            shared_weights=shared_weights
+        )
+        engine = cls(
+            model_path,
+            tokenizer_path=settings.TOKENIZER_PATH,
+            max_length=settings.MAX_SEQUENCE_LENGTH,
+            length_buckets=settings.LENGTH_BUCKETS,
+            padding=settings.PADDING_STRATEGY,
+            stride=settings.WINDOW_STRIDE,
+            model_version=settings.MODEL_VERSION,
+            session=session,
+            thresholds=settings.LABEL_THRESHOLDS,
+            top_k=settings.TOP_K_PER_SPAN
+        )
+        engine.load_seconds = time.perf_counter() - started
+        return engine
+
+    def warmup(self, batch_sizes: Sequence[int] = (1,)) -> float:
+        """Run dummy batches at every bucket length so the first real requests
+        do not pay for ONNX Runtime's lazy allocation and kernel selection"""
+        started = time.perf_counter()
+        self._windows(["This Agreement shall be governed by the laws of the State of New York."])
+        for batch_size in batch_sizes:
+            for length in self.length_buckets:
+                input_ids = np.full((batch_size, length), self.pad_token_id, dtype=np.int64)
+                self.session.run(None, {
+                    "input_ids": input_ids,
+                    "attention_mask": np.ones_like(input_ids)
+                })
+        self.warmup_seconds = time.perf_counter() - started
+        return self.warmup_seconds
+
     def generate_suggestions(self, text: str) -> List[Dict]:
-        inputs = self.tokenizer(
-            text, 
-            truncation=True, 
-            max_length=512,
-            return_tensors="np",
-            padding="max_length"
+        return self.generate_suggestions_batch([text])[0]
+
+    def generate_suggestions_batch(self, texts: List[str]) -> List[List[Dict]]:
+        return format_suggestions(self.score_batch(texts), texts)
+
+    def score_batch(self, texts: List[str]) -> SuggestionArrays:
+        """Flagged spans for a batch as compact arrays (see format_suggestions)"""
+        windows = self._windows(texts)
+        logits = self._run([window.input_ids for window in windows])
+        return decode(
+            logits,
+            np.fromiter((w.text_index for w in windows), dtype=np.int32, count=len(windows)),
+            np.fromiter((w.start for w in windows), dtype=np.int32, count=len(windows)),
+            np.fromiter((w.end for w in windows), dtype=np.int32, count=len(windows)),
+            thresholds=self.thresholds,
+            top_k=self.top_k
         )
-        
-        ort_inputs = {
-            "input_ids": inputs["input_ids"].astype(np.int64),
-            "attention_mask": inputs["attention_mask"].astype(np.int64)
-        }
-        
-        outputs = self.session.run(None, ort_inputs)
-        logits = outputs[0]
-        predictions = np.argmax(logits, axis=-1)
-        
-        suggestions = []
-        for i, pred in enumerate(predictions[0]):
-            if pred != 0:  # Only suggest if issue detected
-                suggestion = self._create_suggestion(
-                    issue_type=self.labels[i],
-                    confidence=logits[0][i][pred],
-                    context=text
-                )
-                suggestions.append(suggestion)
-                
-        return suggestions
-    
-    def _create_suggestion(self, issue_type: str, confidence: float, context: str) -> Dict:
-        return {
-            "issue_type": issue_type,
-            "confidence": float(confidence),
-            "recommendation": self._get_recommendation(issue_type),
-            "context": context[:200] + "..." if len(context) > 200 else context,
-            "reason": f"Potential {issue_type.lower()} issue detected with confidence {confidence:.2f}"
-        }
+
+    def _windows(self, texts: List[str]) -> List[Window]:
+        """Split texts into overlapping token windows anchored to character offsets"""
+        encoded = self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.max_length,
+            stride=self.stride,
+            return_overflowing_tokens=True,
+            return_offsets_mapping=True,
+            padding=False,
+            return_attention_mask=False
+        )
+        windows = []
+        for input_ids, offsets, text_index in zip(
+            encoded["input_ids"],
+            encoded["offset_mapping"],
+            encoded["overflow_to_sample_mapping"]
+        ):
+            # Special tokens ([CLS], [SEP]) map to the empty (0, 0) span.
+            content = [span for span in offsets if span[1] > span[0]]
+            start = content[0][0] if content else 0
+            end = content[-1][1] if content else 0
+            windows.append(Window(text_index, input_ids, start, end))
+        return windows
     
-    def _get_recommendation(self, issue_type: str) -> str:
-        recommendations = {
-            "Clarity": "Consider simplifying language or defining terms explicitly",
-            "Compliance": "Verify against current regulations in target jurisdiction",
-            "Ambiguity": "Add specificity to avoid multiple interpretations",
-            "Completeness": "Include necessary clauses for enforceability"
-        }
-        return recommendations.get(issue_type, "Review section for potential improvements")
\ No newline at end of file
+    def _run(self, sequences: List[List[int]]) -> np.ndarray:
+        """Run token sequences through the model, one session call per length bucket"""
+        groups = defaultdict(list)
+        for index, ids in enumerate(sequences):
+            groups[self._bucket_for(len(ids))].append(index)
+
+        logits = [None] * len(sequences)
+        for bucket, indices in groups.items():
+            if self.padding == "max_length":
+                width = self.max_length
+            else:
+                width = max(len(sequences[i]) for i in indices)
+            input_ids = np.full((len(indices), width), self.pad_token_id, dtype=np.int64)
+            attention_mask = np.zeros((len(indices), width), dtype=np.int64)
+            for row, index in enumerate(indices):
+                ids = sequences[index]
+                input_ids[row, :len(ids)] = ids
+                attention_mask[row, :len(ids)] = 1
+                self.real_tokens += len(ids)
+            self.padded_tokens += input_ids.size
+
+            outputs = self.session.run(None, {
+                "input_ids": input_ids,
+                "attention_mask": attention_mask
+            })
+            for row, index in enumerate(indices):
+                logits[index] = outputs[0][row]
+        return np.stack(logits)
+
+    def _bucket_for(self, length: int) -> int:
+        if self.padding == "max_length":
+            return self.max_length
+        for bucket in self.length_buckets:
+            if length <= bucket:
+                return bucket
+        return self.max_length
+
+def format_suggestions(arrays: SuggestionArrays, texts: List[str]) -> List[List[Dict]]:
+    """Build the JSON suggestion payload for each text at the response boundary"""
+    results = [[] for _ in texts]
+    for text_index, label, confidence, start, end in zip(
+        arrays.text_index.tolist(),
+        arrays.label.tolist(),
+        arrays.confidence.tolist(),
+        arrays.start.tolist(),
+        arrays.end.tolist()
+    ):
+        results[text_index].append(_create_suggestion(
+            issue_type=LABELS[label],
+            confidence=confidence,
+            context=texts[text_index][start:end],
+            start=start,
+            end=end
+        ))
+    return results
+
+def _create_suggestion(issue_type: str, confidence: float, context: str, start: int, end: int) -> Dict:
+    return {
+        "issue_type": issue_type,
+        "confidence": confidence,
+        "recommendation": RECOMMENDATIONS.get(issue_type, "Review section for potential improvements"),
+        "context": clip_context(context),
+        "start": start,
+        "end": end,
+        "reason": f"Potential {issue_type.lower()} issue detected with confidence {confidence:.2f}"
+    }
@@ -0,0 +1,120 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from service.suggestion_service import format_suggestions
+
+# Engine owned by each worker process, created by _init_worker
+_engine = None
+
+def _init_worker(intra_op_threads: int) -> None:
+    global _engine
+    from service.config import settings
+    from service.suggestion_service import LegalSuggestionEngine
+
+    # Split the cores between workers instead of letting every worker's
+    # ONNX Runtime thread pool claim all of them.
+    settings.ORT_INTRA_OP_THREADS = intra_op_threads
+    settings.ORT_INTER_OP_THREADS = 1
+    _engine = LegalSuggestionEngine.from_settings(settings)
+    if settings.WARMUP_BATCH_SIZES:
+        _engine.warmup(settings.WARMUP_BATCH_SIZES)
+
+def _ping() -> tuple:
+    return os.getpid(), _engine.model_version, _engine.load_seconds, _engine.warmup_seconds
+
+def _infer(texts: List[str]) -> tuple:
+    started = time.perf_counter()
+    # Arrays pickle far more compactly than lists of dicts; the API process
+    # builds the JSON payload.
+    arrays = _engine.score_batch(texts)
+    return os.getpid(), time.perf_counter() - started, arrays
+
+class WorkerStats:
+    def __init__(self, window_seconds: float):
+        self.started = time.monotonic()
+        self.tasks = 0
+        self.busy_seconds = 0.0
+        self._recent = deque()
+        self._window = window_seconds
+
+    def record(self, busy: float) -> None:
+        now = time.monotonic()
+        self.tasks += 1
+        self.busy_seconds += busy
+        self._recent.append((now, busy))
+        while self._recent and self._recent[0][0] < now - self._window:
+            self._recent.popleft()
+
+    def summary(self) -> Dict:
+        now = time.monotonic()
+        window = min(self._window, now - self.started) or 1.0
+        recent = sum(busy for at, busy in self._recent if at >= now - self._window)
+        return {
+            "tasks": self.tasks,
+            "busy_seconds": self.busy_seconds,
+            "utilization": self.busy_seconds / max(now - self.started, 1e-9),
+            "recent_utilization": recent / window
+        }
+
+class InferenceWorkerPool:
+    """Inference in N worker processes so tokenization and post-processing
+    do not hold the API process's GIL.
+
+    Workers load the model with ``shared_weights`` when a shared export
+    exists (``python -m model_serving.onnx_utils share``), so the weights are
+    mapped once in the page cache instead of copied into every process.
+    """
+
+    def __init__(self, workers: int, utilization_window_seconds: float = 60.0):
+        self.workers = workers
+        self.utilization_window_seconds = utilization_window_seconds
+        self.model_version: Optional[str] = None
+        self.load_seconds = 0.0
+        self.warmup_seconds = 0.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._stats: Dict[int, WorkerStats] = {}
+
+    async def start(self) -> None:
+        intra_op_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(intra_op_threads,)
+        )
+        # Submitting one task per worker spawns (and loads) all of them now
+        # rather than on the first requests.
+        loop = asyncio.get_running_loop()
+        pings = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)
+        ])
+        for pid, model_version, load_seconds, warmup_seconds in pings:
+            self._stats.setdefault(pid, WorkerStats(self.utilization_window_seconds))
+            self.model_version = model_version
+            self.load_seconds = max(self.load_seconds, load_seconds)
+            self.warmup_seconds = max(self.warmup_seconds, warmup_seconds)
+
+    async def stop(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run_batch(self, texts: List[str]) -> List[List[Dict]]:
+        loop = asyncio.get_running_loop()
+        pid, busy, arrays = await loop.run_in_executor(self._executor, _infer, texts)
+        stats = self._stats.get(pid)
+        if stats is None:
+            stats = self._stats[pid] = WorkerStats(self.utilization_window_seconds)
+        stats.record(busy)
+        return format_suggestions(arrays, texts)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "per_worker": {str(pid): stats.summary() for pid, stats in self._stats.items()}
+        }
@@ -0,0 +1,165 @@
+"""Coalescing of editor autosaves into periodic batched writes.
+
+The editor autosaves after every burst of keystrokes. Saves are held in
+memory for up to ``window`` seconds and only the latest content of each draft
+is written, so a draft edited continuously produces one version per window
+instead of one per burst. All drafts pending at the end of a window are
+written in a single transaction through :class:`DraftUnitOfWork`.
+
+If that transaction fails, the drafts are written again one per transaction
+so one bad draft cannot hold back the rest. A draft that still fails is
+retried with exponential backoff and dropped after ``max_attempts``.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core import database
+from backend.core.config import settings
+from backend.apps.documents.services import DraftUnitOfWork
+
+logger = logging.getLogger(__name__)
+
+class AutosaveCoalescer:
+    """Latest pending content per draft, flushed once per window"""
+
+    def __init__(
+        self,
+        window: float,
+        max_attempts: int = 5,
+        retry_base: float = 2.0,
+        retry_max: float = 60.0,
+        session_factory: Optional[Callable[[], AsyncSession]] = None
+    ):
+        self.window = window
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._session_factory = session_factory
+        self._pending: Dict[uuid.UUID, dict] = {}
+        # Failed attempts of the pending save of a draft, and when it is due again
+        self._attempts: Dict[uuid.UUID, int] = {}
+        self._retry_at: Dict[uuid.UUID, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._sleeping = False
+        self._closing = False
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+
+    def submit(self, draft_id: uuid.UUID, content: dict) -> None:
+        """Queue ``content`` as the next version of the draft, replacing any queued save"""
+        self._pending[draft_id] = content
+        self._attempts.pop(draft_id, None)
+        self._retry_at.pop(draft_id, None)
+        self.submitted += 1
+        self._schedule()
+
+    def pending(self, draft_id: uuid.UUID) -> Optional[dict]:
+        return self._pending.get(draft_id)
+
+    def _schedule(self) -> None:
+        if not self._closing and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Flush once per window for as long as saves keep arriving, including during a flush"""
+        while self._pending and not self._closing:
+            self._sleeping = True
+            try:
+                await asyncio.sleep(self.window)
+            finally:
+                self._sleeping = False
+            await self.flush()
+
+    def retry_delay(self, attempts: int) -> float:
+        return min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+
+    async def _write(self, saves: Dict[uuid.UUID, dict]) -> None:
+        session_factory = self._session_factory or database.async_session
+        async with session_factory() as db:
+            async with DraftUnitOfWork(db) as uow:
+                for draft_id, content in saves.items():
+                    uow.save_version(draft_id, content)
+
+    def _failed(self, draft_id: uuid.UUID, content: dict, error: Exception) -> None:
+        if draft_id in self._pending:
+            return  # Superseded by newer content, which gets its own attempts
+        attempts = self._attempts.pop(draft_id, 0) + 1
+        self._retry_at.pop(draft_id, None)
+        if attempts >= self.max_attempts:
+            logger.error(f"Dropping autosave of draft {draft_id} after {attempts} attempts: {str(error)}")
+            self.dropped += 1
+            return
+        self._pending[draft_id] = content
+        self._attempts[draft_id] = attempts
+        self._retry_at[draft_id] = time.monotonic() + self.retry_delay(attempts)
+        self._schedule()
+
+    async def flush(self, force: bool = False) -> int:
+        """Write pending saves that are due, or all of them with ``force``; returns the number written"""
+        now = time.monotonic()
+        due = {
+            draft_id: content for draft_id, content in self._pending.items()
+            if force or self._retry_at.get(draft_id, 0.0) <= now
+        }
+        if not due:
+            return 0
+        for draft_id in due:
+            del self._pending[draft_id]
+        try:
+            await self._write(due)
+            written = list(due)
+        except Exception as e:
+            if len(due) == 1:
+                [(draft_id, content)] = due.items()
+                self._failed(draft_id, content, e)
+                return 0
+            logger.warning(f"Autosave of {len(due)} drafts failed, writing them one by one: {str(e)}")
+            written = []
+            for draft_id, content in due.items():
+                try:
+                    await self._write({draft_id: content})
+                except Exception as e:
+                    self._failed(draft_id, content, e)
+                else:
+                    written.append(draft_id)
+        for draft_id in written:
+            self._attempts.pop(draft_id, None)
+            self._retry_at.pop(draft_id, None)
+        self.written += len(written)
+        return len(written)
+
+    async def close(self) -> None:
+        """Stop the timer, letting a write in progress finish, and write whatever is still pending"""
+        self._closing = True
+        task, self._task = self._task, None
+        if task is not None and task is not asyncio.current_task():
+            if self._sleeping:
+                task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush(force=True)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "written": self.written,
+            "retrying": len(self._attempts),
+            "dropped": self.dropped
+        }
+
+@lru_cache()
+def get_autosave_coalescer() -> AutosaveCoalescer:
+    return AutosaveCoalescer(
+        settings.AUTOSAVE_WINDOW_SECONDS,
+        max_attempts=settings.AUTOSAVE_MAX_ATTEMPTS,
+        retry_base=settings.AUTOSAVE_RETRY_BASE_SECONDS,
+        retry_max=settings.AUTOSAVE_RETRY_MAX_SECONDS
+    )
@@ -0,0 +1,165 @@
+"""Bulk document generation: one template rendered against many contexts.
+
+Rendering is CPU-bound Python, so contexts are split into chunks and rendered
+in a pool of worker processes, each holding its own warm TemplateLoader.
+Chunks amortize the inter-process round trip; a bounded number of chunks is
+in flight at once so memory stays flat for large batches.
+"""
+import asyncio
+import csv
+import io
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from backend.apps.templates.loader import TemplateLoader, get_template_loader
+from backend.core.config import settings
+
+RenderResult = Tuple[bool, str]  # (rendered, html or error message)
+LoaderArgs = Tuple[Optional[str], Optional[str], Optional[bool]]  # templates_dir, bytecode_cache_dir, auto_reload
+
+# Loaders of this process (a pool worker, or the app itself with workers=0) by
+# configuration, with the renderer generation their caches were last valid for
+_loaders: Dict[LoaderArgs, Tuple[TemplateLoader, int]] = {}
+
+def _get_loader(loader_args: LoaderArgs, generation: int) -> TemplateLoader:
+    entry = _loaders.get(loader_args)
+    if entry is None:
+        templates_dir, bytecode_cache_dir, auto_reload = loader_args
+        loader = TemplateLoader(
+            templates_dir=templates_dir,
+            bytecode_cache_dir=bytecode_cache_dir,
+            auto_reload=auto_reload
+        )
+    else:
+        loader, seen = entry
+        if generation <= seen:
+            return loader
+        loader.invalidate()
+    _loaders[loader_args] = (loader, generation)
+    return loader
+
+def _init_worker(loader_args: LoaderArgs) -> None:
+    _get_loader(loader_args, 0)
+
+def _render_chunk(
+    loader_args: LoaderArgs,
+    generation: int,
+    template_name: str,
+    contexts: List[Dict]
+) -> List[RenderResult]:
+    template = _get_loader(loader_args, generation).get_template(template_name)
+    results = []
+    for context in contexts:
+        try:
+            results.append((True, template.render(context)))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+def parse_csv_contexts(text: str) -> List[Dict[str, Any]]:
+    """One context per CSV row; dotted headers such as ``party.name`` nest"""
+    contexts = []
+    for row in csv.DictReader(io.StringIO(text)):
+        context: Dict[str, Any] = {}
+        for header, value in row.items():
+            if header is None:
+                continue
+            *parents, leaf = header.strip().split(".")
+            target = context
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = value
+        contexts.append(context)
+    return contexts
+
+class BatchRenderer:
+    """Renders contexts in a process pool, yielding results chunk by chunk.
+
+    With ``workers=0`` chunks are rendered on a thread in this process, which
+    is enough for development and tests. Workers check templates for changes
+    as ``auto_reload`` says; :meth:`invalidate` makes them drop their caches
+    before the next chunk either way.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        chunk_size: int,
+        templates_dir: Optional[str] = None,
+        bytecode_cache_dir: Optional[str] = None,
+        auto_reload: Optional[bool] = None
+    ):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_in_flight = max(1, workers) * 2
+        self._loader_args: LoaderArgs = (templates_dir, bytecode_cache_dir, auto_reload)
+        self._generation = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.workers == 0:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._loader_args,)
+            )
+        return self._executor
+
+    def invalidate(self, template_name: Optional[str] = None) -> None:
+        """Have every worker drop its compiled templates before rendering again"""
+        self._generation += 1
+
+    async def render(
+        self,
+        template_name: str,
+        contexts: List[Dict]
+    ) -> AsyncIterator[Tuple[int, List[RenderResult]]]:
+        """Yield ``(offset, results)`` for each chunk, in completion order"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        offsets = iter(range(0, len(contexts), self.chunk_size))
+        pending: Dict[asyncio.Future, int] = {}
+
+        def submit() -> bool:
+            offset = next(offsets, None)
+            if offset is None:
+                return False
+            chunk = contexts[offset:offset + self.chunk_size]
+            pending[loop.run_in_executor(
+                executor, _render_chunk, self._loader_args, self._generation, template_name, chunk
+            )] = offset
+            return True
+
+        try:
+            while len(pending) < self.max_in_flight and submit():
+                pass
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    offset = pending.pop(future)
+                    submit()
+                    yield offset, future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+@lru_cache()
+def get_batch_renderer() -> BatchRenderer:
+    renderer = BatchRenderer(
+        workers=settings.BATCH_RENDER_WORKERS,
+        chunk_size=settings.BATCH_RENDER_CHUNK_SIZE,
+        templates_dir=settings.TEMPLATES_DIR,
+        bytecode_cache_dir=settings.TEMPLATE_BYTECODE_CACHE_DIR,
+        auto_reload=settings.TEMPLATE_AUTO_RELOAD
+    )
+    get_template_loader().on_invalidate(renderer.invalidate)
+    return renderer
@@ -1,12 +1,16 @@
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index, Integer, JSON, LargeBinary, UniqueConstraint
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from sqlalchemy.sql import func
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
 from backend.core.database import Base
+from backend.utils import blob_store, versioning
 
 class User(Base):
     __tablename__ = "users"
@@ -89,4 +93,285 @@ class User(Base):
     async def update_last_login(self, db: AsyncSession):
         self.last_login = datetime.utcnow()
         await db.commit()
-        await db.refresh(self)
\ No newline at end of file
+        await db.refresh(self)
+
+class Draft(Base):
+    __tablename__ = "drafts"
+    # Keyset pagination of a user's drafts (see utils/pagination)
+    __table_args__ = (Index("ix_drafts_user_id_created_at", "user_id", "created_at", "id"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    template_id = Column(String, index=True, nullable=False)  # Template name under TEMPLATES_DIR
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    title = Column(String, nullable=True)
+    status = Column(String, default="draft", nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    @classmethod
+    async def lock(cls, db: AsyncSession, draft_ids) -> None:
+        """Lock draft rows until the transaction ends (``SELECT ... FOR UPDATE``).
+
+        Rows are locked in id order, so transactions locking overlapping
+        drafts queue up instead of deadlocking.
+        """
+        stmt = select(cls.id).where(cls.id.in_(sorted(draft_ids))).order_by(cls.id).with_for_update()
+        await db.execute(stmt)
+
+class Version(Base):
+    """One saved version of a draft, stored as a snapshot or as a delta.
+
+    Only snapshots carry a body (``content``, or ``chunks`` when large);
+    a delta version has ``content = None`` and stores its changes against
+    the previous version in ``delta``. Never read ``content`` directly:
+    rebuild versions with ``DraftService.get_version_content`` (or
+    ``versioning.reconstruct`` over :meth:`chain`).
+    """
+    __tablename__ = "versions"
+    __table_args__ = (UniqueConstraint("draft_id", "sequence"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    draft_id = Column(UUID(as_uuid=True), ForeignKey("drafts.id"), nullable=False)
+    sequence = Column(Integer, nullable=False, default=0)
+    kind = Column(String, nullable=False, default=versioning.SNAPSHOT)
+    content = Column(JSON, nullable=True)  # Full content of small snapshots; None for deltas
+    chunks = Column(JSON, nullable=True)  # ContentChunk hashes of large snapshots
+    delta = Column(JSON, nullable=True)  # Changes against the previous version
+    created_at = Column(DateTime, server_default=func.now())
+
+    @property
+    def payload(self):
+        return self.content if self.kind == versioning.SNAPSHOT else self.delta
+
+    @classmethod
+    async def chain(
+        cls,
+        db: AsyncSession,
+        draft_id: uuid.UUID,
+        sequence: Optional[int] = None,
+        since: Optional[int] = None
+    ) -> List["Version"]:
+        """Versions from the nearest snapshot up to ``sequence`` (default: the latest).
+
+        With ``since``, the chain starts at the nearest snapshot at or before
+        ``since`` instead, so every version from ``since`` on can be rebuilt.
+        """
+        snapshot = select(func.max(cls.sequence)).where(
+            cls.draft_id == draft_id,
+            cls.kind == versioning.SNAPSHOT
+        )
+        stmt = select(cls).where(cls.draft_id == draft_id)
+        if since is not None:
+            snapshot = snapshot.where(cls.sequence <= since)
+        elif sequence is not None:
+            snapshot = snapshot.where(cls.sequence <= sequence)
+        if sequence is not None:
+            stmt = stmt.where(cls.sequence <= sequence)
+        stmt = stmt.where(cls.sequence >= snapshot.scalar_subquery()).order_by(cls.sequence)
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    @classmethod
+    async def refs(cls, db: AsyncSession, draft_id: uuid.UUID, first: int, last: int) -> list:
+        """``(id, sequence, created_at)`` rows for sequences ``first``..``last``, without content"""
+        stmt = (
+            select(cls.id, cls.sequence, cls.created_at)
+            .where(cls.draft_id == draft_id, cls.sequence >= first, cls.sequence <= last)
+            .order_by(cls.sequence)
+        )
+        result = await db.execute(stmt)
+        return list(result.all())
+
+class Document(Base):
+    __tablename__ = "documents"
+    __table_args__ = (Index("ix_documents_user_id_created_at", "user_id", "created_at", "id"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    draft_id = Column(UUID(as_uuid=True), ForeignKey("drafts.id"), unique=True, nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)  # Copied from the draft for listing
+    final_content = Column(JSON, nullable=True)  # Small documents only
+    chunks = Column(JSON, nullable=True)  # ContentChunk hashes of large documents
+    storage_provider = Column(String, nullable=True)  # StorageProviderFactory name, once uploaded
+    storage_file_id = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+class UploadJob(Base):
+    """A finalized document waiting to be pushed to a storage provider.
+
+    A worker claims a job by moving ``available_at`` a lease into the future,
+    so the job becomes due again if the worker dies before recording the
+    result. Jobs are deleted once uploaded; ``failed`` ones are kept for
+    inspection. Times come from the application clock that claims compare
+    against.
+    """
+    __tablename__ = "upload_jobs"
+    __table_args__ = (Index("ix_upload_jobs_status_available_at", "status", "available_at"),)
+
+    PENDING = "pending"
+    FAILED = "failed"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id"), nullable=False)
+    provider = Column(String, nullable=False)  # StorageProviderFactory name
+    status = Column(String, default=PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    enqueued_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    async def claim(cls, db: AsyncSession, limit: int, lease_seconds: float) -> List["UploadJob"]:
+        """Lease up to ``limit`` due jobs, oldest first, counting an attempt for each.
+
+        ``FOR UPDATE SKIP LOCKED`` lets concurrent workers claim disjoint
+        batches without waiting on each other's locks (SQLite ignores it and
+        serializes writers instead).
+        """
+        now = datetime.utcnow()
+        due = (
+            select(cls.id)
+            .where(cls.status == cls.PENDING, cls.available_at <= now)
+            .order_by(cls.available_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(cls)
+            .where(cls.id.in_(due.scalar_subquery()))
+            .values(attempts=cls.attempts + 1, available_at=now + timedelta(seconds=lease_seconds))
+            .returning(cls)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    @classmethod
+    async def backlog(cls, db: AsyncSession) -> Dict:
+        """Queued and failed job counts, and how long the oldest queued job has waited"""
+        stmt = select(cls.status, func.count(), func.min(cls.enqueued_at)).group_by(cls.status)
+        rows = {status: (count, oldest) for status, count, oldest in (await db.execute(stmt)).all()}
+        pending, oldest = rows.get(cls.PENDING, (0, None))
+        return {
+            "pending": pending,
+            "failed": rows.get(cls.FAILED, (0, None))[0],
+            "oldest_pending_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+        }
+
+class ContentChunk(Base):
+    """A compressed piece of a stored body, shared by every body that contains it"""
+    __tablename__ = "content_chunks"
+
+    hash = Column(String(64), primary_key=True)  # SHA-256 of the uncompressed chunk
+    codec = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    compressed_size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    BATCH_SIZE = 500  # Rows per statement, well under the bind parameter limits
+
+    @staticmethod
+    def _batches(items: Sequence, size: int):
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+
+    @classmethod
+    async def store(
+        cls,
+        db: AsyncSession,
+        bodies: List[bytes],
+        min_size: int,
+        max_size: int,
+        level: int = 3
+    ) -> List[List[str]]:
+        """Chunk lists for ``bodies``, adding one reference per chunk occurrence.
+
+        Only chunks not already stored are compressed and inserted; the
+        insert is an upsert so a concurrent writer storing the same chunk
+        only adds its references. The caller commits.
+        """
+        lists, pieces = [], {}
+        for body in bodies:
+            hashes = []
+            for chunk in blob_store.split(body, min_size, max_size):
+                digest = blob_store.chunk_hash(chunk)
+                pieces.setdefault(digest, chunk)
+                hashes.append(digest)
+            lists.append(hashes)
+        references = Counter(digest for hashes in lists for digest in hashes)
+        if not references:
+            return lists
+
+        existing = set()
+        for batch in cls._batches(list(references), cls.BATCH_SIZE):
+            result = await db.execute(select(cls.hash).where(cls.hash.in_(batch)))
+            existing.update(result.scalars().all())
+
+        rows = []
+        for digest, count in references.items():
+            if digest in existing:
+                continue
+            codec, data = blob_store.compress(pieces[digest], level)
+            rows.append({
+                "hash": digest,
+                "codec": codec,
+                "size": len(pieces[digest]),
+                "compressed_size": len(data),
+                "data": data,
+                "ref_count": count
+            })
+        insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        for batch in cls._batches(rows, cls.BATCH_SIZE):
+            stmt = insert(cls).values(batch)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[cls.hash],
+                set_={"ref_count": cls.ref_count + stmt.excluded.ref_count}
+            ))
+        await cls._add_references(db, {d: n for d, n in references.items() if d in existing})
+        return lists
+
+    @classmethod
+    async def _add_references(cls, db: AsyncSession, references: Dict[str, int]) -> None:
+        by_count: Dict[int, List[str]] = {}
+        for digest, count in references.items():
+            by_count.setdefault(count, []).append(digest)
+        for count, hashes in by_count.items():
+            for batch in cls._batches(hashes, cls.BATCH_SIZE):
+                await db.execute(
+                    update(cls).where(cls.hash.in_(batch)).values(ref_count=cls.ref_count + count)
+                )
+
+    @classmethod
+    async def load(cls, db: AsyncSession, lists: List[List[str]]) -> List[bytes]:
+        """Bodies for ``lists``, reading and decompressing each distinct chunk once"""
+        chunks: Dict[str, bytes] = {}
+        wanted = list({digest for hashes in lists for digest in hashes})
+        for batch in cls._batches(wanted, cls.BATCH_SIZE):
+            result = await db.execute(select(cls.hash, cls.codec, cls.data).where(cls.hash.in_(batch)))
+            for digest, codec, data in result.all():
+                chunks[digest] = blob_store.decompress(codec, data)
+        missing = set(wanted) - set(chunks)
+        if missing:
+            raise LookupError(f"Missing content chunks: {sorted(missing)[:3]}")
+        return [b"".join(chunks[digest] for digest in hashes) for hashes in lists]
+
+    @classmethod
+    async def stats(cls, db: AsyncSession) -> Dict:
+        """Storage used by chunks and how much deduplication and compression save"""
+        result = await db.execute(select(
+            func.count(),
+            func.coalesce(func.sum(cls.ref_count), 0),
+            func.coalesce(func.sum(cls.size * cls.ref_count), 0),
+            func.coalesce(func.sum(cls.size), 0),
+            func.coalesce(func.sum(cls.compressed_size), 0)
+        ))
+        chunks, references, logical, stored, compressed = result.one()
+        return {
+            "chunks": chunks,
+            "references": references,
+            "logical_bytes": logical,  # What the bodies would take unshared and uncompressed
+            "stored_bytes": stored,  # Distinct chunks, uncompressed
+            "compressed_bytes": compressed,
+            "dedupe_ratio": round(logical / stored, 2) if stored else None,
+            "compression_ratio": round(stored / compressed, 2) if compressed else None
+        }
@@ -0,0 +1,279 @@
+import json
+import logging
+import uuid
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from jinja2 import TemplateNotFound, TemplateSyntaxError
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core import database, exceptions
+from backend.core.database import get_db
+from backend.core.config import settings
+from backend.apps.auth import security
+from backend.apps.documents import models, schemas
+from backend.apps.documents.autosave import AutosaveCoalescer, get_autosave_coalescer
+from backend.apps.documents.batch import BatchRenderer, get_batch_renderer, parse_csv_contexts
+from backend.apps.documents.services import DraftService, get_version_differ
+from backend.apps.documents.uploads import UploadWorker, get_upload_worker
+from backend.apps.templates.loader import TemplateLoader, get_template_loader
+from backend.storage.base_provider import StorageProviderFactory
+from backend.utils.diffing import VersionDiffer
+from backend.utils.streams import encode_chunks, parse_range
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+def _event(event: dict) -> str:
+    return json.dumps(event, default=str) + "\n"
+
+async def _generate_drafts(
+    renderer: BatchRenderer,
+    template_name: str,
+    contexts: List[Dict],
+    user_id: uuid.UUID
+) -> AsyncIterator[str]:
+    total = len(contexts)
+    created, failed = [], 0
+    yield _event({"type": "started", "total": total})
+    # The request-scoped session is closed before a streamed body runs, so the
+    # batch owns its session; everything is committed once at the end.
+    async with database.async_session() as db:
+        try:
+            async for offset, results in renderer.render(template_name, contexts):
+                rendered = []
+                for index, (ok, output) in enumerate(results, start=offset):
+                    if ok:
+                        rendered.append((contexts[index], output))
+                    else:
+                        failed += 1
+                        yield _event({"type": "error", "index": index, "message": output})
+                created += await DraftService.bulk_create_drafts(db, template_name, user_id, rendered)
+                yield _event({
+                    "type": "progress",
+                    "rendered": len(created),
+                    "failed": failed,
+                    "total": total
+                })
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Batch generation from {template_name} failed: {str(e)}")
+            yield _event({"type": "aborted", "message": "Batch generation failed; no drafts were saved"})
+            return
+    yield _event({"type": "done", "created": len(created), "failed": failed, "draft_ids": created})
+
+def _stream_batch(
+    template_name: str,
+    contexts: List[Dict],
+    current_user: models.User,
+    loader: TemplateLoader,
+    renderer: BatchRenderer
+) -> StreamingResponse:
+    if not contexts:
+        raise exceptions.FieldValidationError({"contexts": "At least one context is required"})
+    if len(contexts) > settings.BATCH_MAX_DOCUMENTS:
+        raise exceptions.FieldValidationError({
+            "contexts": f"At most {settings.BATCH_MAX_DOCUMENTS} documents per batch"
+        })
+    # Fail fast, before streaming starts, if the template cannot be compiled
+    try:
+        loader.get_template(template_name)
+    except TemplateNotFound:
+        raise exceptions.TemplateNotFoundException(template_name)
+    except TemplateSyntaxError:
+        raise exceptions.InvalidTemplateException(template_name)
+    return StreamingResponse(
+        _generate_drafts(renderer, template_name, contexts, current_user.id),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/batch")
+async def generate_batch(
+    payload: schemas.BatchGenerateRequest,
+    current_user: models.User = Depends(security.get_current_active_user),
+    loader: TemplateLoader = Depends(get_template_loader),
+    renderer: BatchRenderer = Depends(get_batch_renderer)
+):
+    """Create one draft per context and stream NDJSON progress"""
+    return _stream_batch(payload.template_name, payload.contexts, current_user, loader, renderer)
+
+@router.post("/batch/csv")
+async def generate_batch_from_csv(
+    template_name: str,
+    request: Request,
+    current_user: models.User = Depends(security.get_current_active_user),
+    loader: TemplateLoader = Depends(get_template_loader),
+    renderer: BatchRenderer = Depends(get_batch_renderer)
+):
+    """Create one draft per CSV row (dotted headers nest) and stream NDJSON progress"""
+    body = await request.body()
+    try:
+        contexts = parse_csv_contexts(body.decode("utf-8-sig"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise exceptions.FieldValidationError({"csv": str(e)})
+    return _stream_batch(template_name, contexts, current_user, loader, renderer)
+
+@router.post("/render")
+async def render_document(
+    payload: schemas.RenderRequest,
+    current_user: models.User = Depends(security.get_current_active_user),
+    loader: TemplateLoader = Depends(get_template_loader)
+):
+    """Render a template as a chunked response without building it in memory"""
+    try:
+        chunks = loader.stream_template(payload.template_name, payload.context)
+    except TemplateNotFound:
+        raise exceptions.TemplateNotFoundException(payload.template_name)
+    except TemplateSyntaxError:
+        raise exceptions.InvalidTemplateException(payload.template_name)
+    # A sync iterator is advanced in the threadpool, one chunk at a time
+    return StreamingResponse(encode_chunks(chunks), media_type="text/html; charset=utf-8")
+
+async def _owned_draft(db: AsyncSession, draft_id: uuid.UUID, user: models.User) -> models.Draft:
+    draft = await db.get(models.Draft, draft_id)
+    if draft is None:
+        raise exceptions.DocumentNotFoundException(str(draft_id))
+    if draft.user_id != user.id:
+        raise exceptions.PermissionDeniedException("draft", str(draft_id))
+    return draft
+
+async def _page(listing, db: AsyncSession, owner_id: uuid.UUID, cursor: Optional[str], limit: int) -> Dict:
+    try:
+        return await listing(db, owner_id, cursor, limit)
+    except ValueError as e:
+        raise exceptions.FieldValidationError({"cursor": str(e)})
+
+@router.get("", response_model=schemas.DocumentPage)
+async def list_documents(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_PAGE_MAX_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_active_user)
+):
+    """Finalized documents, newest first"""
+    return await _page(DraftService.list_documents, db, current_user.id, cursor, limit)
+
+@router.get("/drafts", response_model=schemas.DraftPage)
+async def list_drafts(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_PAGE_MAX_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_active_user)
+):
+    """Drafts, newest first"""
+    return await _page(DraftService.list_drafts, db, current_user.id, cursor, limit)
+
+@router.get("/drafts/{draft_id}/versions", response_model=schemas.VersionPage)
+async def list_versions(
+    draft_id: uuid.UUID,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_PAGE_MAX_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_active_user)
+):
+    """Versions of a draft, newest first, without their content"""
+    await _owned_draft(db, draft_id, current_user)
+    return await _page(DraftService.list_versions, db, draft_id, cursor, limit)
+
+@router.put("/drafts/{draft_id}/autosave", status_code=status.HTTP_202_ACCEPTED)
+async def autosave_draft(
+    draft_id: uuid.UUID,
+    payload: schemas.AutosaveRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_active_user),
+    coalescer: AutosaveCoalescer = Depends(get_autosave_coalescer)
+):
+    """Queue the editor content; saves within the autosave window become one version"""
+    draft = await _owned_draft(db, draft_id, current_user)
+    if draft.status == "finalized":
+        raise exceptions.DraftFinalizedException(str(draft_id))
+    coalescer.submit(draft_id, payload.content)
+    return {"draft_id": draft_id, "queued": True}
+
+@router.get("/drafts/{draft_id}/diff", response_model=schemas.VersionDiff)
+async def diff_versions(
+    draft_id: uuid.UUID,
+    to_version: int = Query(..., ge=0),
+    from_version: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_active_user),
+    differ: VersionDiffer = Depends(get_version_differ)
+):
+    """Changes between two versions (by default, ``to_version`` and the one before it)"""
+    await _owned_draft(db, draft_id, current_user)
+    if from_version is None:
+        from_version = max(to_version - 1, 0)
+    diff = await DraftService.diff_versions(db, draft_id, from_version, to_version, differ)
+    if diff is None:
+        raise exceptions.VersionNotFoundException(str(draft_id), to_version)
+    return diff
+
+@router.get("/drafts/{draft_id}/history", response_model=schemas.VersionHistory)
+async def version_history(
+    draft_id: uuid.UUID,
+    start: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=settings.VERSION_HISTORY_MAX_LIMIT),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_active_user),
+    differ: VersionDiffer = Depends(get_version_differ)
+):
+    """Diff of every version from ``start`` against its predecessor, for a timeline"""
+    await _owned_draft(db, draft_id, current_user)
+    return await DraftService.version_history(db, draft_id, start, limit, differ)
+
+@router.get("/storage/stats")
+async def storage_stats(
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_active_user),
+    uploads: UploadWorker = Depends(get_upload_worker)
+):
+    """Content chunk storage, provider counters such as cache hits, and upload backlog and lag"""
+    return {
+        **await DraftService.storage_stats(db),
+        "providers": StorageProviderFactory.stats(),
+        "uploads": {**await models.UploadJob.backlog(db), **uploads.stats()}
+    }
+
+@router.get("/{document_id}/download")
+async def download_document(
+    document_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_active_user)
+):
+    """Stream a stored document from its provider, honouring a single Range header"""
+    document = await db.get(models.Document, document_id)
+    if document is None or document.user_id != current_user.id or not document.storage_file_id:
+        raise exceptions.DocumentNotFoundException(str(document_id))
+    provider = StorageProviderFactory.get(document.storage_provider)
+    info = await provider.stat(document.storage_file_id)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(info.name)}"
+    }
+    path = provider.local_path(document.storage_file_id)
+    if path is not None:
+        # FileResponse handles Range itself and lets the server use sendfile
+        return FileResponse(path, media_type=info.mimetype, headers=headers)
+    try:
+        byte_range = parse_range(request.headers.get("range"), info.size)
+    except ValueError:
+        return Response(status_code=416, headers={
+            "Content-Range": f"bytes */{info.size}"
+        })
+    if byte_range is None:
+        headers["Content-Length"] = str(info.size)
+        chunks = provider.open_stream(document.storage_file_id)
+        return StreamingResponse(chunks, media_type=info.mimetype, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        provider.open_stream(document.storage_file_id, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=info.mimetype,
+        headers=headers
+    )
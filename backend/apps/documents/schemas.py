@@ -0,0 +1,76 @@
+from pydantic import BaseModel
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+import uuid
+
+class BatchGenerateRequest(BaseModel):
+    template_name: str
+    contexts: List[Dict[str, Any]]
+
+class RenderRequest(BaseModel):
+    template_name: str
+    context: Dict[str, Any]
+
+class AutosaveRequest(BaseModel):
+    content: Dict[str, Any]
+
+class ChangeType(str, Enum):
+    ADDED = "added"
+    REMOVED = "removed"
+    CHANGED = "changed"
+
+class FieldChange(BaseModel):
+    path: str  # Dotted path into the version content, e.g. "clauses.3.text"
+    change: ChangeType
+    old: Any = None
+    new: Any = None
+    words: Optional[List[Tuple[str, str]]] = None  # ("=" | "-" | "+", text) for long strings
+
+class VersionRef(BaseModel):
+    id: uuid.UUID
+    sequence: int
+    created_at: Optional[datetime] = None
+
+class VersionDiff(BaseModel):
+    draft_id: uuid.UUID
+    from_version: VersionRef
+    to_version: VersionRef
+    changes: List[FieldChange]
+
+class VersionHistory(BaseModel):
+    draft_id: uuid.UUID
+    diffs: List[VersionDiff]  # Each version diffed against the one before it
+    next_start: Optional[int] = None
+
+class DraftSummary(BaseModel):
+    id: uuid.UUID
+    template_id: str
+    title: Optional[str] = None
+    status: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class VersionSummary(BaseModel):
+    id: uuid.UUID
+    draft_id: uuid.UUID
+    sequence: int
+    kind: str
+    created_at: Optional[datetime] = None
+
+class DocumentSummary(BaseModel):
+    id: uuid.UUID
+    draft_id: uuid.UUID
+    created_at: Optional[datetime] = None
+
+class DraftPage(BaseModel):
+    items: List[DraftSummary]
+    next_cursor: Optional[str] = None  # Pass as ``cursor`` for the next page; None on the last page
+
+class VersionPage(BaseModel):
+    items: List[VersionSummary]
+    next_cursor: Optional[str] = None
+
+class DocumentPage(BaseModel):
+    items: List[DocumentSummary]
+    next_cursor: Optional[str] = None
@@ -1,29 +1,358 @@
 from . import models
+from backend.core.config import settings
 from backend.core.database import get_db
+from backend.storage.base_provider import VOLATILE_PROVIDERS
+from backend.utils import blob_store, pagination, versioning
+from backend.utils.diffing import VersionDiffer
+from functools import lru_cache
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
 import uuid
 
+@lru_cache()
+def get_version_differ() -> VersionDiffer:
+    return VersionDiffer(settings.VERSION_DIFF_CACHE_SIZE)
+
+# Columns shown in list views; content and delta bodies are never loaded
+DRAFT_LIST_COLUMNS = (
+    models.Draft.id, models.Draft.template_id, models.Draft.title,
+    models.Draft.status, models.Draft.created_at, models.Draft.updated_at
+)
+VERSION_LIST_COLUMNS = (
+    models.Version.id, models.Version.draft_id, models.Version.sequence,
+    models.Version.kind, models.Version.created_at
+)
+DOCUMENT_LIST_COLUMNS = (models.Document.id, models.Document.draft_id, models.Document.created_at)
+
+def _version_ref(row) -> Dict:
+    return {"id": row.id, "sequence": row.sequence, "created_at": row.created_at}
+
 class DraftService:
+    @staticmethod
+    async def _store_bodies(
+        db: AsyncSession,
+        contents: List[dict]
+    ) -> List[Tuple[Optional[dict], Optional[List[str]]]]:
+        """``(inline content, chunk hashes)`` for each body; only large bodies are chunked"""
+        bodies = [blob_store.serialize(content) for content in contents]
+        large = [i for i, body in enumerate(bodies) if len(body) > settings.BLOB_INLINE_MAX_SIZE]
+        lists = await models.ContentChunk.store(
+            db,
+            [bodies[i] for i in large],
+            settings.BLOB_CHUNK_MIN_SIZE,
+            settings.BLOB_CHUNK_MAX_SIZE,
+            settings.BLOB_COMPRESSION_LEVEL
+        )
+        stored = [(content, None) for content in contents]
+        for i, hashes in zip(large, lists):
+            stored[i] = (None, hashes)
+        return stored
+
+    @staticmethod
+    async def _load_bodies(db: AsyncSession, rows: list, inline: List[Optional[dict]]) -> List[dict]:
+        """Content of each row: ``inline`` unless the row references chunks"""
+        chunked = [i for i, row in enumerate(rows) if row.chunks]
+        bodies = await models.ContentChunk.load(db, [rows[i].chunks for i in chunked])
+        contents = list(inline)
+        for i, body in zip(chunked, bodies):
+            contents[i] = blob_store.deserialize(body)
+        return contents
+
+    @staticmethod
+    async def _chain_payloads(db: AsyncSession, chain: List[models.Version]) -> List[Tuple[str, dict]]:
+        payloads = await DraftService._load_bodies(db, chain, [v.payload for v in chain])
+        return [(v.kind, payload) for v, payload in zip(chain, payloads)]
+
     @staticmethod
     async def create_draft(db: AsyncSession, template_id: uuid.UUID, user_id: uuid.UUID):
-        draft = models.Draft(template_id=template_id, user_id=user_id)
-        db.add(draft)
+        # RETURNING brings back server defaults, so no refresh round trip
+        result = await db.scalars(
+            insert(models.Draft).values(template_id=template_id, user_id=user_id).returning(models.Draft)
+        )
+        draft = result.one()
         await db.commit()
-        await db.refresh(draft)
         return draft
 
+    @staticmethod
+    async def bulk_create_drafts(
+        db: AsyncSession,
+        template_id: str,
+        user_id: uuid.UUID,
+        rendered: List[Tuple[Dict, str]]
+    ) -> List[uuid.UUID]:
+        """Insert drafts and their first versions as two multi-row INSERTs.
+
+        Ids are generated here so no rows need to be read back. The caller
+        owns the transaction and commits once the whole batch is inserted.
+        """
+        draft_rows, version_rows = [], []
+        stored = await DraftService._store_bodies(
+            db, [{"fields": fields, "body": body} for fields, body in rendered]
+        )
+        for content, chunks in stored:
+            draft_id = uuid.uuid4()
+            draft_rows.append({
+                "id": draft_id,
+                "template_id": template_id,
+                "user_id": user_id,
+                "status": "draft"
+            })
+            version_rows.append({
+                "id": uuid.uuid4(),
+                "draft_id": draft_id,
+                "sequence": 0,
+                "kind": versioning.SNAPSHOT,
+                "content": content,
+                "chunks": chunks
+            })
+        if draft_rows:
+            await db.execute(insert(models.Draft), draft_rows)
+            await db.execute(insert(models.Version), version_rows)
+        return [row["id"] for row in draft_rows]
+
     @staticmethod
     async def save_version(db: AsyncSession, draft_id: uuid.UUID, content: dict):
-        version = models.Version(draft_id=draft_id, content=content)
-        db.add(version)
-        await db.commit()
-        return version
+        """Store a new version as a snapshot or as a delta against the previous one"""
+        async with DraftUnitOfWork(db) as uow:
+            uow.save_version(draft_id, content)
+        return uow.versions[0]
+
+    @staticmethod
+    async def get_version_content(
+        db: AsyncSession,
+        draft_id: uuid.UUID,
+        sequence: Optional[int] = None
+    ) -> Optional[dict]:
+        """Rebuild a version (default: the latest) from its nearest snapshot"""
+        chain = await models.Version.chain(db, draft_id, sequence)
+        if not chain or (sequence is not None and chain[-1].sequence != sequence):
+            return None
+        return versioning.reconstruct(await DraftService._chain_payloads(db, chain))
+
+    @staticmethod
+    async def list_drafts(db: AsyncSession, user_id: uuid.UUID, cursor: Optional[str], limit: int) -> Dict:
+        stmt = select(*DRAFT_LIST_COLUMNS).where(models.Draft.user_id == user_id)
+        return await pagination.fetch_page(db, stmt, models.Draft.created_at, models.Draft.id, cursor, limit)
+
+    @staticmethod
+    async def list_versions(db: AsyncSession, draft_id: uuid.UUID, cursor: Optional[str], limit: int) -> Dict:
+        # Paged by sequence, served by the (draft_id, sequence) unique index;
+        # versions saved in one transaction share created_at
+        stmt = select(*VERSION_LIST_COLUMNS).where(models.Version.draft_id == draft_id)
+        return await pagination.fetch_sequence_page(db, stmt, models.Version.sequence, cursor, limit)
+
+    @staticmethod
+    async def list_documents(db: AsyncSession, user_id: uuid.UUID, cursor: Optional[str], limit: int) -> Dict:
+        stmt = select(*DOCUMENT_LIST_COLUMNS).where(models.Document.user_id == user_id)
+        return await pagination.fetch_page(db, stmt, models.Document.created_at, models.Document.id, cursor, limit)
+
+    @staticmethod
+    async def diff_versions(
+        db: AsyncSession,
+        draft_id: uuid.UUID,
+        from_sequence: int,
+        to_sequence: int,
+        differ: VersionDiffer
+    ) -> Optional[Dict]:
+        """Field and word changes from one version to another; None if either is missing"""
+        refs = {
+            row.sequence: row
+            for row in await models.Version.refs(
+                db, draft_id, min(from_sequence, to_sequence), max(from_sequence, to_sequence)
+            )
+            if row.sequence in (from_sequence, to_sequence)
+        }
+        if from_sequence not in refs or to_sequence not in refs:
+            return None
+        old, new = refs[from_sequence], refs[to_sequence]
+        changes = differ.cached(old.id, new.id)
+        if changes is None:
+            changes = differ.compute(
+                old.id,
+                new.id,
+                await DraftService.get_version_content(db, draft_id, from_sequence),
+                await DraftService.get_version_content(db, draft_id, to_sequence)
+            )
+        return {
+            "draft_id": draft_id,
+            "from_version": _version_ref(old),
+            "to_version": _version_ref(new),
+            "changes": changes
+        }
+
+    @staticmethod
+    async def version_history(
+        db: AsyncSession,
+        draft_id: uuid.UUID,
+        start: int,
+        limit: int,
+        differ: VersionDiffer
+    ) -> Dict:
+        """Each version from ``start`` diffed against the one before it.
+
+        Uncached diffs are computed from a single version chain, replayed
+        once from the snapshot before the first of them.
+        """
+        refs = await models.Version.refs(db, draft_id, start - 1, start + limit)
+        by_sequence = {row.sequence: row for row in refs}
+        pairs = [
+            (by_sequence[sequence - 1], by_sequence[sequence])
+            for sequence in range(start, start + limit)
+            if sequence in by_sequence and sequence - 1 in by_sequence
+        ]
+        changes = {new.sequence: differ.cached(old.id, new.id) for old, new in pairs}
+        missing = [sequence for sequence, cached in changes.items() if cached is None]
+        if missing:
+            chain = await models.Version.chain(db, draft_id, sequence=max(missing), since=min(missing) - 1)
+            payloads = await DraftService._chain_payloads(db, chain)
+            contents = {
+                version.sequence: content
+                for version, content in zip(chain, versioning.replay(payloads))
+            }
+            for old, new in pairs:
+                if changes[new.sequence] is None:
+                    changes[new.sequence] = differ.compute(
+                        old.id, new.id, contents[old.sequence], contents[new.sequence]
+                    )
+        return {
+            "draft_id": draft_id,
+            "diffs": [
+                {
+                    "draft_id": draft_id,
+                    "from_version": _version_ref(old),
+                    "to_version": _version_ref(new),
+                    "changes": changes[new.sequence]
+                }
+                for old, new in pairs
+            ],
+            "next_start": start + limit if start + limit in by_sequence else None
+        }
 
     @staticmethod
     async def finalize_draft(db: AsyncSession, draft_id: uuid.UUID, content: dict):
         draft = await db.get(models.Draft, draft_id)
         draft.status = "finalized"
-        document = models.Document(draft_id=draft_id, final_content=content)
+        [(final_content, chunks)] = await DraftService._store_bodies(db, [content])
+        document = models.Document(
+            id=uuid.uuid4(),
+            draft_id=draft_id,
+            user_id=draft.user_id,
+            final_content=final_content,
+            chunks=chunks
+        )
         db.add(document)
+        provider = DraftService.upload_provider()
+        if provider:
+            # Committed with the document, so no finalized document is left
+            # without its upload; the upload itself is done by UploadWorker
+            db.add(models.UploadJob(document_id=document.id, provider=provider))
         await db.commit()
-        return document
\ No newline at end of file
+        return document
+
+    @staticmethod
+    def upload_provider() -> Optional[str]:
+        """Durable provider finalized documents are uploaded to, if one is configured"""
+        names = [settings.UPLOAD_PROVIDER] if settings.UPLOAD_PROVIDER else settings.STORAGE_PROVIDERS.split(",")
+        durable = [name.strip() for name in names if name.strip() and name.strip() not in VOLATILE_PROVIDERS]
+        return durable[0] if durable else None
+
+    @staticmethod
+    async def get_document_content(db: AsyncSession, document: models.Document) -> dict:
+        [content] = await DraftService._load_bodies(db, [document], [document.final_content])
+        return content
+
+    @staticmethod
+    async def storage_stats(db: AsyncSession) -> Dict:
+        return await models.ContentChunk.stats(db)
+
+class DraftUnitOfWork:
+    """Version saves and draft updates written together in one transaction.
+
+    Changes are only collected until :meth:`flush`, which writes every
+    version in one multi-row ``INSERT ... RETURNING`` and every draft update
+    in one executemany ``UPDATE``. As a context manager it commits on exit,
+    or rolls back if the block raised::
+
+        async with DraftUnitOfWork(db) as uow:
+            uow.save_version(draft_id, content)
+            uow.update_draft(draft_id, title="MSA")
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.versions: List[models.Version] = []  # Written by the last flush
+        self._contents: Dict[uuid.UUID, List[dict]] = {}
+        self._updates: Dict[uuid.UUID, dict] = {}
+
+    def save_version(self, draft_id: uuid.UUID, content: dict) -> None:
+        self._contents.setdefault(draft_id, []).append(content)
+
+    def update_draft(self, draft_id: uuid.UUID, **values) -> None:
+        self._updates.setdefault(draft_id, {}).update(values)
+
+    async def _plan(self) -> List[Tuple[uuid.UUID, int, str, dict]]:
+        """``(draft_id, sequence, kind, payload)`` for every pending version"""
+        planned = []
+        # Concurrent saves of a draft (another replica's autosave, a manual
+        # save) would otherwise read the same chain and pick the same sequence
+        if self._contents:
+            await models.Draft.lock(self.db, self._contents)
+        for draft_id, contents in self._contents.items():
+            chain = await models.Version.chain(self.db, draft_id)
+            previous = versioning.reconstruct(await DraftService._chain_payloads(self.db, chain)) if chain else None
+            sequence = chain[-1].sequence + 1 if chain else 0
+            for content in contents:
+                kind, payload = versioning.encode(
+                    previous, content, sequence, settings.VERSION_SNAPSHOT_INTERVAL
+                )
+                planned.append((draft_id, sequence, kind, payload))
+                previous, sequence = content, sequence + 1
+        return planned
+
+    async def flush(self) -> List[models.Version]:
+        """Write pending changes without committing; returns the new versions"""
+        planned = await self._plan()
+        stored = iter(await DraftService._store_bodies(
+            self.db, [payload for _, _, kind, payload in planned if kind == versioning.SNAPSHOT]
+        ))
+        rows = []
+        for draft_id, sequence, kind, payload in planned:
+            content, chunks = next(stored) if kind == versioning.SNAPSHOT else (None, None)
+            rows.append({
+                "id": uuid.uuid4(),
+                "draft_id": draft_id,
+                "sequence": sequence,
+                "kind": kind,
+                "content": content,
+                "chunks": chunks,
+                "delta": payload if kind == versioning.DELTA else None
+            })
+        self.versions = []
+        if rows:
+            result = await self.db.scalars(
+                insert(models.Version).returning(models.Version, sort_by_parameter_order=True),
+                rows
+            )
+            self.versions = list(result.all())
+        if self._updates:
+            await self.db.execute(
+                update(models.Draft),
+                [dict(values, id=draft_id) for draft_id, values in self._updates.items()]
+            )
+        self._contents, self._updates = {}, {}
+        return self.versions
+
+    async def commit(self) -> List[models.Version]:
+        versions = await self.flush()
+        await self.db.commit()
+        return versions
+
+    async def __aenter__(self) -> "DraftUnitOfWork":
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.db.rollback()
@@ -0,0 +1,203 @@
+"""Write-behind uploads of finalized documents to storage providers.
+
+Finalizing a draft commits the document together with an
+:class:`~backend.apps.documents.models.UploadJob` and returns; the upload
+happens here, off the request path. Each of ``workers`` pollers claims a
+batch of due jobs, uploads them concurrently within a per-provider limit and
+records the whole batch in one transaction. Failed uploads are retried with
+exponential backoff. A job is only deleted once its upload is recorded, so a
+crash mid-upload repeats the upload rather than losing it.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core import database, exceptions
+from backend.core.config import settings
+from backend.apps.documents import models
+from backend.apps.documents.services import DraftService
+from backend.storage.base_provider import StorageProviderFactory
+from backend.utils import blob_store
+
+logger = logging.getLogger(__name__)
+
+class UploadWorker:
+    """Pool of pollers draining the upload queue"""
+
+    def __init__(
+        self,
+        workers: int,
+        batch_size: int,
+        poll_interval: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_base: float,
+        retry_max: float,
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: int = 4,
+        session_factory: Optional[Callable[[], AsyncSession]] = None
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.concurrency = concurrency or {}
+        self.default_concurrency = default_concurrency
+        self._session_factory = session_factory
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self.in_flight: Counter = Counter()
+        self.uploaded = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_lag = 0.0  # Seconds from enqueue to recorded upload, of the latest job
+        self.max_lag = 0.0
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            limit = self.concurrency.get(provider, self.default_concurrency)
+            semaphore = self._semaphores[provider] = asyncio.Semaphore(limit)
+        return semaphore
+
+    def retry_delay(self, attempts: int) -> float:
+        return min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+
+    async def _upload(self, job: models.UploadJob, payload: Optional[bytes]) -> str:
+        if payload is None:
+            raise exceptions.DocumentNotFoundException(str(job.document_id))
+        provider = StorageProviderFactory.get(job.provider)
+        async with self._semaphore(job.provider):
+            self.in_flight[job.provider] += 1
+            try:
+                return await provider.save_file(f"{job.document_id}.json", payload, "application/json")
+            finally:
+                self.in_flight[job.provider] -= 1
+
+    async def _payloads(self, db: AsyncSession, jobs: List[models.UploadJob]) -> Dict:
+        result = await db.execute(
+            select(models.Document).where(models.Document.id.in_({job.document_id for job in jobs}))
+        )
+        documents = {document.id: document for document in result.scalars()}
+        payloads = {}
+        for job in jobs:
+            document = documents.get(job.document_id)
+            if document is not None:
+                content = await DraftService.get_document_content(db, document)
+                payloads[job.id] = blob_store.serialize(content)
+        return payloads
+
+    async def _record(self, db: AsyncSession, results: List[Tuple[models.UploadJob, object]]) -> None:
+        now = datetime.utcnow()
+        stored, retries = [], []
+        for job, result in results:
+            if not isinstance(result, BaseException):
+                stored.append((job, result))
+                continue
+            logger.warning(f"Upload of document {job.document_id} to {job.provider} failed: {str(result)}")
+            retry = {"id": job.id, "last_error": f"{type(result).__name__}: {result}"[:1000]}
+            if job.attempts >= self.max_attempts:
+                retry["status"] = models.UploadJob.FAILED
+                self.failed += 1
+            else:
+                retry["available_at"] = now + timedelta(seconds=self.retry_delay(job.attempts))
+                self.retried += 1
+            retries.append(retry)
+        if stored:
+            await db.execute(update(models.Document), [
+                {"id": job.document_id, "storage_provider": job.provider, "storage_file_id": file_id}
+                for job, file_id in stored
+            ])
+            await db.execute(
+                delete(models.UploadJob).where(models.UploadJob.id.in_([job.id for job, _ in stored]))
+            )
+        if retries:
+            await db.execute(update(models.UploadJob), retries)
+        await db.commit()
+        for job, _ in stored:
+            self.last_lag = (now - job.enqueued_at).total_seconds()
+            self.max_lag = max(self.max_lag, self.last_lag)
+        self.uploaded += len(stored)
+
+    async def drain(self) -> int:
+        """Claim one batch of due jobs and upload it; returns the number of jobs claimed"""
+        session_factory = self._session_factory or database.async_session
+        async with session_factory() as db:
+            jobs = await models.UploadJob.claim(db, self.batch_size, self.lease_seconds)
+            await db.commit()
+            if not jobs:
+                return 0
+            payloads = await self._payloads(db, jobs)
+            await db.commit()  # No transaction stays open during the uploads
+            results = await asyncio.gather(
+                *(self._upload(job, payloads.get(job.id)) for job in jobs),
+                return_exceptions=True
+            )
+            await self._record(db, list(zip(jobs, results)))
+        return len(jobs)
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            try:
+                claimed = await self.drain()
+            except Exception as e:
+                logger.error(f"Upload worker failed to drain the queue: {str(e)}")
+                claimed = 0
+            if claimed < self.batch_size:
+                # Wait out the poll interval unless stopped; a full batch means more is due
+                delay = max(0.0, self.poll_interval - (time.monotonic() - started))
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        if DraftService.upload_provider() is None:
+            logger.warning("No durable storage provider configured; finalized documents will not be uploaded")
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Let pollers finish their current batch, then cancel any still running"""
+        self._stopping.set()
+        if not self._tasks:
+            return
+        _, running = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in running:
+            task.cancel()  # Their jobs are handed out again when the lease runs out
+        self._tasks = []
+
+    def stats(self) -> Dict:
+        return {
+            "workers": len(self._tasks),
+            "in_flight": {provider: n for provider, n in self.in_flight.items() if n},
+            "uploaded": self.uploaded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "last_lag_seconds": self.last_lag,
+            "max_lag_seconds": self.max_lag
+        }
+
+@lru_cache()
+def get_upload_worker() -> UploadWorker:
+    return UploadWorker(
+        workers=settings.UPLOAD_WORKERS,
+        batch_size=settings.UPLOAD_BATCH_SIZE,
+        poll_interval=settings.UPLOAD_POLL_SECONDS,
+        lease_seconds=settings.UPLOAD_LEASE_SECONDS,
+        max_attempts=settings.UPLOAD_MAX_ATTEMPTS,
+        retry_base=settings.UPLOAD_RETRY_BASE_SECONDS,
+        retry_max=settings.UPLOAD_RETRY_MAX_SECONDS,
+        concurrency=settings.UPLOAD_PROVIDER_CONCURRENCY,
+        default_concurrency=settings.UPLOAD_DEFAULT_CONCURRENCY
+    )
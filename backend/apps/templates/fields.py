@@ -0,0 +1,356 @@
+"""Static field discovery for document templates.
+
+Fields are read from the parsed template AST instead of rendering the
+template, so undeclared variables, nested attributes and the shape of loop
+items are all found without a context. Results are kept per template source
+checksum in :class:`TemplateFieldIndex`.
+"""
+import hashlib
+import logging
+from typing import Callable, Dict, List, Optional, Set
+from jinja2 import Environment, TemplateError, meta, nodes
+
+logger = logging.getLogger(__name__)
+
+NUMBER_FILTERS = {"int", "float", "round", "abs", "filesizeformat"}
+LIST_FILTERS = {
+    "batch", "first", "groupby", "join", "last", "length", "count", "map", "max",
+    "min", "reject", "rejectattr", "select", "selectattr", "slice", "sort", "sum", "unique"
+}
+OPTIONAL_TESTS = {"defined", "undefined", "none"}
+NUMBER_OPERATORS = (nodes.Sub, nodes.Mul, nodes.Div, nodes.FloorDiv, nodes.Pow, nodes.Neg)
+MAPPING_METHODS = {"items", "keys", "values"}
+
+class Field:
+    """A context variable or attribute path used by a template"""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.hints: Set[str] = set()
+        self.required = True
+        self.direct = False  # Read as a whole, not only through its attributes
+        self.children: Dict[str, "Field"] = {}
+
+    def child(self, name: str) -> "Field":
+        if name not in self.children:
+            path = f"{self.path}.{name}" if self.path else name
+            self.children[name] = Field(name, path)
+        return self.children[name]
+
+    @property
+    def type(self) -> str:
+        if "list" in self.hints:
+            return "list"
+        if self.children or "object" in self.hints:
+            return "object"
+        if "number" in self.hints:
+            return "number"
+        if "boolean" in self.hints:
+            return "boolean"
+        return "string"
+
+    def dependency_paths(self) -> List[str]:
+        """Narrowest set of paths whose values determine what the template reads"""
+        if self.direct or not self.children:
+            return [self.path]
+        return [path for child in self.children.values() for path in child.dependency_paths()]
+
+    def merge(self, other: "Field") -> None:
+        self.hints |= other.hints
+        self.required = self.required and other.required
+        self.direct = self.direct or other.direct
+        for name, child in other.children.items():
+            self.child(name).merge(child)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "type": self.type,
+            "required": self.required,
+            "children": [child.to_dict() for child in self.children.values()]
+        }
+
+class FieldCollector:
+    """Walks a template AST and records every field it reads.
+
+    ``scope`` maps names bound inside the template (``set``, macro arguments,
+    loop targets) to the field they alias, or to ``None`` for values that do
+    not come from the context.
+    """
+
+    def __init__(self, global_names=()):
+        self.root = Field("", "")
+        self.global_names = set(global_names)
+
+    def collect(self, template: nodes.Template) -> Field:
+        scope = dict.fromkeys(self.global_names)
+        scope["loop"] = None
+        self.statements(template.body, scope)
+        return self.root
+
+    def statements(self, body: List[nodes.Node], scope: Dict) -> None:
+        for node in body:
+            self.statement(node, scope)
+
+    def statement(self, node: nodes.Node, scope: Dict) -> None:
+        if isinstance(node, nodes.Output):
+            for child in node.nodes:
+                if not isinstance(child, nodes.TemplateData):
+                    self.expr(child, scope)
+        elif isinstance(node, nodes.For):
+            iterable = self.resolve(node.iter, scope)
+            if iterable is not None:
+                iterable.hints.add("list")
+                iterable.direct = True
+            inner = dict(scope, loop=None)
+            if isinstance(node.target, nodes.Name):
+                inner[node.target.name] = iterable
+            else:
+                self.bind(node.target, inner)
+            if node.test is not None:
+                self.expr(node.test, inner, "boolean")
+            self.statements(node.body, inner)
+            self.statements(node.else_, scope)
+        elif isinstance(node, nodes.If):
+            self.expr(node.test, scope, "boolean")
+            self.statements(node.body, scope)
+            for branch in node.elif_:
+                self.statement(branch, scope)
+            self.statements(node.else_, scope)
+        elif isinstance(node, nodes.Assign):
+            self.expr(node.node, scope)
+            self.bind(node.target, scope)
+        elif isinstance(node, nodes.AssignBlock):
+            self.statements(node.body, scope)
+            self.bind(node.target, scope)
+        elif isinstance(node, nodes.With):
+            inner = dict(scope)
+            for target, value in zip(node.targets, node.values):
+                self.expr(value, scope)
+                self.bind(target, inner)
+            self.statements(node.body, inner)
+        elif isinstance(node, (nodes.Macro, nodes.CallBlock)):
+            if isinstance(node, nodes.Macro):
+                scope[node.name] = None
+            else:
+                self.expr(node.call, scope)
+            inner = dict(scope, caller=None, varargs=None, kwargs=None)
+            for default in node.defaults:
+                self.expr(default, scope)
+            for arg in node.args:
+                self.bind(arg, inner)
+            self.statements(node.body, inner)
+        elif isinstance(node, (nodes.Import, nodes.FromImport)):
+            if isinstance(node, nodes.Import):
+                scope[node.target] = None
+            else:
+                for name in node.names:
+                    scope[name[1] if isinstance(name, tuple) else name] = None
+        else:
+            for child in node.iter_child_nodes():
+                if isinstance(child, nodes.Expr):
+                    self.expr(child, scope)
+                else:
+                    self.statement(child, scope)
+
+    def bind(self, target: nodes.Node, scope: Dict) -> None:
+        for name in target.find_all(nodes.Name):
+            scope[name.name] = None
+        if isinstance(target, nodes.Name):
+            scope[target.name] = None
+
+    def resolve(self, node: nodes.Expr, scope: Dict) -> Optional[Field]:
+        """Field read by a name/attribute/subscript chain, if any"""
+        if isinstance(node, nodes.Name):
+            if node.name in scope:
+                return scope[node.name]
+            return self.root.child(node.name)
+        if isinstance(node, nodes.Getattr):
+            parent = self.resolve(node.node, scope)
+            return parent.child(node.attr) if parent is not None else None
+        if isinstance(node, nodes.Getitem):
+            parent = self.resolve(node.node, scope)
+            if parent is None:
+                self.expr(node.arg, scope)
+                return None
+            if isinstance(node.arg, nodes.Const) and isinstance(node.arg.value, str):
+                return parent.child(node.arg.value)
+            if isinstance(node.arg, nodes.Const) and isinstance(node.arg.value, int):
+                parent.hints.add("list")
+                return parent
+            parent.hints.add("object")
+            self.expr(node.arg, scope)
+            return None
+        if isinstance(node, nodes.Call) and isinstance(node.node, nodes.Getattr):
+            parent = self.resolve(node.node.node, scope)
+            if parent is not None and node.node.attr in MAPPING_METHODS | {"get"}:
+                parent.hints.add("object")
+                key = node.args[0] if node.args else None
+                if node.node.attr == "get" and isinstance(key, nodes.Const) and isinstance(key.value, str):
+                    field = parent.child(key.value)
+                    field.required = False
+                    return field
+            for arg in node.args + [kwarg.value for kwarg in node.kwargs]:
+                self.expr(arg, scope)
+            return None
+        return None
+
+    def expr(self, node: nodes.Expr, scope: Dict, hint: Optional[str] = None) -> None:
+        field = self.resolve(node, scope)
+        if field is not None:
+            field.direct = True
+            if hint:
+                field.hints.add(hint)
+            return
+        if isinstance(node, (nodes.Name, nodes.Getattr, nodes.Getitem)):
+            return
+        if isinstance(node, nodes.Filter):
+            filter_hint = "number" if node.name in NUMBER_FILTERS else "list" if node.name in LIST_FILTERS else None
+            if node.node is not None:
+                self.expr(node.node, scope, filter_hint)
+                if node.name in ("default", "d"):
+                    self.optional(node.node, scope)
+                    fallback = node.args[0] if node.args else None
+                    if isinstance(fallback, nodes.Const) and type(fallback.value) in (int, float):
+                        self.expr(node.node, scope, "number")
+            for arg in node.args:
+                self.expr(arg, scope)
+        elif isinstance(node, nodes.Test):
+            self.expr(node.node, scope)
+            if node.name in OPTIONAL_TESTS:
+                self.optional(node.node, scope)
+            for arg in node.args:
+                self.expr(arg, scope)
+        elif isinstance(node, nodes.Compare):
+            operands = [node.expr] + [operand.expr for operand in node.ops]
+            constant = next((o.value for o in operands if isinstance(o, nodes.Const)), None)
+            compare_hint = "number" if isinstance(constant, (int, float)) and not isinstance(constant, bool) else None
+            if any(operand.op in ("in", "notin") for operand in node.ops):
+                compare_hint = None
+            for operand in operands:
+                self.expr(operand, scope, compare_hint)
+        elif isinstance(node, (nodes.And, nodes.Or, nodes.Not)):
+            for child in node.iter_child_nodes():
+                self.expr(child, scope, "boolean")
+        elif isinstance(node, nodes.CondExpr):
+            self.expr(node.test, scope, "boolean")
+            self.expr(node.expr1, scope, hint)
+            if node.expr2 is not None:
+                self.expr(node.expr2, scope, hint)
+        elif isinstance(node, NUMBER_OPERATORS):
+            for child in node.iter_child_nodes():
+                self.expr(child, scope, "number")
+        else:
+            for child in node.iter_child_nodes():
+                self.expr(child, scope)
+
+    def optional(self, node: nodes.Expr, scope: Dict) -> None:
+        field = self.resolve(node, scope)
+        if field is not None:
+            field.direct = True
+            field.required = False
+
+def extract_fields(env: Environment, source: str) -> Field:
+    """Field tree read by ``source`` itself (includes are not followed)"""
+    return FieldCollector(env.globals).collect(env.parse(source))
+
+class TemplateFieldIndex:
+    """Fields of every template, computed once per template source version.
+
+    Entries are keyed by template name and hold the source checksum, the
+    field tree and the templates pulled in through ``include``/``extends``,
+    whose fields are merged in on lookup. With ``auto_reload`` an entry is
+    re-checked against the file (one stat); a changed file is only re-parsed
+    when its checksum actually differs.
+    """
+
+    def __init__(self, env: Environment, auto_reload: bool = True):
+        self.env = env
+        self.auto_reload = auto_reload
+        self._entries: Dict[str, Dict] = {}
+        self.parses = 0
+
+    def build(self, filter_func: Optional[Callable[[str], bool]] = None) -> int:
+        """Index every template up front; returns the number indexed.
+
+        A template that cannot be parsed is logged and skipped, so one broken
+        file does not stop the others from being indexed.
+        """
+        indexed = 0
+        for name in self.env.list_templates(filter_func=filter_func):
+            try:
+                self._entry(name)
+            except (TemplateError, UnicodeDecodeError) as e:
+                logger.error(f"Skipping template {name}: {str(e)}")
+                continue
+            indexed += 1
+        return indexed
+
+    def get(self, name: str) -> Dict:
+        entry = self._entry(name)
+        root = Field("", "")
+        for template in self._closure(name):
+            root.merge(self._entry(template)["root"])
+        return {
+            "name": name,
+            "checksum": entry["checksum"],
+            "fields": [field.to_dict() for field in root.children.values()]
+        }
+
+    def list(self, filter_func: Optional[Callable[[str], bool]] = None) -> List[Dict]:
+        """Fields of every template that can be parsed; broken ones are logged and left out"""
+        summaries = []
+        for name in self.env.list_templates(filter_func=filter_func):
+            try:
+                summaries.append(self.get(name))
+            except (TemplateError, UnicodeDecodeError) as e:
+                logger.error(f"Skipping template {name}: {str(e)}")
+        return summaries
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
+
+    def _closure(self, name: str) -> List[str]:
+        seen, pending = [], [name]
+        while pending:
+            template = pending.pop()
+            if template in seen:
+                continue
+            seen.append(template)
+            pending.extend(self._entry(template)["references"])
+        return seen
+
+    def _entry(self, name: str) -> Dict:
+        entry = self._entries.get(name)
+        if entry is not None and (not self.auto_reload or entry["uptodate"] is None or entry["uptodate"]()):
+            return entry
+
+        source, _, uptodate = self.env.loader.get_source(self.env, name)
+        checksum = hashlib.sha256(source.encode()).hexdigest()
+        if entry is not None and entry["checksum"] == checksum:
+            entry["uptodate"] = uptodate
+            return entry
+
+        ast = self.env.parse(source, name)
+        self.parses += 1
+        entry = {
+            "checksum": checksum,
+            "uptodate": uptodate,
+            "root": FieldCollector(self.env.globals).collect(ast),
+            "references": [ref for ref in meta.find_referenced_templates(ast) if ref and self._inherits(ast, ref)]
+        }
+        self._entries[name] = entry
+        return entry
+
+    @staticmethod
+    def _inherits(ast: nodes.Template, reference: str) -> bool:
+        """Only ``include`` and ``extends`` share the caller's context"""
+        for node in ast.find_all((nodes.Include, nodes.Extends)):
+            if isinstance(node.template, nodes.Const) and node.template.value == reference:
+                return True
+        return False
@@ -1,17 +1,124 @@
+from functools import lru_cache
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from typing import Callable, Iterator, List, Optional
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
+from backend.apps.templates.fields import TemplateFieldIndex
+from backend.apps.templates.parser import TemplateParser
+from backend.core.config import settings
+from backend.utils.lru import LRUCache
+from backend.utils.streams import rechunk
 
 class TemplateLoader:
-    def __init__(self):
+    def __init__(
+        self,
+        templates_dir: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        bytecode_cache_dir: Optional[str] = None,
+        auto_reload: Optional[bool] = None
+    ):
+        templates_dir = templates_dir or settings.TEMPLATES_DIR
+        cache_size = cache_size if cache_size is not None else settings.TEMPLATE_CACHE_SIZE
+        bytecode_cache_dir = bytecode_cache_dir or settings.TEMPLATE_BYTECODE_CACHE_DIR
+        self.auto_reload = settings.TEMPLATE_AUTO_RELOAD if auto_reload is None else auto_reload
+
+        # Compiled bytecode survives restarts and is shared by all workers;
+        # entries are validated against the template source checksum.
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
         self.env = Environment(
-            loader=FileSystemLoader("templates"),
-            autoescape=select_autoescape()
+            loader=FileSystemLoader(templates_dir),
+            autoescape=select_autoescape(),
+            bytecode_cache=bytecode_cache,
+            auto_reload=self.auto_reload,
+            # Jinja's own cache also serves {% include %} and {% extends %}
+            # targets, which are looked up on every render; invalidate() clears it
+            cache_size=cache_size
+        )
+        self._templates = LRUCache(cache_size)
+        self.fields = TemplateFieldIndex(self.env, auto_reload=self.auto_reload)
+        self.parser = TemplateParser(
+            self.env,
+            auto_reload=self.auto_reload,
+            cache_size=settings.TEMPLATE_CLAUSE_CACHE_SIZE
+        )
+        self._invalidation_listeners: List[Callable[[Optional[str]], None]] = []
+
+    def get_template(self, template_name: str) -> Template:
+        """Compiled template, from the in-process cache when possible.
+
+        With auto-reload on, a cached template is only reused while its source
+        file is unchanged (one stat per call); with it off, templates are never
+        re-checked until :meth:`invalidate` or :meth:`reload_changed` is called.
+        """
+        template = self._templates.get(template_name)
+        if template is not None and (not self.auto_reload or template.is_up_to_date):
+            return template
+        template = self.env.get_template(template_name)
+        self._templates.set(template_name, template)
+        return template
+
+    def invalidate(self, template_name: Optional[str] = None) -> None:
+        """Drop one template (or all of them) from the compiled-template, field and clause caches"""
+        self.fields.invalidate(template_name)
+        self.parser.invalidate(template_name)
+        # Jinja sets env.cache to None when caching is off (cache_size=0)
+        cache = self.env.cache if self.env.cache is not None else {}
+        if template_name is None:
+            self._templates.clear()
+            cache.clear()
+        else:
+            self._templates.pop(template_name)
+            # Keys are (weakref to the loader, template name)
+            for key in [key for key in cache.keys() if key[1] == template_name]:
+                del cache[key]
+        for listener in self._invalidation_listeners:
+            listener(template_name)
+
+    def on_invalidate(self, listener: Callable[[Optional[str]], None]) -> None:
+        """Call ``listener(template_name)`` on every :meth:`invalidate`, e.g. to reach batch workers"""
+        self._invalidation_listeners.append(listener)
+
+    def reload_changed(self) -> list:
+        """Invalidate cached templates, included ones too, whose source changed; returns their names"""
+        cached = self.env.cache.values() if self.env.cache is not None else []
+        changed = {template.name for template in cached if not template.is_up_to_date}
+        changed.update(
+            name for name in self._templates.keys()
+            if not self._templates.get(name).is_up_to_date
         )
+        for name in changed:
+            self.invalidate(name)
+        return sorted(changed)
+
+    def cache_stats(self) -> dict:
+        return {**self._templates.stats(), "clauses": self.parser.stats()}
         
     def render_template(self, template_name: str, context: dict) -> str:
-        template = self.env.get_template(template_name)
+        template = self.get_template(template_name)
         return template.render(context)
     
+    def stream_template(
+        self,
+        template_name: str,
+        context: dict,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[str]:
+        """Render lazily with ``Template.generate``, in chunks of about ``chunk_size`` characters.
+
+        Only one chunk of output is held at a time, so memory stays bounded
+        however many rows a schedule or annex has.
+        """
+        template = self.get_template(template_name)
+        return rechunk(template.generate(context), chunk_size or settings.TEMPLATE_STREAM_CHUNK_SIZE)
+
     def get_fields(self, template_name: str) -> list:
-        template = self.env.get_template(template_name)
-        return list(template.make_module().variables)
\ No newline at end of file
+        """Field tree of a template, read from the index; nothing is rendered"""
+        return self.fields.get(template_name)["fields"]
+
+@lru_cache()
+def get_template_loader() -> TemplateLoader:
+    """Process-wide loader so every request shares the compiled-template cache"""
+    return TemplateLoader()
@@ -0,0 +1,288 @@
+"""Split templates into clause blocks that can be rendered and cached independently.
+
+A template is cut at blank lines outside any tag, so each clause is a
+self-contained piece of template source. Top-level ``macro``, ``set`` and
+``import`` statements are moved into a preamble that is compiled into every
+clause. Each clause records the context fields it reads, and its output is
+cached under a digest of those fields' values. After a FormBuilder edit, only
+the clauses that read the edited field are rendered again.
+"""
+import hashlib
+import json
+import re
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+from jinja2 import Environment, Template, nodes
+from backend.apps.templates.fields import FieldCollector
+from backend.utils.lru import LRUCache
+
+BLANK_LINE = re.compile(r"\n[ \t]*\n")
+OPENING_TAGS = {"for", "if", "macro", "call", "filter", "block", "with", "autoescape", "trans"}
+DEFINITION_TAGS = {"set", "import", "from"}
+CLOSING_TOKENS = {
+    "block_begin": "block_end",
+    "variable_begin": "variable_end",
+    "comment_begin": "comment_end",
+    "raw_begin": "raw_end"
+}
+MISSING = "\0missing"
+
+class Clause(NamedTuple):
+    index: int
+    source: str
+    dependencies: FrozenSet[str]  # Dotted context paths read by the clause or its preamble definitions
+    cacheable: bool  # False when it includes other templates, whose fields are not tracked
+    template: Template
+
+class ParsedTemplate(NamedTuple):
+    name: str
+    checksum: str
+    preamble: str
+    clauses: List[Clause]
+    uptodate: Optional[Callable[[], bool]]
+
+class _Tag(NamedTuple):
+    name: str
+    target: Optional[str]  # Name defined by a set/macro tag
+    assigns: bool  # Contains "=", i.e. not a {% set %}...{% endset %} block
+    text: str
+
+def _read_tag(tokens: List[Tuple[str, str]]) -> _Tag:
+    names = [value for kind, value in tokens if kind == "name"]
+    return _Tag(
+        name=names[0] if names else "",
+        target=names[1] if len(names) > 1 else None,
+        assigns=any(kind == "operator" and value == "=" for kind, value in tokens),
+        text="".join(value for _, value in tokens)
+    )
+
+def _top_level_units(env: Environment, source: str) -> List[Tuple[str, str, Optional[str]]]:
+    """``(kind, text, defined name)`` for each top-level piece of ``source``.
+
+    ``kind`` is "text" for literal data, "definition" for macros and
+    assignments, and "output" for everything else.
+    """
+    units = []
+    statement: List[str] = []
+    statement_kind = target = None
+    depth = 0
+    group: List[Tuple[str, str]] = []
+    expected = None
+
+    for _, kind, value in env.lex(source):
+        if expected is None and kind in CLOSING_TOKENS:
+            expected, group = CLOSING_TOKENS[kind], [(kind, value)]
+            continue
+        if expected is not None:
+            group.append((kind, value))
+            if kind != expected:
+                continue
+            expected, pieces = None, group
+        else:
+            pieces = [(kind, value)]
+        if pieces[0][0] != "block_begin":
+            text = "".join(value for _, value in pieces)
+            if depth:
+                statement.append(text)
+            else:
+                units.append(("text" if pieces[0][0] == "data" else "output", text, None))
+            continue
+
+        tag = _read_tag(pieces)
+        opens = tag.name in OPENING_TAGS or (tag.name == "set" and not tag.assigns)
+        if depth:
+            statement.append(tag.text)
+            depth += 1 if opens else -1 if tag.name.startswith("end") else 0
+            if depth == 0:
+                units.append((statement_kind, "".join(statement), target))
+        elif opens:
+            statement, depth = [tag.text], 1
+            statement_kind = "definition" if tag.name in ("macro", "set") else "output"
+            target = tag.target if tag.name in ("macro", "set") else None
+        elif tag.name in DEFINITION_TAGS:
+            units.append(("definition", tag.text, tag.target if tag.name == "set" else None))
+        else:
+            units.append(("output", tag.text, None))
+    return units
+
+def split_source(env: Environment, source: str) -> Tuple[List[str], List[str]]:
+    """Split ``source`` into preamble definitions and clause sources.
+
+    Rendering the preamble followed by each clause, and joining the outputs,
+    produces the same text as rendering the whole template. Templates that
+    use ``extends``, redefine a top-level name or read a name before setting
+    it are kept as one clause.
+    """
+    units = _top_level_units(env, source)
+    defined = [name for kind, _, name in units if kind == "definition" and name]
+    if len(defined) != len(set(defined)) or any(
+        text.lstrip("{%- ").startswith("extends") for kind, text, _ in units if kind == "output"
+    ):
+        return [], [source]
+
+    definitions, clauses, current = [], [], []
+    read: Set[str] = set()  # Names loaded by the output so far
+    for kind, text, _ in units:
+        if kind == "definition":
+            if read.intersection(_bound_names(env.parse(text))):
+                return [], [source]  # Hoisting would define it before that read
+            definitions.append(text)
+            continue
+        if kind == "output":
+            read.update(node.name for node in env.parse(text).find_all(nodes.Name) if node.ctx == "load")
+            current.append(text)
+            continue
+        pieces = BLANK_LINE.split(text)
+        separators = BLANK_LINE.findall(text)
+        for piece, separator in zip(pieces, separators + [""]):
+            current.append(piece + separator)
+            if separator:
+                clauses.append("".join(current))
+                current = []
+    if current:
+        clauses.append("".join(current))
+    return definitions, [clause for clause in clauses if clause] or [""]
+
+def _bound_names(ast: nodes.Template) -> List[str]:
+    names = []
+    for node in ast.body:
+        if isinstance(node, (nodes.Assign, nodes.AssignBlock)):
+            names.extend(name.name for name in node.target.find_all(nodes.Name))
+            if isinstance(node.target, nodes.Name):
+                names.append(node.target.name)
+        elif isinstance(node, nodes.Macro):
+            names.append(node.name)
+        elif isinstance(node, nodes.Import):
+            names.append(node.target)
+        elif isinstance(node, nodes.FromImport):
+            names.extend(name[1] if isinstance(name, tuple) else name for name in node.names)
+    return names
+
+def _lookup(context: dict, path: str):
+    value = context
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+def _encode(value) -> str:
+    if value is None or isinstance(value, (str, int, float)):
+        return repr(value)
+    return json.dumps(value, sort_keys=True, default=str)
+
+class TemplateParser:
+    """Clause structure of each template, plus a cache of rendered clauses.
+
+    Parsed templates are kept per name and re-checked against the source file
+    when ``auto_reload`` is on. Rendered clauses are keyed by template name
+    and checksum, clause index and the values of the clause's dependencies.
+    """
+
+    def __init__(self, env: Environment, auto_reload: bool = True, cache_size: int = 4096):
+        self.env = env
+        self._clause_env = env.overlay(keep_trailing_newline=True)
+        self.auto_reload = auto_reload
+        self._parsed: Dict[str, ParsedTemplate] = {}
+        self._rendered = LRUCache(cache_size)
+        self.clause_renders = 0
+
+    def parse(self, template_name: str) -> ParsedTemplate:
+        parsed = self._parsed.get(template_name)
+        if parsed is not None and (not self.auto_reload or parsed.uptodate is None or parsed.uptodate()):
+            return parsed
+
+        source, _, uptodate = self.env.loader.get_source(self.env, template_name)
+        checksum = hashlib.sha256(source.encode()).hexdigest()
+        if parsed is not None and parsed.checksum == checksum:
+            parsed = parsed._replace(uptodate=uptodate)
+        else:
+            definitions, sources = split_source(self.env, source)
+            preamble = "".join(definitions)
+            # Fields each preamble name depends on, including through the
+            # definitions it uses itself.
+            defined: Dict[str, FrozenSet[str]] = {}
+            for definition in definitions:
+                ast = self.env.parse(definition)
+                dependencies = self._dependencies(ast, defined)
+                for name in _bound_names(ast):
+                    defined[name] = dependencies
+            clauses = []
+            for index, clause_source in enumerate(sources):
+                ast = self.env.parse(clause_source)
+                # Jinja drops one trailing newline per template; only the
+                # last clause ends where the whole template did.
+                env = self.env if index == len(sources) - 1 else self._clause_env
+                clauses.append(Clause(
+                    index=index,
+                    source=clause_source,
+                    dependencies=self._dependencies(ast, defined),
+                    cacheable=ast.find(nodes.Include) is None,
+                    template=self._compile(env, template_name, preamble + clause_source)
+                ))
+            parsed = ParsedTemplate(template_name, checksum, preamble, clauses, uptodate)
+        self._parsed[template_name] = parsed
+        return parsed
+
+    @staticmethod
+    def _compile(env: Environment, template_name: str, source: str) -> Template:
+        # Compiled under the template's name so autoescaping matches the
+        # whole-template render
+        code = env.compile(source, name=template_name)
+        return env.template_class.from_code(env, code, env.make_globals(None))
+
+    def _dependencies(self, ast: nodes.Template, defined: Dict[str, FrozenSet[str]]) -> FrozenSet[str]:
+        root = FieldCollector(list(self.env.globals) + list(defined)).collect(ast)
+        dependencies = {path for field in root.children.values() for path in field.dependency_paths()}
+        for name in ast.find_all(nodes.Name):
+            dependencies |= defined.get(name.name, frozenset())
+        return frozenset(dependencies)
+
+    def digest(self, parsed: ParsedTemplate, clause: Clause, encoded: Dict[str, str]) -> str:
+        values = "\0".join(encoded[path] for path in sorted(clause.dependencies))
+        payload = f"{parsed.name}\0{parsed.checksum}\0{clause.index}\0{values}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def render_clauses(self, template_name: str, context: dict) -> List[Tuple[Clause, str, str]]:
+        """``(clause, digest, html)`` for every clause, rendering only cache misses"""
+        parsed = self.parse(template_name)
+        # Each dependency value is serialized once per call, however many
+        # clauses read it.
+        encoded = {}
+        for clause in parsed.clauses:
+            for path in clause.dependencies:
+                if path not in encoded:
+                    encoded[path] = _encode(_lookup(context, path))
+        results = []
+        for clause in parsed.clauses:
+            if not clause.cacheable:
+                html = clause.template.render(context)
+                self.clause_renders += 1
+                results.append((clause, hashlib.sha256(html.encode()).hexdigest(), html))
+                continue
+            digest = self.digest(parsed, clause, encoded)
+            html = self._rendered.get(digest)
+            if html is None:
+                html = clause.template.render(context)
+                self.clause_renders += 1
+                self._rendered.set(digest, html)
+            results.append((clause, digest, html))
+        return results
+
+    def render(self, template_name: str, context: dict) -> str:
+        return "".join(html for _, _, html in self.render_clauses(template_name, context))
+
+    def invalidate(self, template_name: Optional[str] = None) -> None:
+        # Rendered clauses are keyed by checksum, so stale entries are never
+        # served and simply age out of the LRU.
+        if template_name is None:
+            self._parsed.clear()
+            self._rendered.clear()
+        else:
+            self._parsed.pop(template_name, None)
+
+    def stats(self) -> Dict:
+        return {
+            "templates": len(self._parsed),
+            "clause_renders": self.clause_renders,
+            "rendered_clauses": self._rendered.stats()
+        }
@@ -0,0 +1,57 @@
+from typing import List
+from fastapi import APIRouter, Depends
+from jinja2 import TemplateNotFound, TemplateSyntaxError
+from backend.core import exceptions
+from backend.apps.auth import security
+from backend.apps.documents import models
+from backend.apps.templates import schemas
+from backend.apps.templates.loader import TemplateLoader, get_template_loader
+
+router = APIRouter()
+
+@router.get("", response_model=List[schemas.TemplateSummary])
+async def list_templates(
+    current_user: models.User = Depends(security.get_current_active_user),
+    loader: TemplateLoader = Depends(get_template_loader)
+):
+    """List templates with their fields, served from the field index; unparsable ones are left out"""
+    return loader.fields.list()
+
+@router.get("/{template_name:path}/fields", response_model=schemas.TemplateSummary)
+async def get_template_fields(
+    template_name: str,
+    current_user: models.User = Depends(security.get_current_active_user),
+    loader: TemplateLoader = Depends(get_template_loader)
+):
+    """Fields for the FormBuilder; templates are parsed, never rendered"""
+    try:
+        return loader.fields.get(template_name)
+    except TemplateNotFound:
+        raise exceptions.TemplateNotFoundException(template_name)
+    except TemplateSyntaxError:
+        raise exceptions.InvalidTemplateException(template_name)
+
+@router.post("/{template_name:path}/preview", response_model=schemas.PreviewResponse)
+async def preview_template(
+    template_name: str,
+    payload: schemas.PreviewRequest,
+    current_user: models.User = Depends(security.get_current_active_user),
+    loader: TemplateLoader = Depends(get_template_loader)
+):
+    """Live preview by clause; only clauses whose fields changed are re-rendered or sent"""
+    try:
+        parsed = loader.parser.parse(template_name)
+        rendered = loader.parser.render_clauses(template_name, payload.context)
+    except TemplateNotFound:
+        raise exceptions.TemplateNotFoundException(template_name)
+    except TemplateSyntaxError:
+        raise exceptions.InvalidTemplateException(template_name)
+    known = set(payload.known_digests)
+    return {
+        "name": template_name,
+        "checksum": parsed.checksum,
+        "clauses": [
+            {"index": clause.index, "digest": digest, "html": None if digest in known else html}
+            for clause, digest, html in rendered
+        ]
+    }
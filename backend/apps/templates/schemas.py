@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from enum import Enum
+
+class FieldType(str, Enum):
+    STRING = "string"
+    NUMBER = "number"
+    BOOLEAN = "boolean"
+    LIST = "list"
+    OBJECT = "object"
+
+class TemplateField(BaseModel):
+    name: str
+    path: str  # Dotted path from the render context, e.g. "parties.address.city"
+    type: FieldType
+    required: bool
+    children: List["TemplateField"] = []  # Attributes of an object, or of each list item
+
+TemplateField.update_forward_refs()
+
+class TemplateSummary(BaseModel):
+    name: str
+    checksum: str
+    fields: List[TemplateField]
+
+class PreviewRequest(BaseModel):
+    context: Dict[str, Any]
+    known_digests: List[str] = []  # Clause digests the client already displays
+
+class ClausePreview(BaseModel):
+    index: int
+    digest: str
+    html: Optional[str] = None  # Omitted when the digest is in known_digests
+
+class PreviewResponse(BaseModel):
+    name: str
+    checksum: str
+    clauses: List[ClausePreview]
@@ -0,0 +1,122 @@
+"""Page fetch latency at increasing depth: keyset cursors versus OFFSET.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_pagination --versions 2000000 --drafts 20
+
+Seeds a SQLite database with the given number of versions spread over a few
+drafts (pass ``--db`` to keep and reuse it), then lists one draft's versions
+at several depths. Keyset pages go through ``DraftService.list_versions``;
+the OFFSET query selects the same columns in the same order.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.apps.documents import models
+from backend.apps.documents.services import VERSION_LIST_COLUMNS, DraftService
+from backend.core.database import Base
+from backend.utils import pagination
+
+BATCH = 20000
+
+def seed(path: str, versions: int, drafts: int) -> uuid.UUID:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(models.Version)).scalar()
+        if existing:
+            print(f"reusing {existing:,} versions in {path}")
+            return conn.execute(select(models.Version.draft_id).limit(1)).scalar()
+        user_id = uuid.uuid4()
+        draft_ids = [uuid.uuid4() for _ in range(drafts)]
+        conn.execute(insert(models.Draft), [
+            {"id": draft_id, "template_id": "msa.html", "user_id": user_id, "status": "draft"}
+            for draft_id in draft_ids
+        ])
+        start = datetime(2024, 1, 1)
+        started = time.perf_counter()
+        for offset in range(0, versions, BATCH):
+            conn.execute(insert(models.Version), [
+                {
+                    "id": uuid.uuid4(),
+                    "draft_id": draft_ids[n % drafts],
+                    "sequence": n // drafts,
+                    "kind": "snapshot",
+                    "content": {"clause": "The Supplier shall deliver the Services. " * 4, "n": n},
+                    "created_at": start + timedelta(milliseconds=n)
+                }
+                for n in range(offset, min(offset + BATCH, versions))
+            ])
+        print(f"seeded {versions:,} versions in {time.perf_counter() - started:.0f}s")
+    engine.dispose()
+    return draft_ids[0]
+
+def ms(samples) -> str:
+    return f"{statistics.median(samples) * 1000:8.2f} ms"
+
+async def measure(path: str, draft_id: uuid.UUID, limit: int, repeat: int) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with AsyncSession(engine) as db:
+        total = (await db.execute(
+            select(func.count()).where(models.Version.draft_id == draft_id)
+        )).scalar()
+        ordered = (
+            select(*VERSION_LIST_COLUMNS)
+            .where(models.Version.draft_id == draft_id)
+            .order_by(models.Version.created_at.desc(), models.Version.id.desc())
+        )
+        print(f"draft with {total:,} versions, {limit} per page")
+        print(f"{'depth':>10} {'keyset':>12} {'offset':>12}")
+        for depth in sorted({d for d in (0, 1000, 10000, total // 2, total - limit) if 0 <= d < total}):
+            cursor = None
+            if depth:
+                row = (await db.execute(ordered.offset(depth - 1).limit(1))).one()
+                cursor = pagination.encode_cursor(row.created_at, row.id)
+            keyset, offset = [], []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                page = await DraftService.list_versions(db, draft_id, cursor, limit)
+                keyset.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                rows = (await db.execute(ordered.offset(depth).limit(limit))).all()
+                offset.append(time.perf_counter() - started)
+            assert [item["id"] for item in page["items"]] == [row.id for row in rows]
+            print(f"{depth:>10,} {ms(keyset):>12} {ms(offset):>12}")
+
+        full = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            (await db.execute(
+                pagination.keyset(
+                    select(models.Version).where(models.Version.draft_id == draft_id),
+                    models.Version.created_at, models.Version.id, None, limit
+                )
+            )).scalars().all()
+            full.append(time.perf_counter() - started)
+        print(f"first page loading full rows (content included): {ms(full)}")
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--versions", type=int, default=2000000)
+    parser.add_argument("--drafts", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", help="SQLite file to create or reuse (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "pagination.db")
+    draft_id = seed(path, args.versions, args.drafts)
+    asyncio.run(measure(path, draft_id, args.limit, args.repeat))
+
+if __name__ == "__main__":
+    main()
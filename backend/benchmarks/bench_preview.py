@@ -0,0 +1,69 @@
+"""Live-preview latency: full render versus clause re-render after one field edit.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_preview --clauses 50 100 200 400
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from backend.apps.templates.loader import TemplateLoader
+
+CLAUSE = """<h2>{n}. {{{{ clauses.c{n}.title }}}}</h2>
+{{% for party in parties %}}<p>{{{{ party.name }}}} shall {{{{ clauses.c{n}.obligation }}}} by {{{{ dates.d{n} }}}}.</p>
+{{% endfor %}}
+"""
+
+def build(clauses: int) -> str:
+    body = "\n".join(CLAUSE.format(n=n) for n in range(clauses))
+    return "<h1>{{ title }}</h1>\n\n" + body
+
+def context(clauses: int) -> dict:
+    return {
+        "title": "Master Services Agreement",
+        "parties": [{"name": "Acme Ltd"}, {"name": "Globex plc"}],
+        "clauses": {f"c{n}": {"title": f"Clause {n}", "obligation": "deliver"} for n in range(clauses)},
+        "dates": {f"d{n}": "1 March" for n in range(clauses)}
+    }
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clauses", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        print(f"{'clauses':>8} {'full ms':>9} {'edit ms':>9}")
+        for clauses in args.clauses:
+            name = f"msa_{clauses}.html"
+            (root / name).write_text(build(clauses))
+            loader = TemplateLoader(templates_dir=str(root), auto_reload=False)
+            ctx = context(clauses)
+            full = timed(lambda: loader.render_template(name, ctx), args.repeat)
+            loader.parser.render(name, ctx)
+            edits = iter(range(10 ** 9))
+
+            def edit():
+                # A FormBuilder edit to one field that a single clause reads
+                ctx["dates"] = dict(ctx["dates"], d0=f"{next(edits)} March")
+                loader.parser.render(name, ctx)
+
+            print(f"{clauses:>8} {full:>9.2f} {timed(edit, args.repeat):>9.2f}")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
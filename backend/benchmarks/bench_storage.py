@@ -0,0 +1,65 @@
+"""Concurrent uploads: blocking SDK calls on the event loop versus the storage thread pool.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_storage --uploads 64 --latency 0.05
+
+Each upload spends ``latency`` seconds in a blocking call, like a
+googleapiclient ``execute()``. "inline" makes that call directly inside the
+coroutine, as the providers used to; "offloaded" goes through
+``StorageProvider.run_blocking``. While the uploads run, a ticker measures
+how late the event loop wakes it, which is the delay every other request
+on the server would see.
+"""
+import argparse
+import asyncio
+import time
+
+from backend.storage.base_provider import shutdown_storage_executor
+from backend.storage.memory import InMemoryStorageProvider
+
+class InlineBlockingProvider(InMemoryStorageProvider):
+    async def _wait(self) -> None:
+        time.sleep(self.latency)
+
+async def run(provider: InMemoryStorageProvider, uploads: int) -> dict:
+    lags = []
+
+    async def ticker():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(provider.save_file(f"doc-{n}.html", "<p>x</p>") for n in range(uploads)))
+    elapsed = time.perf_counter() - started
+    task.cancel()
+    return {
+        "elapsed": elapsed,
+        "throughput": uploads / elapsed,
+        "max_lag": max(lags) if lags else elapsed
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{args.uploads} uploads, {args.latency * 1000:.0f} ms blocking call each")
+    for label, provider in (
+        ("inline", InlineBlockingProvider(args.latency)),
+        ("offloaded", InMemoryStorageProvider(args.latency, blocking=True))
+    ):
+        result = asyncio.run(run(provider, args.uploads))
+        print(
+            f"{label:>10}: {result['elapsed']:6.2f} s total, {result['throughput']:7.1f} uploads/s, "
+            f"event loop stalled up to {result['max_lag'] * 1000:7.1f} ms"
+        )
+    shutdown_storage_executor()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Repeated previews of the same documents, with and without the read-through cache.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_storage_cache --documents 20 --reads 400 --latency 0.2
+
+``reads`` preview requests, ``concurrency`` at a time, each pick one of
+``documents`` finalized documents at random, as the preview pane does. The
+upstream provider spends ``latency`` seconds per call, roughly a Drive or
+OneDrive round trip; the cached provider also revalidates versions every
+30 s, so within one run only the first read of each document goes upstream.
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+from backend.storage.base_provider import StorageProvider, shutdown_storage_executor
+from backend.storage.cached import CachedStorageProvider
+from backend.storage.memory import InMemoryStorageProvider
+
+async def run(provider: StorageProvider, file_ids: list, reads: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def preview(file_id: str):
+        async with semaphore:
+            started = time.perf_counter()
+            await provider.get_file(file_id)
+            latencies.append(time.perf_counter() - started)
+
+    rng = random.Random(7)
+    started = time.perf_counter()
+    await asyncio.gather(*(preview(rng.choice(file_ids)) for _ in range(reads)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)]
+    }
+
+async def bench(args) -> None:
+    upstream = InMemoryStorageProvider()
+    file_ids = [
+        await upstream.save_file(f"doc-{n}.html", "<p>clause</p>" * 4000)
+        for n in range(args.documents)
+    ]
+    upstream.latency = args.latency
+    with tempfile.TemporaryDirectory() as disk_dir:
+        cached = CachedStorageProvider(upstream, disk_dir=disk_dir)
+        for label, provider in (("direct", upstream), ("cached", cached)):
+            result = await run(provider, file_ids, args.reads, args.concurrency)
+            print(
+                f"{label:>8}: {result['elapsed']:6.2f} s total, "
+                f"p50 {result['p50'] * 1000:7.1f} ms, p99 {result['p99'] * 1000:7.1f} ms"
+            )
+        print(f"  cache: {cached.stats()}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{args.reads} previews of {args.documents} documents, {args.latency * 1000:.0f} ms upstream")
+    asyncio.run(bench(args))
+    shutdown_storage_executor()
+
+if __name__ == "__main__":
+    main()
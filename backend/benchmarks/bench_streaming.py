@@ -0,0 +1,67 @@
+"""Peak memory of a full-string render versus a streamed render.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_streaming --rows 50000
+
+Both modes encode the output to bytes as an upload or HTTP response would.
+Peak memory is traced Python allocations during the render.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from backend.apps.templates.loader import TemplateLoader
+from backend.utils.streams import encode_chunks
+
+SCHEDULE = """<h1>Schedule 1 - {{ title }}</h1>
+<table>
+{% for row in rows %}<tr><td>{{ loop.index }}</td><td>{{ row.asset }}</td><td>{{ row.location }}</td><td>{{ row.value }}</td></tr>
+{% endfor %}</table>
+"""
+
+def measure(render) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = render()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        (root / "schedule.html").write_text(SCHEDULE)
+        loader = TemplateLoader(templates_dir=str(root), auto_reload=False)
+        context = {"title": "Assets"}
+
+        def full():
+            return len(loader.render_template("schedule.html", context).encode())
+
+        def streamed():
+            return sum(len(chunk) for chunk in encode_chunks(
+                loader.stream_template("schedule.html", context, args.chunk_size)
+            ))
+
+        loader.get_template("schedule.html")
+        for name, render in (("render_template", full), ("stream_template", streamed)):
+            # Built outside the trace so only the render itself is measured
+            context["rows"] = [
+                {"asset": f"Asset {i}", "location": "Unit 4, Leeds", "value": i * 10} for i in range(args.rows)
+            ]
+            size, elapsed, peak = measure(render)
+            print(f"{name:<16} output {size / 1e6:7.1f} MB  peak {peak / 1e6:7.1f} MB  {elapsed:6.2f}s")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Cold versus warm render latency of TemplateLoader, per template.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_templates --templates 20
+
+"cold" builds a fresh loader (a restarted worker) with an empty bytecode
+cache, "bytecode" a fresh loader whose bytecode cache was filled by an
+earlier process, and "warm" reuses the compiled-template cache.
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from backend.apps.templates.loader import TemplateLoader
+
+CLAUSE = """
+{% if clauses.c{n} %}
+<h2>{{ loop_index }}. {{ clauses.c{n}.title | upper }}</h2>
+{% for party in parties %}
+<p>{{ party.name }} ("{{ party.role | default('Party') }}") shall {{ clauses.c{n}.obligation }}
+within {{ clauses.c{n}.days | default(30) }} days of {{ effective_date }}.</p>
+{% endfor %}
+{% endif %}
+"""
+
+def write_templates(directory: Path, count: int, clauses: int) -> list:
+    names = []
+    for index in range(count):
+        body = "".join(CLAUSE.replace("{n}", str(n)) for n in range(clauses))
+        name = f"agreement_{index}.html"
+        (directory / name).write_text(
+            "{% macro signature(party) %}<p>{{ party.name }}: ________</p>{% endmacro %}\n"
+            "<h1>{{ title }}</h1>" + body +
+            "{% for party in parties %}{{ signature(party) }}{% endfor %}"
+        )
+        names.append(name)
+    return names
+
+def context(clauses: int) -> dict:
+    return {
+        "title": "Master Services Agreement",
+        "effective_date": "1 January 2025",
+        "loop_index": 1,
+        "parties": [{"name": "Acme Ltd", "role": "Supplier"}, {"name": "Globex plc"}],
+        "clauses": {
+            f"c{n}": {"title": f"Clause {n}", "obligation": "deliver the services", "days": 14}
+            for n in range(clauses)
+        }
+    }
+
+def time_render(loader: TemplateLoader, name: str, ctx: dict) -> float:
+    started = time.perf_counter()
+    loader.render_template(name, ctx)
+    return (time.perf_counter() - started) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--templates", type=int, default=20)
+    parser.add_argument("--clauses", type=int, default=40)
+    parser.add_argument("--warm-renders", type=int, default=50)
+    parser.add_argument("--auto-reload", action="store_true")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    templates_dir, bytecode_dir = root / "templates", root / "bytecode"
+    templates_dir.mkdir()
+    try:
+        names = write_templates(templates_dir, args.templates, args.clauses)
+        ctx = context(args.clauses)
+
+        def loader(bytecode: bool) -> TemplateLoader:
+            return TemplateLoader(
+                templates_dir=str(templates_dir),
+                bytecode_cache_dir=str(bytecode_dir) if bytecode else None,
+                auto_reload=args.auto_reload
+            )
+
+        cold = [time_render(loader(bytecode=False), name, ctx) for name in names]
+        primed = loader(bytecode=True)
+        for name in names:
+            primed.render_template(name, ctx)
+        from_bytecode = [time_render(loader(bytecode=True), name, ctx) for name in names]
+        warm_loader = loader(bytecode=True)
+        warm = []
+        for name in names:
+            warm_loader.render_template(name, ctx)
+            warm.append(statistics.median(
+                time_render(warm_loader, name, ctx) for _ in range(args.warm_renders)
+            ))
+
+        print(f"{'template':<20} {'cold ms':>9} {'bytecode ms':>12} {'warm ms':>9}")
+        for row in zip(names, cold, from_bytecode, warm):
+            print(f"{row[0]:<20} {row[1]:>9.2f} {row[2]:>12.2f} {row[3]:>9.3f}")
+        print(
+            f"{'median':<20} {statistics.median(cold):>9.2f} "
+            f"{statistics.median(from_bytecode):>12.2f} {statistics.median(warm):>9.3f}"
+        )
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Storage size and reconstruction latency: full copies versus snapshots plus deltas.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_versioning --versions 300 --interval 20
+
+Simulates a negotiation in which every version edits a few words in one or
+two clauses of a long agreement.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from backend.utils import versioning
+
+WORDS = (
+    "the supplier shall customer agreement services deliverables reasonable "
+    "within days notice termination liability indemnify warrant confidential"
+).split()
+
+def negotiation(versions: int, clauses: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    content = {
+        "title": "Master Services Agreement",
+        "parties": [{"name": "Acme Ltd"}, {"name": "Globex plc"}],
+        "clauses": {f"{n}": " ".join(rng.choice(WORDS) for _ in range(120)) for n in range(clauses)}
+    }
+    history = [content]
+    for _ in range(versions - 1):
+        edited = dict(content["clauses"])
+        for key in rng.sample(sorted(edited), rng.randint(1, 2)):
+            words = edited[key].split(" ")
+            for _ in range(rng.randint(1, 4)):
+                words[rng.randrange(len(words))] = rng.choice(WORDS)
+            edited[key] = " ".join(words)
+        content = dict(content, clauses=edited)
+        history.append(content)
+    return history
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--versions", type=int, default=300)
+    parser.add_argument("--clauses", type=int, default=40)
+    parser.add_argument("--interval", type=int, default=20)
+    args = parser.parse_args()
+
+    history = negotiation(args.versions, args.clauses)
+    full_bytes = sum(versioning.encoded_size(content) for content in history)
+
+    started = time.perf_counter()
+    rows, previous = [], None
+    for sequence, content in enumerate(history):
+        rows.append(versioning.encode(previous, content, sequence, args.interval))
+        previous = content
+    encode_ms = (time.perf_counter() - started) * 1000 / len(history)
+    delta_bytes = sum(versioning.encoded_size(payload) for _, payload in rows)
+    snapshots = sum(kind == versioning.SNAPSHOT for kind, _ in rows)
+
+    latencies = []
+    for sequence in range(len(rows)):
+        start = max(i for i in range(sequence + 1) if rows[i][0] == versioning.SNAPSHOT)
+        began = time.perf_counter()
+        content = versioning.reconstruct(rows[start:sequence + 1])
+        latencies.append((time.perf_counter() - began) * 1000)
+        assert content == history[sequence]
+
+    print(f"versions          {len(history)} ({snapshots} snapshots)")
+    print(f"full copies       {full_bytes / 1e6:8.2f} MB")
+    print(f"snapshot+delta    {delta_bytes / 1e6:8.2f} MB  ({full_bytes / delta_bytes:.1f}x smaller)")
+    print(f"encode            {encode_ms:8.2f} ms/version")
+    print(f"reconstruct       p50 {statistics.median(latencies):.3f} ms  max {max(latencies):.3f} ms"
+          f"  (full copy: a single row read)")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -20,6 +21,97 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
     MICROSOFT_CLIENT_ID: str = os.getenv("MICROSOFT_CLIENT_ID", "")
     MICROSOFT_CLIENT_SECRET: str = os.getenv("MICROSOFT_CLIENT_SECRET", "")
+
+    # Document templates. TEMPLATE_AUTO_RELOAD stats template files on every
+    # lookup and should be off in production, where templates change only on
+    # deploy (call TemplateLoader.invalidate/reload_changed instead).
+    TEMPLATES_DIR: str = os.getenv("TEMPLATES_DIR", "templates")
+    TEMPLATE_CACHE_SIZE: int = 400
+    TEMPLATE_BYTECODE_CACHE_DIR: Optional[str] = os.getenv("TEMPLATE_BYTECODE_CACHE_DIR")
+    TEMPLATE_AUTO_RELOAD: bool = True
+    TEMPLATE_STREAM_CHUNK_SIZE: int = 64 * 1024
+    TEMPLATE_CLAUSE_CACHE_SIZE: int = 4096
+
+    # Bulk generation: render worker processes, contexts per worker task and
+    # the largest batch accepted in one request
+    BATCH_RENDER_WORKERS: int = int(os.getenv("BATCH_RENDER_WORKERS", "4"))
+    BATCH_RENDER_CHUNK_SIZE: int = 50
+    BATCH_MAX_DOCUMENTS: int = 5000
+
+    # Every Nth version of a draft is a full snapshot; the rest are deltas
+    VERSION_SNAPSHOT_INTERVAL: int = 20
+    # Version diffs kept in memory, and versions per history request
+    VERSION_DIFF_CACHE_SIZE: int = 1024
+    VERSION_HISTORY_MAX_LIMIT: int = 100
+    # Autosaves of a draft within this many seconds become one version
+    AUTOSAVE_WINDOW_SECONDS: float = 2.0
+    # A save that keeps failing is retried on its own with exponential backoff
+    # and dropped after AUTOSAVE_MAX_ATTEMPTS
+    AUTOSAVE_MAX_ATTEMPTS: int = 5
+    AUTOSAVE_RETRY_BASE_SECONDS: float = 2.0
+    AUTOSAVE_RETRY_MAX_SECONDS: float = 60.0
+    # Rows per page of draft, version and document listings
+    LIST_PAGE_SIZE: int = 20
+    LIST_PAGE_MAX_SIZE: int = 100
+
+    # Snapshots and final documents over BLOB_INLINE_MAX_SIZE bytes of JSON
+    # are stored as deduplicated, compressed content chunks
+    BLOB_INLINE_MAX_SIZE: int = 2048
+    BLOB_CHUNK_MIN_SIZE: int = 1024
+    BLOB_CHUNK_MAX_SIZE: int = 16 * 1024
+    BLOB_COMPRESSION_LEVEL: int = 3
+
+    # Comma-separated storage providers built at startup ("memory",
+    # "google_drive", "onedrive", "local"); blocking SDK calls share STORAGE_IO_THREADS threads.
+    # None by default: "memory" lives in one process and only suits development
+    STORAGE_PROVIDERS: str = os.getenv("STORAGE_PROVIDERS", "")
+    STORAGE_IO_THREADS: int = 16
+    GOOGLE_SERVICE_ACCOUNT_FILE: Optional[str] = os.getenv("GOOGLE_SERVICE_ACCOUNT_FILE")
+    ONEDRIVE_CLIENT_SECRET: str = os.getenv("ONEDRIVE_CLIENT_SECRET", "")
+    ONEDRIVE_TENANT_ID: str = os.getenv("ONEDRIVE_TENANT_ID", "")
+    ONEDRIVE_DRIVE_ID: str = os.getenv("ONEDRIVE_DRIVE_ID", "")
+    ONEDRIVE_FOLDER: str = "LegalDraft"
+    # Reads of at least LOCAL_STORAGE_MMAP_THRESHOLD bytes are served from a memory map
+    LOCAL_STORAGE_DIR: str = os.getenv("LOCAL_STORAGE_DIR", "storage")
+    LOCAL_STORAGE_MMAP_THRESHOLD: int = 1024 * 1024
+
+    # Read-through cache in front of the providers in STORAGE_CACHE_PROVIDERS:
+    # documents up to STORAGE_CACHE_MEMORY_MAX_OBJECT are kept in process, and
+    # up to STORAGE_CACHE_DISK_MAX_OBJECT under STORAGE_CACHE_DIR (empty: no
+    # disk tier; each process uses its own slot of up to STORAGE_CACHE_DISK_BYTES).
+    # Versions are rechecked every STORAGE_CACHE_REVALIDATE_SECONDS
+    STORAGE_CACHE_PROVIDERS: str = os.getenv("STORAGE_CACHE_PROVIDERS", "google_drive,onedrive")
+    STORAGE_CACHE_DIR: str = os.getenv("STORAGE_CACHE_DIR", "storage-cache")
+    STORAGE_CACHE_MEMORY_BYTES: int = 128 * 1024 * 1024
+    STORAGE_CACHE_MEMORY_MAX_OBJECT: int = 4 * 1024 * 1024
+    STORAGE_CACHE_DISK_BYTES: int = 4 * 1024 * 1024 * 1024
+    STORAGE_CACHE_DISK_MAX_OBJECT: int = 256 * 1024 * 1024
+    STORAGE_CACHE_REVALIDATE_SECONDS: float = 30.0
+
+    # Write-behind uploads of finalized documents to UPLOAD_PROVIDER (empty:
+    # the first durable one of STORAGE_PROVIDERS; never "memory", and nothing is
+    # uploaded when no durable provider is configured). UPLOAD_WORKERS pollers each claim up to
+    # UPLOAD_BATCH_SIZE due jobs; a claimed job is handed out again after
+    # UPLOAD_LEASE_SECONDS, so the lease must outlast the slowest upload.
+    # Failures back off exponentially and give up after UPLOAD_MAX_ATTEMPTS
+    UPLOAD_PROVIDER: str = os.getenv("UPLOAD_PROVIDER", "")
+    UPLOAD_WORKERS: int = 2
+    UPLOAD_BATCH_SIZE: int = 20
+    UPLOAD_POLL_SECONDS: float = 1.0
+    UPLOAD_LEASE_SECONDS: float = 600.0
+    UPLOAD_MAX_ATTEMPTS: int = 8
+    UPLOAD_RETRY_BASE_SECONDS: float = 5.0
+    UPLOAD_RETRY_MAX_SECONDS: float = 3600.0
+    # Concurrent uploads per provider, e.g. {"google_drive": 4}
+    UPLOAD_PROVIDER_CONCURRENCY: Dict[str, int] = {}
+    UPLOAD_DEFAULT_CONCURRENCY: int = 4
+
+    # Uploads are sent in chunks from a spool that keeps at most
+    # STORAGE_SPOOL_MAX_MEMORY bytes in memory (Drive needs 256 KiB multiples)
+    STORAGE_UPLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024
+    STORAGE_SPOOL_MAX_MEMORY: int = 8 * 1024 * 1024
+    STORAGE_UPLOAD_RETRIES: int = 5
+    STORAGE_DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
     class Config:
         case_sensitive = True
 
@@ -80,6 +80,15 @@ class DocumentNotFoundException(LegalPlatformException):
             detail={"document_id": document_id}
         )
 
+class VersionNotFoundException(LegalPlatformException):
+    def __init__(self, draft_id: str, sequence: int):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            error_code="VERSION_NOT_FOUND",
+            message=f"Version {sequence} of draft {draft_id} not found",
+            detail={"draft_id": draft_id, "sequence": sequence}
+        )
+
 class TemplateNotFoundException(LegalPlatformException):
     def __init__(self, template_id: str):
         super().__init__(
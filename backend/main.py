@@ -14,8 +14,12 @@ from backend.core.exceptions import (
 from backend.apps.auth import routers as auth_routers
 from backend.apps.documents import routers as document_routers
 from backend.apps.templates import routers as template_routers
+from backend.apps.templates.loader import get_template_loader
+from backend.apps.documents.autosave import get_autosave_coalescer
+from backend.apps.documents.batch import get_batch_renderer
+from backend.apps.documents.uploads import get_upload_worker
 from backend.apps.signatures import routers as signature_routers
-from backend.utils import gdpr_utils
+from backend.utils import blob_store, gdpr_utils
 from backend.storage import base_provider
 
 
@@ -40,13 +44,30 @@ async def lifespan(app: FastAPI):
     await database.engine.connect()
     logger.info("Database connection established")
     
+    if blob_store.zstandard is None:
+        logger.warning(
+            "zstandard is not installed: stored document chunks fall back to zlib, "
+            "which is slower and compresses worse; install zstandard"
+        )
+
     # Initialize cloud storage providers
     base_provider.StorageProviderFactory.initialize_providers()
     logger.info("Storage providers initialized")
+
+    # Push finalized documents to storage in the background
+    get_upload_worker().start()
+
+    # Parse every template once up front so field lookups never render
+    indexed = get_template_loader().fields.build()
+    logger.info(f"Indexed fields of {indexed} templates")
     
     yield  # App runs here
     
     # Cleanup on shutdown
+    await get_autosave_coalescer().close()
+    await get_upload_worker().close()
+    get_batch_renderer().shutdown()
+    await base_provider.StorageProviderFactory.close_providers()
     await database.engine.dispose()
     logger.info("Database connection closed")
 
@@ -0,0 +1,188 @@
+"""Storage provider contract and registry.
+
+Every provider method is a coroutine that must not block the event loop.
+Providers built on blocking SDKs run their calls with
+:meth:`StorageProvider.run_blocking`, on a thread pool shared by all
+providers and bounded by STORAGE_IO_THREADS, so a burst of uploads cannot
+spawn unbounded threads. Providers are created once at startup and reused,
+along with their HTTP connections and credentials.
+
+Documents move as byte chunks in both directions: uploads take sync or
+async chunk iterables and are sent in resumable chunks, and downloads are
+async iterators over an optional byte range, ready for a StreamingResponse.
+"""
+import asyncio
+import functools
+import json
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Union
+from backend.core.config import settings
+from backend.core.exceptions import StorageException
+from backend.utils.streams import ByteChunks, aspool_chunks, spool_chunks
+
+logger = logging.getLogger(__name__)
+
+# Providers whose files live in one process and vanish with it
+VOLATILE_PROVIDERS = {"memory"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_storage_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.STORAGE_IO_THREADS,
+            thread_name_prefix="storage-io"
+        )
+    return _executor
+
+def shutdown_storage_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+class StoredFile(NamedTuple):
+    file_id: str
+    name: str
+    size: int
+    mimetype: str
+    # Changes whenever the content does (ETag, revision); None if never rewritten
+    version: Optional[str] = None
+
+class StorageProvider(ABC):
+    """Interface implemented by every document storage backend"""
+
+    name = "storage"
+
+    async def run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking SDK call on the storage thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_storage_executor(), functools.partial(func, *args, **kwargs))
+
+    async def spool(self, chunks: ByteChunks) -> IO[bytes]:
+        """Collect chunks into a seekable file, see :func:`~backend.utils.streams.spool_chunks`"""
+        if hasattr(chunks, "__aiter__"):
+            return await aspool_chunks(chunks, settings.STORAGE_SPOOL_MAX_MEMORY)
+        # Sync chunks may be produced by template rendering or disk reads
+        return await self.run_blocking(spool_chunks, chunks, settings.STORAGE_SPOOL_MAX_MEMORY)
+
+    @abstractmethod
+    async def save_stream(self, name: str, chunks: ByteChunks, mimetype: str = "text/html") -> str:
+        """Store a document given as byte chunks without building it in memory"""
+
+    @abstractmethod
+    async def open_stream(
+        self,
+        file_id: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Chunks of a stored document from ``start`` to ``end`` (inclusive; default: the end)"""
+
+    @abstractmethod
+    async def stat(self, file_id: str) -> StoredFile:
+        """Name, size and type of a stored document"""
+
+    async def save_file(self, name: str, content: Union[str, bytes], mimetype: str = "text/html") -> str:
+        """Store a small document and return the provider's file id"""
+        data = content.encode() if isinstance(content, str) else content
+        return await self.save_stream(name, [data], mimetype)
+
+    async def get_file(self, file_id: str) -> str:
+        """Fetch a small stored document as text; use open_stream for large files"""
+        return b"".join([chunk async for chunk in self.open_stream(file_id)]).decode()
+
+    def local_path(self, file_id: str) -> Optional[str]:
+        """Path of the stored document on this host, for providers that keep files locally"""
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring; empty for providers that keep none"""
+        return {}
+
+    async def close(self) -> None:
+        """Release sessions and connections held by the provider"""
+
+class StorageProviderFactory:
+    """Providers by name, built once from settings at startup"""
+
+    _providers: Dict[str, StorageProvider] = {}
+
+    @classmethod
+    def register(cls, provider: StorageProvider) -> None:
+        cls._providers[provider.name] = provider
+
+    @classmethod
+    def get(cls, name: str) -> StorageProvider:
+        try:
+            return cls._providers[name]
+        except KeyError:
+            raise StorageException(name, "get_provider")
+
+    @classmethod
+    def names(cls) -> List[str]:
+        return list(cls._providers)
+
+    @classmethod
+    def initialize_providers(cls) -> None:
+        """Build every provider listed in STORAGE_PROVIDERS.
+
+        SDK imports happen here, so a provider's dependencies are only
+        needed where it is enabled. Providers also listed in
+        STORAGE_CACHE_PROVIDERS are wrapped in a read-through cache.
+        """
+        cached = {n.strip() for n in settings.STORAGE_CACHE_PROVIDERS.split(",")}
+        for name in filter(None, (n.strip() for n in settings.STORAGE_PROVIDERS.split(","))):
+            if name in cls._providers:
+                continue
+            if name == "memory":
+                from backend.storage.memory import InMemoryStorageProvider
+                provider: StorageProvider = InMemoryStorageProvider()
+            elif name == "google_drive":
+                from backend.storage.google_drive import GoogleDriveProvider
+                with open(settings.GOOGLE_SERVICE_ACCOUNT_FILE) as f:
+                    provider = GoogleDriveProvider(json.load(f))
+            elif name == "onedrive":
+                from backend.storage.onedrive import OneDriveProvider
+                provider = OneDriveProvider(
+                    client_id=settings.ONEDRIVE_CLIENT_ID,
+                    client_secret=settings.ONEDRIVE_CLIENT_SECRET,
+                    tenant_id=settings.ONEDRIVE_TENANT_ID,
+                    drive_id=settings.ONEDRIVE_DRIVE_ID,
+                    folder=settings.ONEDRIVE_FOLDER
+                )
+            elif name == "local":
+                from backend.storage.local import LocalStorageProvider
+                provider = LocalStorageProvider(
+                    settings.LOCAL_STORAGE_DIR,
+                    mmap_threshold=settings.LOCAL_STORAGE_MMAP_THRESHOLD
+                )
+            else:
+                logger.warning(f"Unknown storage provider {name} in STORAGE_PROVIDERS")
+                continue
+            if name in cached:
+                from backend.storage.cached import CachedStorageProvider
+                provider = CachedStorageProvider(
+                    provider,
+                    memory_bytes=settings.STORAGE_CACHE_MEMORY_BYTES,
+                    memory_max_object=settings.STORAGE_CACHE_MEMORY_MAX_OBJECT,
+                    disk_dir=settings.STORAGE_CACHE_DIR or None,
+                    disk_bytes=settings.STORAGE_CACHE_DISK_BYTES,
+                    disk_max_object=settings.STORAGE_CACHE_DISK_MAX_OBJECT,
+                    revalidate_seconds=settings.STORAGE_CACHE_REVALIDATE_SECONDS
+                )
+            cls.register(provider)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        return {name: provider.stats() for name, provider in cls._providers.items()}
+
+    @classmethod
+    async def close_providers(cls) -> None:
+        for provider in cls._providers.values():
+            await provider.close()
+        cls._providers.clear()
+        shutdown_storage_executor()
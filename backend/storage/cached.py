@@ -0,0 +1,225 @@
+"""Read-through cache in front of a remote storage provider.
+
+Finalized documents are read far more often than they are written, and each
+Drive or OneDrive fetch costs hundreds of milliseconds. Reads go through two
+tiers: an in-process LRU bounded by bytes for small documents, and a sharded
+directory on local disk, also bounded by bytes, for anything up to
+``disk_max_object``. Larger documents stream straight from the provider.
+
+Entries are keyed by file id *and* the provider's version (Drive revision,
+Graph eTag). The version is rechecked with a metadata request at most every
+``revalidate_seconds``; a changed version misses and drops the stale
+entries. Concurrent misses for the same document share one upstream fetch.
+
+Several processes may share ``disk_dir``. Each one holds an exclusive lock on
+a ``slot-N`` subdirectory and only indexes, fills and evicts files there, so
+``disk_bytes`` bounds each slot. A slot whose owner has exited is taken over,
+entries included, by the next process to start.
+"""
+import asyncio
+import fcntl
+import hashlib
+import itertools
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from backend.core.config import settings
+from backend.utils.lru import LRUCache
+from backend.utils.streams import TEMP_PREFIX, ByteChunks, write_atomic_chunks
+from .base_provider import StorageProvider, StoredFile
+
+# Interrupted fills older than this are removed when a slot is adopted
+TEMP_MAX_AGE_SECONDS = 3600
+
+class CachedStorageProvider(StorageProvider):
+    def __init__(
+        self,
+        upstream: StorageProvider,
+        memory_bytes: int = 128 * 1024 * 1024,
+        memory_max_object: int = 4 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_bytes: int = 4 * 1024 * 1024 * 1024,
+        disk_max_object: int = 256 * 1024 * 1024,
+        revalidate_seconds: float = 30.0,
+        max_files: int = 100000
+    ):
+        self.upstream = upstream
+        self.name = upstream.name
+        self.memory_max_object = memory_max_object
+        self.disk_max_object = disk_max_object if disk_dir else 0
+        self.revalidate_seconds = revalidate_seconds
+        self.memory = LRUCache(memory_bytes, weigher=len)
+        self.disk = LRUCache(disk_bytes, weigher=lambda size: size, on_evict=self._unlink)
+        self.disk_dir = None
+        self._slot_lock = None
+        # file_id -> (StoredFile, monotonic time it was last checked)
+        self._files = LRUCache(max_files)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.upstream_fetches = 0
+        self.coalesced = 0
+        self.bypassed = 0
+        self.invalidations = 0
+        if disk_dir:
+            self.disk_dir = self._claim_slot(os.path.abspath(disk_dir))
+            self._load_disk_index()
+
+    def _key(self, file_id: str, version: Optional[str]) -> str:
+        return hashlib.sha256(f"{self.name}\0{file_id}\0{version}".encode()).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def _unlink(self, key: str, _size: int) -> None:
+        try:
+            os.unlink(self._disk_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _claim_slot(self, root: str) -> str:
+        """Lock the first slot under ``root`` no running process holds"""
+        for slot in itertools.count():
+            directory = os.path.join(root, f"slot-{slot}")
+            os.makedirs(directory, exist_ok=True)
+            lock = open(os.path.join(directory, ".lock"), "ab")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                continue
+            self._slot_lock = lock  # Held until close() or process exit
+            return directory
+
+    def _load_disk_index(self) -> None:
+        """Adopt entries left by the slot's previous owner, least recently used first"""
+        entries = []
+        now = time.time()
+        for directory, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name == ".lock":
+                    continue
+                path = os.path.join(directory, name)
+                st = os.stat(path)
+                if name.startswith(TEMP_PREFIX):
+                    if now - st.st_mtime > TEMP_MAX_AGE_SECONDS:
+                        os.unlink(path)  # Interrupted fill
+                    continue
+                entries.append((st.st_atime, name, st.st_size))
+        for _, key, size in sorted(entries):
+            self.disk.set(key, size)
+
+    async def _coalesce(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``fetch()``, sharing one call between concurrent callers with the same key"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A cancelled caller must not cancel the fetch others are waiting on
+        return await asyncio.shield(future)
+
+    def _drop(self, file_id: str, version: Optional[str]) -> None:
+        key = self._key(file_id, version)
+        self.memory.pop(key)
+        if self.disk.pop(key) is not None:
+            self._unlink(key, 0)
+        self.invalidations += 1
+
+    async def stat(self, file_id: str) -> StoredFile:
+        cached: Optional[Tuple[StoredFile, float]] = self._files.get(file_id)
+        if cached is not None and time.monotonic() - cached[1] < self.revalidate_seconds:
+            return cached[0]
+        info = await self._coalesce(("stat", file_id), lambda: self.upstream.stat(file_id))
+        if cached is not None and cached[0].version != info.version:
+            self._drop(file_id, cached[0].version)
+        self._files.set(file_id, (info, time.monotonic()))
+        return info
+
+    async def _write_disk(self, key: str, chunks: ByteChunks) -> None:
+        size = await write_atomic_chunks(self._disk_path(key), chunks, self.run_blocking)
+        self.disk.set(key, size)
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def _fill(self, key: str, file_id: str, info: StoredFile) -> Optional[bytes]:
+        """Bring a document into the cache, returning it if it is kept in memory"""
+        in_memory = info.size <= self.memory_max_object
+        if self.disk.get(key) is not None:
+            if not in_memory:
+                return None
+            try:
+                data = await self.run_blocking(self._read_file, self._disk_path(key))
+            except FileNotFoundError:
+                self.disk.pop(key)
+            else:
+                self.memory.set(key, data)
+                return data
+        self.upstream_fetches += 1
+        if not in_memory:
+            await self._write_disk(key, self.upstream.open_stream(file_id))
+            return None
+        data = b"".join([chunk async for chunk in self.upstream.open_stream(file_id)])
+        self.memory.set(key, data)
+        if len(data) <= self.disk_max_object:
+            await self._write_disk(key, [data])
+        return data
+
+    async def open_stream(
+        self,
+        file_id: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        info = await self.stat(file_id)
+        key = self._key(file_id, info.version)
+        data = self.memory.get(key)
+        if data is None and info.size <= max(self.memory_max_object, self.disk_max_object):
+            data = await self._coalesce(key, lambda: self._fill(key, file_id, info))
+        chunk_size = settings.STORAGE_DOWNLOAD_CHUNK_SIZE
+        if data is not None:
+            stop = len(data) if end is None else min(end + 1, len(data))
+            for position in range(start, stop, chunk_size):
+                yield data[position:min(position + chunk_size, stop)]
+            return
+        f = None
+        if key in self.disk:
+            try:
+                f = await self.run_blocking(open, self._disk_path(key), "rb")
+            except FileNotFoundError:
+                self.disk.pop(key)
+        if f is None:
+            self.bypassed += 1
+            async for chunk in self.upstream.open_stream(file_id, start, end):
+                yield chunk
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            stop = size if end is None else min(end + 1, size)
+            for position in range(start, stop, chunk_size):
+                yield await self.run_blocking(
+                    os.pread, f.fileno(), min(chunk_size, stop - position), position
+                )
+
+    async def save_stream(self, name: str, chunks: ByteChunks, mimetype: str = "text/html") -> str:
+        return await self.upstream.save_stream(name, chunks, mimetype)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk_dir else None,
+            "files": len(self._files),
+            "upstream_fetches": self.upstream_fetches,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "invalidations": self.invalidations
+        }
+
+    async def close(self) -> None:
+        if self._slot_lock is not None:
+            self._slot_lock.close()
+            self._slot_lock = None
+        await self.upstream.close()
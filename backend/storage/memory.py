@@ -0,0 +1,63 @@
+"""In-process storage provider for development, tests and load tests.
+
+``latency`` simulates a round trip per call. With ``blocking=True`` the
+latency is spent in ``time.sleep`` on the storage thread pool, which behaves
+like a blocking SDK; otherwise it is an ``asyncio.sleep``, like a native
+async client.
+"""
+import asyncio
+import time
+import uuid
+from typing import AsyncIterator, Dict, Optional
+from backend.core.config import settings
+from backend.core.exceptions import StorageException
+from backend.utils.streams import ByteChunks, aiter_chunks
+from .base_provider import StorageProvider, StoredFile
+
+class InMemoryStorageProvider(StorageProvider):
+    name = "memory"
+
+    def __init__(self, latency: float = 0.0, blocking: bool = False):
+        self.latency = latency
+        self.blocking = blocking
+        self.files: Dict[str, bytes] = {}
+        self.info: Dict[str, StoredFile] = {}
+
+    async def _wait(self) -> None:
+        if not self.latency:
+            return
+        if self.blocking:
+            await self.run_blocking(time.sleep, self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+
+    def _lookup(self, file_id: str, operation: str) -> bytes:
+        try:
+            return self.files[file_id]
+        except KeyError:
+            raise StorageException(self.name, operation)
+
+    async def save_stream(self, name: str, chunks: ByteChunks, mimetype: str = "text/html") -> str:
+        await self._wait()
+        data = b"".join([chunk async for chunk in aiter_chunks(chunks)])
+        file_id = uuid.uuid4().hex
+        self.files[file_id] = data
+        self.info[file_id] = StoredFile(file_id, name, len(data), mimetype)
+        return file_id
+
+    async def open_stream(
+        self,
+        file_id: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        data = self._lookup(file_id, "open_stream")
+        stop = len(data) if end is None else min(end + 1, len(data))
+        chunk_size = settings.STORAGE_DOWNLOAD_CHUNK_SIZE
+        for position in range(start, stop, chunk_size):
+            await self._wait()
+            yield data[position:min(position + chunk_size, stop)]
+
+    async def stat(self, file_id: str) -> StoredFile:
+        self._lookup(file_id, "stat")
+        return self.info[file_id]
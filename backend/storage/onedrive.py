@@ -0,0 +1,192 @@
+"""OneDrive / SharePoint storage through Microsoft Graph.
+
+Uses one ``httpx.AsyncClient`` for the provider's lifetime, so connections
+are pooled and reused, and an app-only token from the client credentials
+flow that is shared until shortly before it expires. Documents larger than
+a simple upload are sent through a Graph upload session, one chunk per
+request; a failed chunk is retried from the range Graph reports it still
+expects.
+"""
+import asyncio
+import time
+from typing import IO, AsyncIterator, Dict, Optional
+from urllib.parse import quote
+import httpx
+from backend.core.config import settings
+from backend.core.exceptions import StorageException
+from backend.utils.streams import ByteChunks
+from .base_provider import StorageProvider, StoredFile
+
+GRAPH_URL = "https://graph.microsoft.com/v1.0"
+TOKEN_URL = "https://login.microsoftonline.com/{tenant}/oauth2/v2.0/token"
+SIMPLE_UPLOAD_MAX = 4 * 1024 * 1024
+SESSION_CHUNK_MULTIPLE = 320 * 1024  # Graph requires upload session chunks in multiples of 320 KiB
+# Uploads are retried from the queue, so a second attempt overwrites the first
+# instead of leaving a renamed copy behind
+CONFLICT_BEHAVIOR = "replace"
+# Chunk responses worth retrying; 416 means Graph already has part of the chunk
+RETRY_STATUSES = {416, 429, 500, 502, 503, 504}
+
+class OneDriveProvider(StorageProvider):
+    name = "onedrive"
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        tenant_id: str,
+        drive_id: str,
+        folder: str = "LegalDraft",
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.tenant_id = tenant_id
+        self.drive_url = f"{GRAPH_URL}/drives/{drive_id}"
+        self.folder = folder.strip("/")
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=settings.STORAGE_IO_THREADS),
+            follow_redirects=True
+        )
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def _headers(self) -> Dict[str, str]:
+        async with self._token_lock:
+            if self._token is None or time.monotonic() > self._token_expires:
+                response = await self.client.post(
+                    TOKEN_URL.format(tenant=self.tenant_id),
+                    data={
+                        "client_id": self.client_id,
+                        "client_secret": self.client_secret,
+                        "scope": "https://graph.microsoft.com/.default",
+                        "grant_type": "client_credentials"
+                    }
+                )
+                self._check(response, "authenticate")
+                token = response.json()
+                self._token = token["access_token"]
+                # Refresh a minute early so a token never expires mid-request
+                self._token_expires = time.monotonic() + int(token.get("expires_in", 3600)) - 60
+        return {"Authorization": f"Bearer {self._token}"}
+
+    def _check(self, response: httpx.Response, operation: str) -> None:
+        if response.is_error:
+            raise StorageException(self.name, operation)
+
+    def _path_url(self, name: str) -> str:
+        path = quote(f"{self.folder}/{name}" if self.folder else name)
+        return f"{self.drive_url}/root:/{path}:"
+
+    async def save_stream(self, name: str, chunks: ByteChunks, mimetype: str = "text/html") -> str:
+        # An upload session needs the total size up front
+        spooled = await self.spool(chunks)
+        try:
+            spooled.seek(0, 2)
+            size = spooled.tell()
+            spooled.seek(0)
+            if size <= SIMPLE_UPLOAD_MAX:
+                response = await self.client.put(
+                    f"{self._path_url(name)}/content",
+                    content=spooled.read(),
+                    params={"@microsoft.graph.conflictBehavior": CONFLICT_BEHAVIOR},
+                    headers={**await self._headers(), "Content-Type": mimetype}
+                )
+                self._check(response, "save_file")
+                return response.json()["id"]
+            return await self._upload_session(name, spooled, size)
+        finally:
+            spooled.close()
+
+    async def _upload_session(self, name: str, spooled: IO[bytes], size: int) -> str:
+        response = await self.client.post(
+            f"{self._path_url(name)}/createUploadSession",
+            json={"item": {"@microsoft.graph.conflictBehavior": CONFLICT_BEHAVIOR}},
+            headers=await self._headers()
+        )
+        self._check(response, "create_upload_session")
+        upload_url = response.json()["uploadUrl"]
+        chunk_size = max(
+            SESSION_CHUNK_MULTIPLE,
+            settings.STORAGE_UPLOAD_CHUNK_SIZE // SESSION_CHUNK_MULTIPLE * SESSION_CHUNK_MULTIPLE
+        )
+        position, failures = 0, 0
+        try:
+            while True:
+                spooled.seek(position)
+                data = await self.run_blocking(spooled.read, chunk_size)
+                end = position + len(data) - 1
+                try:
+                    # The upload URL is pre-authenticated; no bearer token
+                    response = await self.client.put(
+                        upload_url,
+                        content=data,
+                        headers={"Content-Range": f"bytes {position}-{end}/{size}"}
+                    )
+                except httpx.TransportError:
+                    response = None
+                if response is not None:
+                    if response.status_code in (200, 201):
+                        return response.json()["id"]
+                    if response.status_code == 202:
+                        position, failures = end + 1, 0
+                        continue
+                    if response.status_code not in RETRY_STATUSES:
+                        self._check(response, "upload_chunk")
+                failures += 1
+                if failures > settings.STORAGE_UPLOAD_RETRIES:
+                    raise StorageException(self.name, "upload_chunk")
+                await asyncio.sleep(min(2 ** failures, 30))
+                position = await self._next_expected(upload_url, position)
+        except BaseException:
+            try:
+                await self.client.delete(upload_url)
+            except httpx.HTTPError:
+                pass  # Abandoned sessions expire on their own
+            raise
+
+    async def _next_expected(self, upload_url: str, fallback: int) -> int:
+        """First byte Graph still expects, to resume an interrupted session"""
+        try:
+            response = await self.client.get(upload_url)
+            ranges = response.json().get("nextExpectedRanges") if response.is_success else None
+        except httpx.TransportError:
+            ranges = None
+        return int(ranges[0].split("-")[0]) if ranges else fallback
+
+    async def open_stream(
+        self,
+        file_id: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        headers = await self._headers()
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        async with self.client.stream(
+            "GET", f"{self.drive_url}/items/{file_id}/content", headers=headers
+        ) as response:
+            self._check(response, "get_file")
+            async for chunk in response.aiter_bytes(settings.STORAGE_DOWNLOAD_CHUNK_SIZE):
+                yield chunk
+
+    async def stat(self, file_id: str) -> StoredFile:
+        response = await self.client.get(
+            f"{self.drive_url}/items/{file_id}",
+            params={"select": "id,name,size,file,eTag"},
+            headers=await self._headers()
+        )
+        self._check(response, "stat")
+        item = response.json()
+        return StoredFile(
+            item["id"],
+            item["name"],
+            item["size"],
+            item.get("file", {}).get("mimeType", "application/octet-stream"),
+            item.get("eTag")
+        )
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,80 @@
+"""Content-addressed chunking and compression for stored document bodies.
+
+A body is serialized to canonical JSON and cut into chunks at content-defined
+boundaries: a cut is only made at a newline, the end of a sentence or between
+JSON members, and only where a hash of the text since the previous boundary
+matches a mask. An edit therefore moves at most the cuts around it, and
+boilerplate shared by many documents (or many versions of one) produces the
+same chunks, which are stored once under their SHA-256.
+
+Chunks are compressed with zstd when the ``zstandard`` package is installed
+and with zlib otherwise, which the backend warns about at startup; the codec
+is recorded per chunk so either can be read.
+"""
+import hashlib
+import json
+import re
+import zlib
+from typing import Any, List, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available
+    zstandard = None
+
+ZSTD = "zstd"
+ZLIB = "zlib"
+
+BOUNDARY = re.compile(rb'\\n|[.;:] |","')
+BOUNDARY_MASK = 0x7  # About one candidate boundary in eight becomes a cut
+
+def serialize(content: Any) -> bytes:
+    return json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+def deserialize(data: bytes) -> Any:
+    return json.loads(data)
+
+def chunk_hash(chunk: bytes) -> str:
+    return hashlib.sha256(chunk).hexdigest()
+
+def _fixed(data: bytes, start: int, end: int, max_size: int) -> Tuple[List[bytes], int]:
+    """Cut ``data[start:end]`` into ``max_size`` pieces, leaving the remainder"""
+    chunks = []
+    while end - start > max_size:
+        chunks.append(data[start:start + max_size])
+        start += max_size
+    return chunks, start
+
+def split(data: bytes, min_size: int, max_size: int) -> List[bytes]:
+    """Cut ``data`` into chunks of ``min_size``..``max_size`` bytes (the last may be shorter)"""
+    chunks: List[bytes] = []
+    start = previous = 0
+    for match in BOUNDARY.finditer(data):
+        end = match.end()
+        piece = data[previous:end]
+        previous = end
+        forced, start = _fixed(data, start, end, max_size)
+        chunks.extend(forced)
+        if end - start >= min_size and zlib.crc32(piece) & BOUNDARY_MASK == 0:
+            chunks.append(data[start:end])
+            start = end
+    forced, start = _fixed(data, start, len(data), max_size)
+    chunks.extend(forced)
+    if start < len(data):
+        chunks.append(data[start:])
+    return chunks
+
+def compress(chunk: bytes, level: int = 3) -> Tuple[str, bytes]:
+    """``(codec, compressed bytes)`` for ``chunk``"""
+    if zstandard is not None:
+        return ZSTD, zstandard.ZstdCompressor(level=level).compress(chunk)
+    return ZLIB, zlib.compress(chunk, level)
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed chunks")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == ZLIB:
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown chunk codec: {codec}")
@@ -0,0 +1,147 @@
+"""Structured diffs between two versions of a draft, for display.
+
+Unlike :mod:`backend.utils.versioning`, which stores the smallest delta that
+rebuilds a version, a display diff lists every changed field by dotted path
+and, for text, the word-level edits with the unchanged words around them.
+Versions never change once written, so a diff is cached under the pair of
+version ids for as long as the LRU keeps it.
+"""
+from difflib import SequenceMatcher
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from backend.utils.lru import LRUCache
+from backend.utils.versioning import TOKEN
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+EQUAL, DELETE, INSERT = "=", "-", "+"
+WORD_DIFF_MIN_LENGTH = 32
+
+WordDiff = List[Tuple[str, str]]  # (op, text) with op one of "=", "-", "+"
+
+def _append(ops: WordDiff, op: str, text: str) -> None:
+    if not text:
+        return
+    if ops and ops[-1][0] == op:
+        ops[-1] = (op, ops[-1][1] + text)
+    else:
+        ops.append((op, text))
+
+def word_diff(old: str, new: str) -> WordDiff:
+    """Word-level edits turning ``old`` into ``new``.
+
+    The common prefix and suffix are matched first, so the quadratic part
+    of the matcher only sees the edited region in between.
+    """
+    old_tokens, new_tokens = TOKEN.findall(old), TOKEN.findall(new)
+    prefix = 0
+    limit = min(len(old_tokens), len(new_tokens))
+    while prefix < limit and old_tokens[prefix] == new_tokens[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < limit - prefix
+        and old_tokens[len(old_tokens) - 1 - suffix] == new_tokens[len(new_tokens) - 1 - suffix]
+    ):
+        suffix += 1
+    old_middle = old_tokens[prefix:len(old_tokens) - suffix]
+    new_middle = new_tokens[prefix:len(new_tokens) - suffix]
+
+    ops: WordDiff = []
+    _append(ops, EQUAL, "".join(old_tokens[:prefix]))
+    matcher = SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            _append(ops, EQUAL, "".join(old_middle[i1:i2]))
+            continue
+        _append(ops, DELETE, "".join(old_middle[i1:i2]))
+        _append(ops, INSERT, "".join(new_middle[j1:j2]))
+    _append(ops, EQUAL, "".join(old_tokens[len(old_tokens) - suffix:]))
+    return ops
+
+def _path(parent: str, key: Any) -> str:
+    return f"{parent}.{key}" if parent else str(key)
+
+def _change(kind: str, path: str, old: Any = None, new: Any = None) -> Dict[str, Any]:
+    return {"path": path, "change": kind, "old": old, "new": new, "words": None}
+
+def _list_changes(old: List, new: List, path: str, changes: List[Dict[str, Any]]) -> None:
+    matcher = SequenceMatcher(None, [repr(item) for item in old], [repr(item) for item in new], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for offset in range(paired):
+            _value_changes(old[i1 + offset], new[j1 + offset], _path(path, j1 + offset), changes)
+        for index in range(i1 + paired, i2):
+            changes.append(_change(REMOVED, _path(path, index), old=old[index]))
+        for index in range(j1 + paired, j2):
+            changes.append(_change(ADDED, _path(path, index), new=new[index]))
+
+def _value_changes(old: Any, new: Any, path: str, changes: List[Dict[str, Any]]) -> None:
+    if old == new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            if key in old:
+                _value_changes(old[key], value, _path(path, key), changes)
+            else:
+                changes.append(_change(ADDED, _path(path, key), new=value))
+        for key, value in old.items():
+            if key not in new:
+                changes.append(_change(REMOVED, _path(path, key), old=value))
+    elif isinstance(old, list) and isinstance(new, list):
+        _list_changes(old, new, path, changes)
+    elif (
+        isinstance(old, str) and isinstance(new, str)
+        and max(len(old), len(new)) >= WORD_DIFF_MIN_LENGTH
+    ):
+        change = _change(CHANGED, path)
+        change["words"] = word_diff(old, new)
+        changes.append(change)
+    else:
+        changes.append(_change(CHANGED, path, old=old, new=new))
+
+def diff_contents(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Changed fields between two version contents, by dotted path.
+
+    Long strings carry a word diff in ``words`` instead of ``old``/``new``.
+    List items are matched by value, so an inserted item does not show every
+    item after it as changed.
+    """
+    changes: List[Dict[str, Any]] = []
+    _value_changes(old, new, "", changes)
+    return changes
+
+class VersionDiffer:
+    """Display diffs memoized by ``(old version id, new version id)``.
+
+    Callers check :meth:`cached` first, so that version contents only need
+    to be rebuilt on a miss, and then :meth:`compute` the diff.
+    """
+
+    def __init__(self, cache_size: int):
+        self._cache = LRUCache(cache_size)
+        self.computed = 0
+
+    def cached(self, old_id: Hashable, new_id: Hashable) -> Optional[List[Dict[str, Any]]]:
+        return self._cache.get((old_id, new_id))
+
+    def compute(
+        self,
+        old_id: Hashable,
+        new_id: Hashable,
+        old: Dict[str, Any],
+        new: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        changes = diff_contents(old, new)
+        self.computed += 1
+        self._cache.set((old_id, new_id), changes)
+        return changes
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict:
+        return dict(self._cache.stats(), computed=self.computed)
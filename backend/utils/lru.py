@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class LRUCache:
+    """Least-recently-used mapping bounded by number of entries.
+
+    With a ``weigher``, ``max_size`` bounds the total weight of the values
+    instead (bytes, say), and a value heavier than the whole cache is not
+    kept. ``on_evict`` is called with every entry pushed out to make room,
+    so owners can release what the value refers to.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        weigher: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None
+    ):
+        self.max_size = max_size
+        self.weigher = weigher
+        self.on_evict = on_evict
+        self.weight = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _weigh(self, value: Any) -> int:
+        return 1 if self.weigher is None else self.weigher(value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.pop(key)
+        weight = self._weigh(value)
+        if weight > self.max_size:
+            if self.on_evict is not None:
+                self.on_evict(key, value)
+            return
+        self._data[key] = value
+        self.weight += weight
+        while self.weight > self.max_size:
+            evicted_key, evicted = self._data.popitem(last=False)
+            self.weight -= self._weigh(evicted)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        value = self._data.pop(key)
+        self.weight -= self._weigh(value)
+        return value
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.weight = 0
+
+    def keys(self):
+        return list(self._data.keys())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        stats = {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+        if self.weigher is not None:
+            stats["weight"] = self.weight
+        return stats
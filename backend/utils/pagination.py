@@ -0,0 +1,88 @@
+"""Keyset (cursor) pagination on ``(created_at, id)``, newest first.
+
+A page is read with ``WHERE (created_at, id) < (:created_at, :id) ORDER BY
+created_at DESC, id DESC LIMIT :n``. With an index ending in ``(created_at,
+id)`` the database seeks straight to the cursor, so every page costs the
+same as the first, whereas ``OFFSET`` reads and discards all earlier rows.
+The cursor is opaque to clients: the last row's key, base64-encoded.
+
+Rows that carry their own sequence number, such as the versions of a draft,
+are paged on it instead (:func:`fetch_sequence_page`): timestamps written in
+one transaction are equal, so they cannot order such rows.
+"""
+import base64
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Key encoded in ``cursor``; raises ValueError for a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def encode_sequence_cursor(sequence: int) -> str:
+    return base64.urlsafe_b64encode(str(sequence).encode()).decode().rstrip("=")
+
+def decode_sequence_cursor(cursor: str) -> int:
+    """Sequence number encoded in ``cursor``; raises ValueError for a malformed cursor"""
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def keyset(stmt: Select, created_at_column, id_column, cursor: Optional[str], limit: int) -> Select:
+    """``stmt`` restricted to the page after ``cursor``, with one extra row to detect a next page"""
+    if cursor is not None:
+        created_at, id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(created_at_column, id_column) < tuple_(created_at, id))
+    return stmt.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1)
+
+async def fetch_page(
+    db: AsyncSession,
+    stmt: Select,
+    created_at_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int
+) -> Dict[str, Any]:
+    """``{"items": [...], "next_cursor": ...}`` for the page after ``cursor``.
+
+    ``stmt`` should select only the columns the listing shows, including
+    ``created_at`` and ``id``.
+    """
+    result = await db.execute(keyset(stmt, created_at_column, id_column, cursor, limit))
+    rows = result.all()
+    items: List[Dict[str, Any]] = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+async def fetch_sequence_page(
+    db: AsyncSession,
+    stmt: Select,
+    sequence_column,
+    cursor: Optional[str],
+    limit: int
+) -> Dict[str, Any]:
+    """:func:`fetch_page` keyed on a sequence number unique among the rows of ``stmt``, highest first"""
+    if cursor is not None:
+        stmt = stmt.where(sequence_column < decode_sequence_cursor(cursor))
+    result = await db.execute(stmt.order_by(sequence_column.desc()).limit(limit + 1))
+    rows = result.all()
+    items: List[Dict[str, Any]] = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_sequence_cursor(items[-1][sequence_column.key])
+    return {"items": items, "next_cursor": next_cursor}
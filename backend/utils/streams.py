@@ -0,0 +1,171 @@
+"""Helpers for moving large documents as bounded-size chunks"""
+import os
+import re
+import tempfile
+from typing import IO, Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+ByteChunks = Union[Iterable[bytes], AsyncIterable[bytes]]
+RunBlocking = Callable[..., Awaitable[Any]]
+
+TEMP_PREFIX = ".tmp-"  # Files being written by AtomicFile
+
+RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+def rechunk(pieces: Iterable[str], chunk_size: int) -> Iterator[str]:
+    """Coalesce many small string pieces into chunks of about ``chunk_size`` characters"""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+def encode_chunks(chunks: Iterable[str], encoding: str = "utf-8") -> Iterator[bytes]:
+    for chunk in chunks:
+        yield chunk.encode(encoding)
+
+def spool_chunks(chunks: Iterable[bytes], max_memory: int) -> IO[bytes]:
+    """Write chunks to a file that stays in memory up to ``max_memory`` bytes.
+
+    Larger documents spill to a temporary file on disk. The returned file is
+    rewound and seekable, which resumable upload clients need in order to
+    know the total size and to retry a chunk. The caller closes it.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        for chunk in chunks:
+            spooled.write(chunk)
+        spooled.seek(0)
+    except BaseException:
+        spooled.close()
+        raise
+    return spooled
+
+async def aiter_chunks(chunks: ByteChunks) -> AsyncIterator[bytes]:
+    """Iterate sync or async byte chunks alike"""
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            yield chunk
+    else:
+        for chunk in chunks:
+            yield chunk
+
+async def aspool_chunks(chunks: ByteChunks, max_memory: int) -> IO[bytes]:
+    """:func:`spool_chunks` for chunks that may arrive asynchronously"""
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        async for chunk in aiter_chunks(chunks):
+            spooled.write(chunk)
+        spooled.seek(0)
+    except BaseException:
+        spooled.close()
+        raise
+    return spooled
+
+class AtomicFile:
+    """A file written under a temporary name beside ``path`` and renamed into place.
+
+    The contents are fsynced before the rename, so readers see either no file
+    or the complete file, even after a crash. Every method blocks.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, prefix=TEMP_PREFIX)
+        self.path = path
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+
+    def sync(self) -> int:
+        """Flush the contents to disk and close the file; returns its size"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        size = self.file.tell()
+        self.file.close()
+        return size
+
+    def install(self) -> None:
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self) -> None:
+        self.file.close()
+        try:
+            os.unlink(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+def write_atomic(path: str, data: bytes) -> None:
+    atomic = AtomicFile(path)
+    try:
+        atomic.write(data)
+        atomic.sync()
+        atomic.install()
+    except BaseException:
+        atomic.discard()
+        raise
+
+def fsync_directory(directory: str) -> None:
+    """Make renames into ``directory`` durable"""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+async def write_atomic_chunks(
+    path: str,
+    chunks: ByteChunks,
+    run_blocking: RunBlocking,
+    before_install: Optional[Callable[[], None]] = None
+) -> int:
+    """Write chunks to ``path`` through an :class:`AtomicFile`, off the event loop; returns the size.
+
+    ``before_install`` runs once the contents are on disk, just before the
+    rename makes them visible.
+    """
+    atomic = await run_blocking(AtomicFile, path)
+    try:
+        async for chunk in aiter_chunks(chunks):
+            await run_blocking(atomic.write, chunk)
+        size = await run_blocking(atomic.sync)
+        if before_install is not None:
+            await run_blocking(before_install)
+        await run_blocking(atomic.install)
+    except BaseException:
+        atomic.discard()
+        raise
+    return size
+
+def read_chunks(file: IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive ``(start, end)`` of a single-range ``Range`` header.
+
+    Returns None when there is no usable header (serve the whole file) and
+    raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return start, end
@@ -0,0 +1,144 @@
+"""Delta encoding for draft versions.
+
+Every ``interval``-th version of a draft is stored as a full snapshot; the
+versions in between store only a delta against the version before them.
+Any version is rebuilt by applying the deltas after the nearest earlier
+snapshot, so reconstruction touches at most ``interval`` rows.
+
+Deltas are JSON. A dict delta looks like::
+
+    {"set": {"title": "MSA"}, "unset": ["draft_note"], "patch": {"clauses": {...}}}
+
+where ``patch`` holds nested dict deltas, or text deltas for long strings.
+A text delta is a list of word-level operations: a positive int copies
+that many tokens of the old text, a negative int skips that many, and a
+string is inserted as is.
+"""
+import json
+import re
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+TOKEN = re.compile(r"\S+|\s+")
+TEXT_DELTA_MIN_LENGTH = 64
+
+TextDelta = List[Union[int, str]]
+
+def text_diff(old: str, new: str) -> TextDelta:
+    old_tokens, new_tokens = TOKEN.findall(old), TOKEN.findall(new)
+    ops: TextDelta = []
+    matcher = SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(new_tokens[j1:j2]))
+    return ops
+
+def apply_text(old: str, ops: TextDelta) -> str:
+    tokens = TOKEN.findall(old)
+    out, position = [], 0
+    for op in ops:
+        if isinstance(op, str):
+            out.append(op)
+        elif op > 0:
+            out.extend(tokens[position:position + op])
+            position += op
+        else:
+            position -= op
+    return "".join(out)
+
+def diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Delta that turns ``old`` into ``new``; empty when they are equal"""
+    delta: Dict[str, Any] = {}
+    changed, patched = {}, {}
+    for key, value in new.items():
+        if key not in old:
+            changed[key] = value
+            continue
+        previous = old[key]
+        if previous == value:
+            continue
+        if isinstance(previous, dict) and isinstance(value, dict):
+            patched[key] = diff(previous, value)
+        elif (
+            isinstance(previous, str) and isinstance(value, str)
+            and min(len(previous), len(value)) >= TEXT_DELTA_MIN_LENGTH
+        ):
+            patched[key] = text_diff(previous, value)
+        else:
+            changed[key] = value
+    removed = [key for key in old if key not in new]
+    if changed:
+        delta["set"] = changed
+    if removed:
+        delta["unset"] = removed
+    if patched:
+        delta["patch"] = patched
+    return delta
+
+def apply(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """``base`` with ``delta`` applied; ``base`` itself is not modified"""
+    result = dict(base)
+    for key in delta.get("unset", ()):
+        result.pop(key, None)
+    result.update(delta.get("set", {}))
+    for key, sub_delta in delta.get("patch", {}).items():
+        if isinstance(sub_delta, list):
+            result[key] = apply_text(result[key], sub_delta)
+        else:
+            result[key] = apply(result[key], sub_delta)
+    return result
+
+def encoded_size(payload: Any) -> int:
+    return len(json.dumps(payload, separators=(",", ":")))
+
+def encode(
+    previous: Optional[Dict[str, Any]],
+    content: Dict[str, Any],
+    sequence: int,
+    interval: int
+) -> Tuple[str, Dict[str, Any]]:
+    """``(kind, payload)`` to store for version ``sequence`` of a draft.
+
+    A snapshot is written for the first version, every ``interval``
+    versions, and whenever the delta would not be smaller than half the
+    full content (e.g. a rewritten draft).
+    """
+    if previous is None or sequence % interval == 0:
+        return SNAPSHOT, content
+    delta = diff(previous, content)
+    if encoded_size(delta) * 2 >= encoded_size(content):
+        return SNAPSHOT, content
+    return DELTA, delta
+
+def replay(chain: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """Content after each entry of ``chain``, which must start at a snapshot"""
+    content: Optional[Dict[str, Any]] = None
+    for kind, payload in chain:
+        if kind == SNAPSHOT:
+            content = payload
+        elif content is None:
+            raise ValueError("Version chain does not start with a snapshot")
+        else:
+            content = apply(content, payload)
+        yield content
+
+def reconstruct(chain: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Content of the last entry of ``chain``.
+
+    ``chain`` is ``(kind, payload)`` pairs in sequence order, starting at a
+    snapshot.
+    """
+    content: Optional[Dict[str, Any]] = None
+    for content in replay(chain):
+        pass
+    if content is None:
+        raise ValueError("Empty version chain")
+    return content
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The ai-service is deployed with its own root (see ai-service/Dockerfile),
+# so its packages are imported as top-level ``service``/``model_serving``.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "ai-service"))
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from service.batching import MicroBatcher
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_a_batch():
+    batch_sizes = []
+
+    async def run_batch(texts):
+        batch_sizes.append(len(texts))
+        return [[{"context": text}] for text in texts]
+
+    batcher = MicroBatcher(run_batch, max_batch_size=8, max_wait_ms=20)
+    await batcher.start()
+    results = await asyncio.gather(*[batcher.submit(str(i)) for i in range(20)])
+    await batcher.stop()
+
+    assert [r[0]["context"] for r in results] == [str(i) for i in range(20)]
+    assert batch_sizes == [8, 8, 4]
+    assert batcher.stats()["items"] == 20
+
+@pytest.mark.asyncio
+async def test_batch_failure_propagates_to_every_caller():
+    async def run_batch(texts):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=1)
+    await batcher.start()
+    results = await asyncio.gather(
+        batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+    )
+    await batcher.stop()
+
+    assert all(isinstance(r, ValueError) for r in results)
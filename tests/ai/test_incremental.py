@@ -0,0 +1,56 @@
+import pytest
+from service.cache import SuggestionCache
+from service.incremental import IncrementalSuggestionStore, RevisionConflict
+from service.pipeline import SuggestionPipeline
+
+class RecordingBatcher:
+    def __init__(self):
+        self.seen = []
+
+    async def submit_many(self, texts):
+        self.seen.extend(texts)
+        return [[{"issue_type": "Clarity", "start": 0, "end": len(t)}] for t in texts]
+
+@pytest.fixture
+def batcher():
+    return RecordingBatcher()
+
+@pytest.fixture
+def store(batcher):
+    return IncrementalSuggestionStore(SuggestionPipeline(batcher, SuggestionCache("v1")))
+
+@pytest.mark.asyncio
+async def test_edits_rescore_only_touched_paragraphs(store, batcher):
+    revision, _ = await store.sync("doc-1", "Alpha.\n\nBeta.")
+    revision, suggestions = await store.apply("doc-1", revision, [
+        {"op": "replace", "index": 1, "text": "Beta, amended."},
+        {"op": "insert", "index": 2, "text": "Gamma."},
+        {"op": "replace", "index": 0, "text": "Alpha."},
+    ])
+
+    assert batcher.seen == ["Alpha.", "Beta.", "Beta, amended.", "Gamma."]
+    assert revision == 2
+    assert [(s["paragraph"], s["start"]) for s in suggestions] == [(0, 0), (1, 8), (2, 24)]
+
+@pytest.mark.asyncio
+async def test_stale_base_revision_is_rejected(store):
+    revision, _ = await store.sync("doc-1", "Alpha.")
+    await store.apply("doc-1", revision, [{"op": "delete", "index": 0}])
+    with pytest.raises(RevisionConflict):
+        await store.apply("doc-1", revision, [{"op": "insert", "index": 0, "text": "x"}])
+
+@pytest.mark.asyncio
+async def test_whitespace_only_replace_keeps_findings_on_the_new_text(store, batcher):
+    revision, _ = await store.sync("doc-1", "Alpha.\n\nBeta  clause.")
+    revision, suggestions = await store.apply("doc-1", revision, [
+        {"op": "replace", "index": 1, "text": "Beta\n   clause."},
+    ])
+
+    assert batcher.seen == ["Alpha.", "Beta  clause."]
+    assert store.stats()["paragraphs_rescored"] == 2
+    [_, beta] = suggestions
+    assert "Alpha.\n\nBeta\n   clause."[beta["start"]:beta["end"]] == "Beta\n   clause."
+
+    # An inserted paragraph the cache already knows never reaches the model
+    await store.apply("doc-1", revision, [{"op": "insert", "index": 2, "text": "Alpha."}])
+    assert store.stats()["paragraphs_rescored"] == 2
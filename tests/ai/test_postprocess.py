@@ -0,0 +1,45 @@
+import numpy as np
+from service.postprocess import decode
+
+def one_hot_logits(classes):
+    """Logits whose argmax per label is the given class, with high margin"""
+    logits = np.zeros((len(classes), len(classes[0]), 3), dtype=np.float32)
+    for window, labels in enumerate(classes):
+        for label, cls in enumerate(labels):
+            logits[window, label, cls] = 10.0
+    return logits
+
+def test_overlapping_windows_merge_into_one_span():
+    logits = one_hot_logits([[1, 0], [1, 0], [0, 2]])
+    arrays = decode(
+        logits,
+        text_index=np.array([0, 0, 1]),
+        starts=np.array([0, 80, 0]),
+        ends=np.array([100, 180, 50])
+    )
+
+    assert arrays.text_index.tolist() == [0, 1]
+    assert arrays.label.tolist() == [0, 1]
+    assert arrays.start.tolist() == [0, 0]
+    assert arrays.end.tolist() == [180, 50]
+    assert np.all(arrays.confidence > 0.99)
+
+def test_disjoint_windows_stay_separate():
+    arrays = decode(
+        one_hot_logits([[1], [1]]),
+        text_index=np.array([0, 0]),
+        starts=np.array([0, 200]),
+        ends=np.array([100, 300])
+    )
+    assert arrays.start.tolist() == [0, 200]
+
+def test_thresholds_and_top_k():
+    logits = one_hot_logits([[1, 1, 1]])
+    logits[0, 1] = [0.0, 0.3, 0.0]  # weak issue for label 1
+    logits[0, 2, 1] = 5.0           # label 2 less confident than label 0
+
+    kept = decode(logits, np.array([0]), np.array([0]), np.array([10]), thresholds=[0.5, 0.5, 0.5])
+    assert kept.label.tolist() == [0, 2]
+
+    top1 = decode(logits, np.array([0]), np.array([0]), np.array([10]), top_k=1)
+    assert top1.label.tolist() == [0]
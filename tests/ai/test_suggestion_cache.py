@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+from service.cache import SuggestionCache
+from service.pipeline import SuggestionPipeline, split_paragraphs
+
+SUGGESTION = {"issue_type": "Clarity", "confidence": 0.9, "start": 0, "end": 4}
+
+def test_key_ignores_whitespace_but_not_model_version():
+    cache = SuggestionCache("v1")
+    assert cache.key("Term  of\nAgreement") == cache.key("Term of Agreement")
+    assert cache.key("Term of Agreement") != SuggestionCache("v2").key("Term of Agreement")
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_counters():
+    cache = SuggestionCache("v1", max_entries=2)
+    await cache.put("Alpha", [SUGGESTION])
+    await cache.put("Beta", [])
+    assert await cache.get("Alpha") == [SUGGESTION]
+    await cache.put("Gamma", [])
+
+    assert await cache.get("Beta") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_dropped():
+    cache = SuggestionCache("v1", ttl_seconds=-1)
+    await cache.put("Alpha", [])
+    assert await cache.get("Alpha") is None
+    assert cache.stats()["expirations"] == 1
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_a_new_instance(tmp_path):
+    await SuggestionCache("v1", disk_path=str(tmp_path)).put("Alpha", [SUGGESTION])
+    restarted = SuggestionCache("v1", disk_path=str(tmp_path))
+    assert await restarted.get("Alpha") == [SUGGESTION]
+    assert restarted.stats()["disk_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_reflowed_text_gets_offsets_into_its_own_whitespace():
+    cache = SuggestionCache("v1")
+    original = "The Term of  Agreement is\nfive years."
+    suggestion = {**SUGGESTION, "start": 4, "end": 22, "context": original[4:22]}
+    await cache.put(original, [suggestion])
+
+    reflowed = "The   Term of Agreement\n  is five years."
+    [hit] = await cache.get(reflowed)
+    assert reflowed[hit["start"]:hit["end"]] == "Term of Agreement"
+    assert hit["context"] == "Term of Agreement"
+
+def test_split_paragraphs_keeps_offsets():
+    text = "First clause.\n\n  Second clause.\n"
+    paragraphs = split_paragraphs(text)
+    assert [p.text for p in paragraphs] == ["First clause.", "Second clause."]
+    assert all(text[p.offset:p.offset + len(p.text)] == p.text for p in paragraphs)
+
+class RecordingBatcher:
+    def __init__(self):
+        self.seen = []
+
+    async def submit_many(self, texts):
+        self.seen.extend(texts)
+        return [[dict(SUGGESTION)] for _ in texts]
+
+@pytest.mark.asyncio
+async def test_only_changed_paragraphs_are_inferred():
+    batcher = RecordingBatcher()
+    pipeline = SuggestionPipeline(batcher, SuggestionCache("v1"))
+
+    await pipeline.suggest("Alpha.\n\nBeta.\n\nAlpha.")
+    assert batcher.seen == ["Alpha.", "Beta."]
+
+    suggestions = await pipeline.suggest("Alpha.\n\nGamma.")
+    assert batcher.seen == ["Alpha.", "Beta.", "Gamma."]
+    assert [s["start"] for s in suggestions] == [0, 8]
+
+@pytest.mark.asyncio
+async def test_stream_yields_chunks_in_document_order():
+    batcher = RecordingBatcher()
+    pipeline = SuggestionPipeline(batcher, SuggestionCache("v1"))
+    content = "\n\n".join(f"Clause {i}." for i in range(5))
+
+    chunks = [chunk async for chunk in pipeline.stream(content, chunk_paragraphs=2)]
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    starts = [s["start"] for chunk in chunks for s in chunk]
+    assert starts == sorted(starts)
+
+@pytest.mark.asyncio
+async def test_closing_stream_stops_scoring_ahead():
+    batcher = RecordingBatcher()
+    pipeline = SuggestionPipeline(batcher, SuggestionCache("v1"))
+    content = "\n\n".join(f"Clause {i}." for i in range(40))
+
+    stream = pipeline.stream(content, chunk_paragraphs=1, max_pending=2)
+    await stream.__anext__()
+    await stream.aclose()
+
+    assert len(batcher.seen) < 40
+
+@pytest.mark.asyncio
+async def test_closing_stream_cancels_every_scoring_task():
+    class StallingBatcher:
+        started = cancelled = 0
+
+        async def submit_many(self, texts):
+            if texts == ["Clause 0."]:
+                return [[dict(SUGGESTION)]]
+            self.started += 1
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+
+    batcher = StallingBatcher()
+    pipeline = SuggestionPipeline(batcher, SuggestionCache("v1"))
+    content = "\n\n".join(f"Clause {i}." for i in range(10))
+
+    stream = pipeline.stream(content, chunk_paragraphs=1, max_pending=1)
+    await stream.__anext__()
+    for _ in range(5):
+        await asyncio.sleep(0)  # Let the producer fill the queue and start one more task
+    await stream.aclose()
+
+    assert batcher.started == 2
+    assert batcher.cancelled == batcher.started
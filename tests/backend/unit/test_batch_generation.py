@@ -0,0 +1,61 @@
+import uuid
+import pytest
+from sqlalchemy import func, select
+from backend.apps.documents import models
+from backend.apps.documents.batch import BatchRenderer, parse_csv_contexts
+from backend.apps.documents.services import DraftService
+
+def test_csv_rows_become_nested_contexts():
+    contexts = parse_csv_contexts("party.name,party.city,fee\nAcme,Leeds,100\nGlobex,York,200\n")
+    assert contexts == [
+        {"party": {"name": "Acme", "city": "Leeds"}, "fee": "100"},
+        {"party": {"name": "Globex", "city": "York"}, "fee": "200"}
+    ]
+
+@pytest.mark.asyncio
+async def test_renderer_yields_every_context_and_reports_failures(tmp_path):
+    (tmp_path / "nda.html").write_text("NDA with {{ party.name }} for {{ (fee | int) // 1 }}")
+    renderer = BatchRenderer(workers=0, chunk_size=3, templates_dir=str(tmp_path))
+    contexts = [{"party": {"name": f"P{i}"}, "fee": i} for i in range(7)] + [{"fee": None}]
+
+    results = {}
+    async for offset, chunk in renderer.render("nda.html", contexts):
+        for index, result in enumerate(chunk, start=offset):
+            results[index] = result
+    assert sorted(results) == list(range(8))
+    assert results[6] == (True, "NDA with P6 for 6")
+    assert results[7][0] is False and results[7][1].startswith("UndefinedError")
+
+async def _render_one(renderer, template_name):
+    [(_, [(ok, html)])] = [item async for item in renderer.render(template_name, [{}])]
+    return html
+
+@pytest.mark.asyncio
+async def test_renderers_keep_their_own_templates_and_see_invalidation(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    for directory in (first, second):
+        directory.mkdir()
+        (directory / "nda.html").write_text(directory.name)
+    renderer = BatchRenderer(workers=0, chunk_size=1, templates_dir=str(first), auto_reload=False)
+    other = BatchRenderer(workers=0, chunk_size=1, templates_dir=str(second), auto_reload=False)
+    assert await _render_one(renderer, "nda.html") == "first"
+    assert await _render_one(other, "nda.html") == "second"
+
+    (first / "nda.html").write_text("first, amended")
+    assert await _render_one(renderer, "nda.html") == "first"
+    renderer.invalidate("nda.html")
+    assert await _render_one(renderer, "nda.html") == "first, amended"
+
+@pytest.mark.asyncio
+async def test_bulk_create_drafts_inserts_drafts_and_versions(db_session):
+    user_id = uuid.uuid4()
+    ids = await DraftService.bulk_create_drafts(
+        db_session, "nda.html", user_id, [({"name": "A"}, "<p>A</p>"), ({"name": "B"}, "<p>B</p>")]
+    )
+    await db_session.commit()
+    assert len(ids) == 2
+    drafts = (await db_session.execute(select(models.Draft))).scalars().all()
+    assert {d.id for d in drafts} == set(ids)
+    assert all(d.status == "draft" for d in drafts)
+    versions = await db_session.scalar(select(func.count()).select_from(models.Version))
+    assert versions == 2
@@ -0,0 +1,59 @@
+import uuid
+import pytest
+from sqlalchemy import select
+from backend.apps.documents import models
+from backend.apps.documents.services import DraftService
+from backend.utils import blob_store
+
+CLAUSES = [
+    f"{n}. The Supplier shall perform obligation {n} with reasonable skill and care. "
+    f"Any failure to do so is a material breach under clause {n}.\n"
+    for n in range(60)
+]
+
+def _body(party: str) -> dict:
+    return {"fields": {"party": party}, "body": f"<h1>Agreement with {party}</h1>\n" + "".join(CLAUSES)}
+
+def test_split_is_lossless_and_bounded():
+    data = blob_store.serialize(_body("Acme"))
+    chunks = blob_store.split(data, 256, 2048)
+    assert b"".join(chunks) == data
+    assert all(len(chunk) <= 2048 for chunk in chunks)
+    assert all(len(chunk) >= 256 for chunk in chunks[:-1])
+
+def test_edit_only_changes_nearby_chunks():
+    old = blob_store.serialize(_body("Acme"))
+    new = blob_store.serialize(_body("Acme Holdings"))
+    old_chunks = set(blob_store.split(old, 256, 2048))
+    new_chunks = blob_store.split(new, 256, 2048)
+    assert sum(chunk not in old_chunks for chunk in new_chunks) <= 2
+
+def test_compression_round_trip():
+    chunk = "".join(CLAUSES).encode()
+    codec, data = blob_store.compress(chunk)
+    assert len(data) < len(chunk)
+    assert blob_store.decompress(codec, data) == chunk
+
+@pytest.mark.asyncio
+async def test_bodies_are_deduplicated_behind_draft_service(db_session):
+    ids = await DraftService.bulk_create_drafts(
+        db_session, "msa.html", uuid.uuid4(), [(_body(f"Party {n}")["fields"], _body(f"Party {n}")["body"]) for n in range(20)]
+    )
+    version = (await db_session.execute(select(models.Version).where(models.Version.draft_id == ids[3]))).scalar_one()
+    assert version.content is None and version.chunks
+    assert await DraftService.get_version_content(db_session, ids[3]) == _body("Party 3")
+
+    stats = await DraftService.storage_stats(db_session)
+    assert stats["dedupe_ratio"] > 2.5
+    assert stats["compressed_bytes"] < stats["stored_bytes"]
+
+    document = await DraftService.finalize_draft(db_session, ids[3], _body("Party 3"))
+    assert document.final_content is None
+    assert await DraftService.get_document_content(db_session, document) == _body("Party 3")
+
+@pytest.mark.asyncio
+async def test_small_bodies_stay_inline(db_session):
+    draft_id = uuid.uuid4()
+    version = await DraftService.save_version(db_session, draft_id, {"key": "value"})
+    assert version.content == {"key": "value"} and version.chunks is None
+    assert (await DraftService.storage_stats(db_session))["chunks"] == 0
@@ -0,0 +1,59 @@
+import os
+import pytest
+from backend.core.exceptions import StorageException
+from backend.storage.base_provider import StorageProviderFactory
+from backend.storage.local import LocalStorageProvider
+
+def _files(root):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), root)
+        for directory, _, names in os.walk(root)
+        for name in names
+    )
+
+@pytest.mark.asyncio
+async def test_local_round_trip_uses_sharded_layout(tmp_path):
+    provider = LocalStorageProvider(str(tmp_path))
+    file_id = await provider.save_stream("msa.html", [b"<p>", b"Agreement", b"</p>"])
+    assert await provider.get_file(file_id) == "<p>Agreement</p>"
+    assert (await provider.stat(file_id))[:4] == (file_id, "msa.html", 16, "text/html")
+    shard = os.path.join(file_id[:2], file_id[2:4], file_id)
+    assert _files(tmp_path) == [shard, shard + ".json"]
+    assert provider.local_path(file_id) == os.path.join(str(tmp_path), shard)
+    with pytest.raises(StorageException):
+        await provider.stat("0" * 32)
+    with pytest.raises(StorageException):
+        provider.local_path("../../etc/passwd")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mmap_threshold", [1, 1024])
+async def test_local_ranged_reads(tmp_path, monkeypatch, mmap_threshold):
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_DOWNLOAD_CHUNK_SIZE", 4)
+    provider = LocalStorageProvider(str(tmp_path), mmap_threshold=mmap_threshold)
+    file_id = await provider.save_file("exhibit.pdf", b"0123456789", "application/pdf")
+    assert [chunk async for chunk in provider.open_stream(file_id, 2, 8)] == [b"2345", b"678"]
+    assert b"".join([chunk async for chunk in provider.open_stream(file_id)]) == b"0123456789"
+    assert [chunk async for chunk in provider.open_stream(file_id, 12)] == []
+
+@pytest.mark.asyncio
+async def test_failed_write_leaves_nothing_behind(tmp_path):
+    provider = LocalStorageProvider(str(tmp_path))
+
+    async def upload():
+        yield b"partial"
+        raise ConnectionError("client went away")
+
+    with pytest.raises(ConnectionError):
+        await provider.save_stream("nda.html", upload())
+    assert _files(tmp_path) == []
+
+@pytest.mark.asyncio
+async def test_factory_builds_local_provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(StorageProviderFactory, "_providers", {})
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_PROVIDERS", "local")
+    monkeypatch.setattr("backend.core.config.settings.LOCAL_STORAGE_DIR", str(tmp_path))
+    StorageProviderFactory.initialize_providers()
+    provider = StorageProviderFactory.get("local")
+    assert isinstance(provider, LocalStorageProvider)
+    assert provider.root == str(tmp_path)
+    await StorageProviderFactory.close_providers()
@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime
+import pytest
+from sqlalchemy import insert
+from backend.apps.documents import models
+from backend.apps.documents.services import DraftService
+from backend.utils import pagination
+
+def test_cursor_round_trip():
+    created_at, id = datetime(2024, 5, 1, 9, 30, 0, 123456), uuid.uuid4()
+    assert pagination.decode_cursor(pagination.encode_cursor(created_at, id)) == (created_at, id)
+    with pytest.raises(ValueError):
+        pagination.decode_cursor("not-a-cursor")
+    assert pagination.decode_sequence_cursor(pagination.encode_sequence_cursor(42)) == 42
+    with pytest.raises(ValueError):
+        pagination.decode_sequence_cursor("not-a-cursor")
+
+@pytest.mark.asyncio
+async def test_pages_cover_every_row_once_newest_first(db_session):
+    draft_id = uuid.uuid4()
+    # Versions written in one transaction share a timestamp; their sequence orders them
+    rows = [
+        {"id": uuid.uuid4(), "draft_id": draft_id, "sequence": n, "kind": "snapshot",
+         "content": {"n": n}, "created_at": datetime(2024, 1, 1)}
+        for n in range(25)
+    ]
+    await db_session.execute(insert(models.Version), rows)
+
+    seen, cursor = [], None
+    while True:
+        page = await DraftService.list_versions(db_session, draft_id, cursor, 7)
+        assert all("content" not in item for item in page["items"])
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [item["sequence"] for item in seen] == list(range(24, -1, -1))
+
+@pytest.mark.asyncio
+async def test_listings_are_scoped_to_owner(db_session):
+    owner, other = uuid.uuid4(), uuid.uuid4()
+    await db_session.execute(insert(models.Draft), [
+        {"id": uuid.uuid4(), "template_id": "msa.html", "user_id": user, "status": "draft"}
+        for user in (owner, owner, other)
+    ])
+    page = await DraftService.list_drafts(db_session, owner, None, 10)
+    assert len(page["items"]) == 2 and page["next_cursor"] is None
+    assert set(page["items"][0]) == {"id", "template_id", "title", "status", "created_at", "updated_at"}
+    assert (await DraftService.list_documents(db_session, owner, None, 10))["items"] == []
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import pytest
+from backend.storage.base_provider import StorageProviderFactory
+from backend.storage.cached import CachedStorageProvider
+from backend.storage.memory import InMemoryStorageProvider
+from backend.utils.lru import LRUCache
+
+def test_lru_bounded_by_weight():
+    evicted = []
+    cache = LRUCache(10, weigher=len, on_evict=lambda key, value: evicted.append(key))
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")
+    cache.set("huge", b"x" * 11)
+    assert cache.keys() == ["a", "c"]
+    assert evicted == ["b", "huge"]
+    assert cache.stats()["weight"] == 8
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_share_one_fetch():
+    upstream = InMemoryStorageProvider(latency=0.01)
+    file_id = await upstream.save_file("msa.html", "<p>Agreement</p>")
+    provider = CachedStorageProvider(upstream)
+    contents = await asyncio.gather(*(provider.get_file(file_id) for _ in range(10)))
+    assert contents == ["<p>Agreement</p>"] * 10
+    assert await provider.get_file(file_id) == "<p>Agreement</p>"
+    stats = provider.stats()
+    assert stats["upstream_fetches"] == 1
+    assert stats["coalesced"] >= 9
+    assert stats["memory"]["hits"] >= 1
+
+@pytest.mark.asyncio
+async def test_changed_version_is_refetched(tmp_path):
+    upstream = InMemoryStorageProvider()
+    file_id = await upstream.save_file("msa.html", "v1")
+    provider = CachedStorageProvider(upstream, disk_dir=str(tmp_path), revalidate_seconds=0)
+    assert await provider.get_file(file_id) == "v1"
+    upstream.files[file_id] = b"v2"
+    upstream.info[file_id] = upstream.info[file_id]._replace(version="2")
+    assert await provider.get_file(file_id) == "v2"
+    assert provider.stats()["invalidations"] == 1
+    assert provider.stats()["upstream_fetches"] == 2
+    assert provider.stats()["disk"]["size"] == 1
+
+@pytest.mark.asyncio
+async def test_disk_tier_serves_large_files_and_survives_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_DOWNLOAD_CHUNK_SIZE", 4)
+    upstream = InMemoryStorageProvider()
+    file_id = await upstream.save_file("exhibit.pdf", b"0123456789", "application/pdf")
+    provider = CachedStorageProvider(upstream, memory_max_object=4, disk_dir=str(tmp_path))
+    assert [chunk async for chunk in provider.open_stream(file_id, 2, 8)] == [b"2345", b"678"]
+    assert len(provider.memory) == 0
+    await provider.close()
+
+    restarted = CachedStorageProvider(upstream, disk_dir=str(tmp_path))
+    assert await restarted.get_file(file_id) == "0123456789"
+    assert restarted.stats()["upstream_fetches"] == 0
+    assert restarted.stats()["disk"]["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_oversized_files_bypass_the_cache():
+    upstream = InMemoryStorageProvider()
+    file_id = await upstream.save_file("scan.pdf", b"x" * 100)
+    provider = CachedStorageProvider(upstream, memory_max_object=10)
+    assert len(await provider.get_file(file_id)) == 100
+    assert provider.stats()["bypassed"] == 1
+    assert provider.stats()["upstream_fetches"] == 0
+
+@pytest.mark.asyncio
+async def test_factory_wraps_cached_providers(tmp_path, monkeypatch):
+    monkeypatch.setattr(StorageProviderFactory, "_providers", {})
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_PROVIDERS", "memory")
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_CACHE_PROVIDERS", "memory")
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_CACHE_DIR", str(tmp_path))
+    StorageProviderFactory.initialize_providers()
+    provider = StorageProviderFactory.get("memory")
+    assert isinstance(provider, CachedStorageProvider)
+    assert isinstance(provider.upstream, InMemoryStorageProvider)
+    assert StorageProviderFactory.stats()["memory"]["upstream_fetches"] == 0
+    await StorageProviderFactory.close_providers()
+
+@pytest.mark.asyncio
+async def test_processes_sharing_a_disk_dir_keep_to_their_own_slot(tmp_path):
+    upstream = InMemoryStorageProvider()
+    file_id = await upstream.save_file("msa.html", "v1")
+    first = CachedStorageProvider(upstream, disk_dir=str(tmp_path))
+    await first.get_file(file_id)
+    interrupted = os.path.join(first.disk_dir, "ab", ".tmp-fill")
+    os.makedirs(os.path.dirname(interrupted), exist_ok=True)
+    open(interrupted, "wb").close()
+
+    second = CachedStorageProvider(upstream, disk_dir=str(tmp_path))
+    assert second.disk_dir != first.disk_dir
+    assert len(second.disk) == 0
+
+    await first.close()
+    adopted = CachedStorageProvider(upstream, disk_dir=str(tmp_path))
+    assert adopted.disk_dir == first.disk_dir
+    assert len(adopted.disk) == 1
+    assert os.path.exists(interrupted)  # Too recent to be an abandoned fill
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Optional
+import httpx
+import pytest
+from backend.core.exceptions import StorageException
+from backend.storage.base_provider import StorageProvider, StorageProviderFactory
+from backend.storage.memory import InMemoryStorageProvider
+from backend.storage.onedrive import OneDriveProvider
+
+@pytest.mark.asyncio
+async def test_memory_provider_round_trip():
+    provider = InMemoryStorageProvider()
+    file_id = await provider.save_file("msa.html", "<p>Agreement</p>")
+    streamed_id = await provider.save_stream("nda.html", [b"<p>", b"NDA", b"</p>"])
+    assert await provider.get_file(file_id) == "<p>Agreement</p>"
+    assert await provider.get_file(streamed_id) == "<p>NDA</p>"
+    with pytest.raises(StorageException):
+        await provider.get_file("missing")
+
+@pytest.mark.asyncio
+async def test_ranged_streams(monkeypatch):
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_DOWNLOAD_CHUNK_SIZE", 4)
+    provider = InMemoryStorageProvider()
+
+    async def upload():
+        for part in (b"0123", b"4567", b"89"):
+            yield part
+
+    file_id = await provider.save_stream("exhibit.pdf", upload(), "application/pdf")
+    assert (await provider.stat(file_id)).size == 10
+    assert [chunk async for chunk in provider.open_stream(file_id, 2, 8)] == [b"2345", b"678"]
+    assert b"".join([chunk async for chunk in provider.open_stream(file_id)]) == b"0123456789"
+
+@pytest.mark.asyncio
+async def test_blocking_calls_do_not_stall_the_event_loop():
+    provider = InMemoryStorageProvider(latency=0.05, blocking=True)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(provider.save_file(f"{n}.html", "x") for n in range(8)))
+    elapsed = time.perf_counter() - started
+    task.cancel()
+    assert elapsed < 0.05 * 8 / 2  # Calls overlap on the thread pool
+    assert ticks >= 5
+
+@pytest.mark.asyncio
+async def test_factory_registry(monkeypatch):
+    monkeypatch.setattr(StorageProviderFactory, "_providers", {})
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_PROVIDERS", "memory, unknown")
+    StorageProviderFactory.initialize_providers()
+    assert StorageProviderFactory.names() == ["memory"]
+    assert isinstance(StorageProviderFactory.get("memory"), StorageProvider)
+    with pytest.raises(StorageException):
+        StorageProviderFactory.get("google_drive")
+    await StorageProviderFactory.close_providers()
+    assert StorageProviderFactory.names() == []
+
+@pytest.mark.asyncio
+async def test_sync_chunks_are_spooled_off_the_event_loop():
+    provider = InMemoryStorageProvider()
+    loop_thread = threading.get_ident()
+    threads = set()
+
+    def render():
+        for part in (b"<p>", b"MSA", b"</p>"):
+            threads.add(threading.get_ident())
+            yield part
+
+    spooled = await provider.spool(render())
+    with spooled:
+        assert spooled.read() == b"<p>MSA</p>"
+    assert loop_thread not in threads
+
+class FakeGraph:
+    """Just enough of Microsoft Graph for OneDriveProvider, over httpx.MockTransport"""
+
+    def __init__(self, fail_chunk_at: Optional[int] = None):
+        self.files = {}
+        self.requests = []
+        self.token_requests = 0
+        self.received = b""
+        self.fail_chunk_at = fail_chunk_at
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+        if "oauth2" in path:
+            self.token_requests += 1
+            return httpx.Response(200, json={"access_token": f"token-{self.token_requests}", "expires_in": 3600})
+        if request.url.host == "upload.example":
+            return self._session_request(request)
+        if path.endswith("/createUploadSession"):
+            return httpx.Response(200, json={"uploadUrl": "https://upload.example/session"})
+        if path.endswith(":/content") and request.method == "PUT":
+            file_id = f"item-{len(self.files)}"
+            self.files[file_id] = request.content
+            return httpx.Response(201, json={"id": file_id})
+        file_id = path.split("/items/")[1].split("/")[0]
+        data = self.files[file_id]
+        if path.endswith("/content"):
+            header = request.headers.get("Range")
+            if header is None:
+                return httpx.Response(200, content=data)
+            first, last = header[len("bytes="):].split("-")
+            return httpx.Response(206, content=data[int(first):int(last) + 1 if last else None])
+        return httpx.Response(200, json={"id": file_id, "name": "msa.pdf", "size": len(data), "eTag": '"1"'})
+
+    def _session_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            return httpx.Response(200, json={"nextExpectedRanges": [f"{len(self.received)}-"]})
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        first, rest = request.headers["Content-Range"][len("bytes "):].split("-")
+        total = int(rest.split("/")[1])
+        assert int(first) == len(self.received)
+        if self.fail_chunk_at == int(first):
+            # Graph kept part of the chunk before the connection failed
+            self.fail_chunk_at = None
+            self.received += request.content[:1000]
+            return httpx.Response(503)
+        self.received += request.content
+        if len(self.received) < total:
+            return httpx.Response(202, json={})
+        file_id = f"item-{len(self.files)}"
+        self.files[file_id] = self.received
+        return httpx.Response(201, json={"id": file_id})
+
+def onedrive(graph: FakeGraph) -> OneDriveProvider:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(graph.handle))
+    return OneDriveProvider("client", "secret", "tenant", "drive", client=client)
+
+@pytest.mark.asyncio
+async def test_onedrive_simple_upload_reuses_the_token():
+    graph = FakeGraph()
+    provider = onedrive(graph)
+    file_id = await provider.save_file("msa.html", "<p>Agreement</p>")
+    assert await provider.get_file(file_id) == "<p>Agreement</p>"
+    assert (await provider.stat(file_id)).version == '"1"'
+
+    upload = graph.requests[1]
+    assert upload.url.params["@microsoft.graph.conflictBehavior"] == "replace"
+    assert graph.token_requests == 1
+    assert {r.headers.get("Authorization") for r in graph.requests[1:]} == {"Bearer token-1"}
+
+    provider._token_expires = 0.0
+    await provider.stat(file_id)
+    assert graph.token_requests == 2
+    await provider.close()
+
+@pytest.mark.asyncio
+async def test_onedrive_upload_session_resumes_from_next_expected_range(monkeypatch):
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_UPLOAD_CHUNK_SIZE", 1024 * 1024)
+    sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda delay: sleep(0))
+    chunk = 3 * 320 * 1024  # Upload chunk size rounded down to Graph's 320 KiB multiple
+    graph = FakeGraph(fail_chunk_at=2 * chunk)
+    provider = onedrive(graph)
+    payload = bytes(range(256)) * (5 * 1024 * 1024 // 256 + 7)
+
+    file_id = await provider.save_stream(
+        "exhibit.pdf", [payload[i:i + 100000] for i in range(0, len(payload), 100000)], "application/pdf"
+    )
+
+    assert graph.files[file_id] == payload
+    create = next(r for r in graph.requests if r.url.path.endswith("/createUploadSession"))
+    assert json.loads(create.content)["item"]["@microsoft.graph.conflictBehavior"] == "replace"
+    starts = [
+        int(r.headers["Content-Range"].split()[1].split("-")[0])
+        for r in graph.requests if r.url.host == "upload.example" and r.method == "PUT"
+    ]
+    assert starts == [0, chunk, 2 * chunk, 2 * chunk + 1000, 3 * chunk + 1000, 4 * chunk + 1000, 5 * chunk + 1000]
+    assert all("Authorization" not in r.headers for r in graph.requests if r.url.host == "upload.example")
+
+    assert b"".join([c async for c in provider.open_stream(file_id, 10, 20)]) == payload[10:21]
+    assert b"".join([c async for c in provider.open_stream(file_id, len(payload) - 5)]) == payload[-5:]
+    await provider.close()
@@ -0,0 +1,51 @@
+import pytest
+from backend.utils.streams import aspool_chunks, parse_range, rechunk, spool_chunks, write_atomic_chunks
+
+def test_rechunk_coalesces_small_pieces():
+    assert list(rechunk(["ab", "cd", "e", "fgh", "i"], 4)) == ["abcd", "efgh", "i"]
+
+def test_spool_chunks_spills_to_disk_past_max_memory():
+    spooled = spool_chunks((b"x" * 1000 for _ in range(10)), max_memory=4096)
+    try:
+        assert spooled._rolled
+        assert spooled.read() == b"x" * 10000
+    finally:
+        spooled.close()
+
+@pytest.mark.asyncio
+async def test_aspool_chunks_accepts_async_iterables():
+    async def chunks():
+        for _ in range(3):
+            yield b"abc"
+    spooled = await aspool_chunks(chunks(), max_memory=4)
+    try:
+        assert spooled.read() == b"abcabcabc"
+    finally:
+        spooled.close()
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=10-19", 100) == (10, 19)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-5", 100) == (95, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("items=0-1", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+async def _run(func, *args):
+    return func(*args)
+
+@pytest.mark.asyncio
+async def test_atomic_writes_appear_whole_or_not_at_all(tmp_path):
+    path = str(tmp_path / "ab" / "doc")
+    assert await write_atomic_chunks(path, [b"<p>", b"MSA</p>"], _run) == 10
+    assert open(path, "rb").read() == b"<p>MSA</p>"
+
+    def interrupted():
+        yield b"partial"
+        raise ConnectionError("upstream went away")
+
+    with pytest.raises(ConnectionError):
+        await write_atomic_chunks(str(tmp_path / "ab" / "other"), interrupted(), _run)
+    assert sorted(p.name for p in (tmp_path / "ab").iterdir()) == ["doc"]
@@ -0,0 +1,48 @@
+from jinja2 import Environment
+from backend.apps.templates.fields import extract_fields
+from backend.apps.templates.loader import TemplateLoader
+
+def fields_of(source: str) -> dict:
+    root = extract_fields(Environment(), source)
+    return {field.path: field.to_dict() for field in root.children.values()}
+
+def test_nested_and_loop_fields():
+    fields = fields_of(
+        "{% for party in parties %}{{ party.name }}{{ party.address.city }}{% endfor %}"
+        "{% if term_months > 12 %}{{ notice_days | default(30) }}{% endif %}"
+    )
+    assert fields["parties"]["type"] == "list"
+    assert [c["path"] for c in fields["parties"]["children"]] == ["parties.name", "parties.address"]
+    assert fields["parties"]["children"][1]["type"] == "object"
+    assert fields["term_months"]["type"] == "number"
+    assert fields["notice_days"]["required"] is False
+
+def test_locals_and_globals_are_not_fields():
+    fields = fields_of(
+        "{% set total = fee * 2 %}{{ total }}"
+        "{% for i in range(3) %}{{ loop.index }}{{ i }}{% endfor %}"
+        "{% macro clause(text) %}{{ text }}{% endmacro %}{{ clause(body) }}"
+    )
+    assert set(fields) == {"fee", "body"}
+
+def test_index_parses_once_per_version_and_follows_includes(tmp_path):
+    (tmp_path / "header.html").write_text("{{ company.name }}")
+    (tmp_path / "nda.html").write_text("{% include 'header.html' %}{{ counterparty }}")
+    loader = TemplateLoader(templates_dir=str(tmp_path), auto_reload=False)
+
+    assert [f["path"] for f in loader.get_fields("nda.html")] == ["counterparty", "company"]
+    loader.get_fields("nda.html")
+    assert loader.fields.parses == 2
+
+    (tmp_path / "nda.html").write_text("{{ effective_date }}")
+    loader.invalidate("nda.html")
+    assert [f["path"] for f in loader.get_fields("nda.html")] == ["effective_date"]
+    assert loader.fields.parses == 3
+
+def test_broken_templates_are_skipped_when_indexing(tmp_path):
+    (tmp_path / "nda.html").write_text("{{ counterparty }}")
+    (tmp_path / "broken.html").write_text("{% if unterminated %}")
+    loader = TemplateLoader(templates_dir=str(tmp_path), auto_reload=False)
+
+    assert loader.fields.build() == 1
+    assert [summary["name"] for summary in loader.fields.list()] == ["nda.html"]
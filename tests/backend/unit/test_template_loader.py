@@ -0,0 +1,87 @@
+import os
+from backend.apps.templates.loader import TemplateLoader
+
+def make_loader(tmp_path, **kwargs):
+    (tmp_path / "nda.html").write_text("Hello {{ name }}")
+    return TemplateLoader(templates_dir=str(tmp_path), **kwargs)
+
+def test_compiled_templates_are_cached(tmp_path):
+    loader = make_loader(tmp_path, auto_reload=False)
+    assert loader.render_template("nda.html", {"name": "Acme"}) == "Hello Acme"
+    assert loader.get_template("nda.html") is loader.get_template("nda.html")
+    assert loader.cache_stats()["hits"] == 2
+
+def test_invalidate_picks_up_changed_source(tmp_path):
+    loader = make_loader(tmp_path, auto_reload=False)
+    loader.render_template("nda.html", {"name": "Acme"})
+    (tmp_path / "nda.html").write_text("Dear {{ name }}")
+    assert loader.render_template("nda.html", {"name": "Acme"}) == "Hello Acme"
+    loader.invalidate("nda.html")
+    assert loader.render_template("nda.html", {"name": "Acme"}) == "Dear Acme"
+
+def test_auto_reload_and_reload_changed(tmp_path):
+    loader = make_loader(tmp_path, auto_reload=True)
+    loader.render_template("nda.html", {"name": "Acme"})
+    path = tmp_path / "nda.html"
+    path.write_text("Dear {{ name }}")
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 5))
+    assert loader.reload_changed() == ["nda.html"]
+    assert loader.render_template("nda.html", {"name": "Acme"}) == "Dear Acme"
+
+def test_bytecode_cache_is_shared_between_loaders(tmp_path):
+    bytecode_dir = tmp_path / "bytecode"
+    make_loader(tmp_path, bytecode_cache_dir=str(bytecode_dir)).render_template("nda.html", {"name": "A"})
+    assert any(bytecode_dir.iterdir())
+    fresh = TemplateLoader(templates_dir=str(tmp_path), bytecode_cache_dir=str(bytecode_dir))
+    assert fresh.render_template("nda.html", {"name": "B"}) == "Hello B"
+
+def test_stream_template_yields_bounded_chunks(tmp_path):
+    (tmp_path / "schedule.html").write_text("{% for row in rows %}<tr>{{ row }}</tr>{% endfor %}")
+    loader = TemplateLoader(templates_dir=str(tmp_path))
+    context = {"rows": range(1000)}
+    chunks = list(loader.stream_template("schedule.html", context, chunk_size=256))
+    assert len(chunks) > 1
+    assert max(len(chunk) for chunk in chunks[:-1]) < 256 + 20
+    assert "".join(chunks) == loader.render_template("schedule.html", context)
+
+def test_included_templates_are_compiled_once(tmp_path, monkeypatch):
+    (tmp_path / "clause.html").write_text("Clause for {{ name }}")
+    (tmp_path / "msa.html").write_text("MSA: {% include 'clause.html' %}")
+    loader = TemplateLoader(templates_dir=str(tmp_path), auto_reload=False)
+    compiled = []
+    compile = loader.env.compile
+
+    def counting_compile(source, name=None, *args, **kwargs):
+        compiled.append(name)
+        return compile(source, name, *args, **kwargs)
+
+    monkeypatch.setattr(loader.env, "compile", counting_compile)
+    for _ in range(5):
+        assert loader.render_template("msa.html", {"name": "Acme"}) == "MSA: Clause for Acme"
+    assert compiled == ["msa.html", "clause.html"]
+
+    (tmp_path / "clause.html").write_text("Section for {{ name }}")
+    loader.invalidate("clause.html")
+    assert loader.render_template("msa.html", {"name": "Acme"}) == "MSA: Section for Acme"
+    path = tmp_path / "clause.html"
+    path.write_text("Article for {{ name }}")
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 5))
+    assert loader.reload_changed() == ["clause.html"]
+    assert loader.render_template("msa.html", {"name": "Acme"}) == "MSA: Article for Acme"
+
+def test_invalidation_listeners_are_called(tmp_path):
+    loader = make_loader(tmp_path)
+    seen = []
+    loader.on_invalidate(seen.append)
+    loader.invalidate("nda.html")
+    loader.invalidate()
+    assert seen == ["nda.html", None]
+
+def test_invalidation_works_with_the_cache_turned_off(tmp_path):
+    loader = make_loader(tmp_path, cache_size=0, auto_reload=False)
+    assert loader.render_template("nda.html", {"name": "Acme"}) == "Hello Acme"
+    (tmp_path / "nda.html").write_text("Goodbye {{ name }}")
+    assert loader.reload_changed() == []
+    loader.invalidate("nda.html")
+    loader.invalidate()
+    assert loader.render_template("nda.html", {"name": "Acme"}) == "Goodbye Acme"
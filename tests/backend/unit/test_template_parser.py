@@ -0,0 +1,47 @@
+from jinja2 import DictLoader, Environment
+from backend.apps.templates.parser import TemplateParser
+
+TEMPLATES = {
+    "msa.html": (
+        "{% macro party(p) %}<b>{{ p.name }}</b>{% endmacro %}\n"
+        "{% set total = fee * 2 %}\n\n"
+        "<h1>{{ title | upper }}</h1>\n\n"
+        "{% for p in parties %}{{ party(p) }}\n\n{% endfor %}\n\n"
+        "Fees: {{ total }}\n\n"
+        "{% include 'footer.html' %}\n"
+    ),
+    "footer.html": "Signed for {{ title }}"
+}
+
+CONTEXT = {"title": "msa", "fee": 10, "parties": [{"name": "Acme"}, {"name": "Globex"}]}
+
+def make_parser():
+    env = Environment(loader=DictLoader(TEMPLATES))
+    return env, TemplateParser(env)
+
+def test_clauses_render_the_same_text_as_the_whole_template():
+    env, parser = make_parser()
+    assert parser.render("msa.html", CONTEXT) == env.get_template("msa.html").render(CONTEXT)
+
+def test_clause_dependencies_follow_preamble_definitions():
+    _, parser = make_parser()
+    dependencies = [set(c.dependencies) for c in parser.parse("msa.html").clauses if c.cacheable]
+    assert {"title"} in dependencies
+    assert {"parties"} in dependencies
+    assert {"fee"} in dependencies
+
+def test_only_clauses_reading_the_edited_field_rerender():
+    env, parser = make_parser()
+    parser.render("msa.html", CONTEXT)
+    before = parser.clause_renders
+    edited = dict(CONTEXT, fee=25)
+    assert parser.render("msa.html", edited) == env.get_template("msa.html").render(edited)
+    # The fees clause, plus the include whose fields are not tracked
+    assert parser.clause_renders - before == 2
+
+def test_names_read_before_they_are_set_keep_the_template_whole():
+    source = "{{ total }}\n\n{% set total = fee %}\n\nX {{ total }}"
+    env = Environment(loader=DictLoader({"late.html": source}))
+    parser = TemplateParser(env)
+    assert len(parser.parse("late.html").clauses) == 1
+    assert parser.render("late.html", {"fee": 3}) == env.get_template("late.html").render(fee=3)
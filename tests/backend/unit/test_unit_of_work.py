@@ -0,0 +1,111 @@
+import asyncio
+import uuid
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from backend.apps.documents import models
+from backend.apps.documents.autosave import AutosaveCoalescer
+from backend.apps.documents.services import DraftService, DraftUnitOfWork
+
+@pytest.mark.asyncio
+async def test_create_draft_returns_server_defaults(db_session):
+    draft = await DraftService.create_draft(db_session, "msa.html", uuid.uuid4())
+    assert draft.id is not None and draft.status == "draft" and draft.created_at is not None
+
+@pytest.mark.asyncio
+async def test_unit_of_work_writes_versions_and_updates_together(db_session):
+    first = await DraftService.create_draft(db_session, "msa.html", uuid.uuid4())
+    second = await DraftService.create_draft(db_session, "nda.html", uuid.uuid4())
+    await DraftService.save_version(db_session, first.id, {"n": 0})
+
+    async with DraftUnitOfWork(db_session) as uow:
+        uow.save_version(first.id, {"n": 1})
+        uow.save_version(first.id, {"n": 2})
+        uow.save_version(second.id, {"n": 0})
+        uow.update_draft(first.id, title="Master Services Agreement")
+    assert [(v.draft_id, v.sequence) for v in uow.versions] == [(first.id, 1), (first.id, 2), (second.id, 0)]
+    assert await DraftService.get_version_content(db_session, first.id) == {"n": 2}
+    await db_session.refresh(first)
+    assert first.title == "Master Services Agreement"
+
+@pytest.mark.asyncio
+async def test_unit_of_work_rolls_back_on_error(db_session):
+    draft_id = (await DraftService.create_draft(db_session, "msa.html", uuid.uuid4())).id
+    with pytest.raises(RuntimeError):
+        async with DraftUnitOfWork(db_session) as uow:
+            uow.save_version(draft_id, {"n": 0})
+            await uow.flush()
+            raise RuntimeError("editor disconnected")
+    assert await DraftService.get_version_content(db_session, draft_id) is None
+
+@pytest.mark.asyncio
+async def test_autosave_coalesces_saves_within_window(db_session):
+    factory = sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    coalescer = AutosaveCoalescer(window=60, session_factory=factory)
+    draft_id = uuid.uuid4()
+    for n in range(5):
+        coalescer.submit(draft_id, {"text": f"burst {n}"})
+    assert coalescer.pending(draft_id) == {"text": "burst 4"}
+
+    await coalescer.close()
+    assert coalescer.stats() == {"pending": 0, "submitted": 5, "written": 1, "retrying": 0, "dropped": 0}
+    chain = await models.Version.chain(db_session, draft_id)
+    assert [v.content for v in chain] == [{"text": "burst 4"}]
+
+@pytest.mark.asyncio
+async def test_autosave_during_flush_is_written_next_window(db_session):
+    factory = sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    writing = asyncio.Event()
+
+    def slow_factory():
+        writing.set()
+        return factory()
+
+    coalescer = AutosaveCoalescer(window=0.01, session_factory=slow_factory)
+    draft_id = uuid.uuid4()
+    coalescer.submit(draft_id, {"text": "first"})
+    await writing.wait()
+    coalescer.submit(draft_id, {"text": "second"})  # While the first flush is running
+    for _ in range(100):
+        if coalescer.stats()["written"] == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert coalescer.stats() == {"pending": 0, "submitted": 2, "written": 2, "retrying": 0, "dropped": 0}
+    await coalescer.close()
+
+@pytest.mark.asyncio
+async def test_autosave_close_waits_for_running_flush(db_session):
+    factory = sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    writing = asyncio.Event()
+
+    def slow_factory():
+        writing.set()
+        return factory()
+
+    coalescer = AutosaveCoalescer(window=0, session_factory=slow_factory)
+    draft_id = uuid.uuid4()
+    coalescer.submit(draft_id, {"text": "last words"})
+    await writing.wait()
+    await coalescer.close()
+    assert coalescer.stats()["written"] == 1
+    chain = await models.Version.chain(db_session, draft_id)
+    assert [v.content for v in chain] == [{"text": "last words"}]
+
+@pytest.mark.asyncio
+async def test_failing_autosave_does_not_block_other_drafts(db_session):
+    factory = sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    coalescer = AutosaveCoalescer(window=60, max_attempts=3, retry_base=0, session_factory=factory)
+    good, bad = uuid.uuid4(), uuid.uuid4()
+    coalescer.submit(good, {"text": "fine"})
+    coalescer.submit(bad, {"blob": object()})  # Cannot be serialized
+
+    assert await coalescer.flush() == 1
+    assert [v.content for v in await models.Version.chain(db_session, good)] == [{"text": "fine"}]
+    assert coalescer.stats()["retrying"] == 1
+
+    coalescer.submit(good, {"text": "still fine"})
+    assert await coalescer.flush() == 1
+    assert await coalescer.flush() == 0
+    assert coalescer.stats()["dropped"] == 1
+    assert coalescer.pending(bad) is None
+    await coalescer.close()
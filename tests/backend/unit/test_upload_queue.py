@@ -0,0 +1,135 @@
+import asyncio
+import json
+import uuid
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from backend.core.database import Base
+from backend.core.exceptions import StorageException
+from backend.apps.documents import models
+from backend.apps.documents.services import DraftService
+from backend.apps.documents.uploads import UploadWorker
+from backend.storage.base_provider import StorageProviderFactory
+from backend.storage.memory import InMemoryStorageProvider
+
+class FlakyProvider(InMemoryStorageProvider):
+    name = "vault"
+
+    async def save_stream(self, name, chunks, mimetype="text/html"):
+        raise StorageException(self.name, "save_file")
+
+class CountingProvider(InMemoryStorageProvider):
+    """Stands in for a durable provider"""
+
+    name = "vault"
+    active = peak = 0
+
+    async def save_stream(self, name, chunks, mimetype="text/html"):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().save_stream(name, chunks, mimetype)
+        finally:
+            self.active -= 1
+
+def _worker(db_session, **options) -> UploadWorker:
+    defaults = dict(
+        workers=1, batch_size=10, poll_interval=0.01, lease_seconds=60,
+        max_attempts=3, retry_base=0, retry_max=0
+    )
+    if db_session is not None:
+        defaults["session_factory"] = sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    return UploadWorker(**{**defaults, **options})
+
+async def _finalize(db_session, content: dict) -> models.Document:
+    draft = await DraftService.create_draft(db_session, "msa.html", uuid.uuid4())
+    return await DraftService.finalize_draft(db_session, draft.id, content)
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = CountingProvider(latency=0.01)
+    monkeypatch.setattr(StorageProviderFactory, "_providers", {"vault": provider})
+    monkeypatch.setattr("backend.core.config.settings.UPLOAD_PROVIDER", "vault")
+    return provider
+
+@pytest.mark.asyncio
+async def test_finalize_enqueues_and_worker_uploads(db_session, provider):
+    document = await _finalize(db_session, {"title": "MSA"})
+    [job] = (await db_session.execute(select(models.UploadJob))).scalars().all()
+    assert (job.document_id, job.provider, job.status) == (document.id, "vault", "pending")
+    assert document.storage_file_id is None
+
+    worker = _worker(db_session)
+    assert await worker.drain() == 1
+    await db_session.refresh(document)
+    assert document.storage_provider == "vault"
+    assert json.loads(await provider.get_file(document.storage_file_id)) == {"title": "MSA"}
+    assert (await db_session.execute(select(models.UploadJob))).scalars().all() == []
+    assert worker.stats()["uploaded"] == 1
+    assert (await models.UploadJob.backlog(db_session))["pending"] == 0
+
+@pytest.mark.asyncio
+async def test_nothing_is_queued_without_a_durable_provider(db_session, monkeypatch):
+    monkeypatch.setattr("backend.core.config.settings.UPLOAD_PROVIDER", "")
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_PROVIDERS", "memory, local")
+    assert DraftService.upload_provider() == "local"
+    monkeypatch.setattr("backend.core.config.settings.STORAGE_PROVIDERS", "memory")
+    assert DraftService.upload_provider() is None
+    monkeypatch.setattr("backend.core.config.settings.UPLOAD_PROVIDER", "memory")
+    assert DraftService.upload_provider() is None
+    await _finalize(db_session, {"title": "MSA"})
+    assert (await db_session.execute(select(models.UploadJob))).scalars().all() == []
+
+@pytest.mark.asyncio
+async def test_claimed_jobs_are_leased(db_session, provider):
+    await _finalize(db_session, {"title": "MSA"})
+    assert len(await models.UploadJob.claim(db_session, 10, lease_seconds=60)) == 1
+    assert await models.UploadJob.claim(db_session, 10, lease_seconds=60) == []
+    assert (await models.UploadJob.backlog(db_session))["pending"] == 1
+
+@pytest.mark.asyncio
+async def test_failed_uploads_retry_then_give_up(db_session, monkeypatch):
+    monkeypatch.setattr(StorageProviderFactory, "_providers", {"vault": FlakyProvider()})
+    monkeypatch.setattr("backend.core.config.settings.UPLOAD_PROVIDER", "vault")
+    await _finalize(db_session, {"title": "MSA"})
+    worker = _worker(db_session, max_attempts=2)
+    assert worker.retry_delay(3) == 0
+    assert await worker.drain() == 1
+    assert await worker.drain() == 1
+    assert await worker.drain() == 0
+    [job] = (await db_session.execute(select(models.UploadJob))).scalars().all()
+    await db_session.refresh(job)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert "StorageException" in job.last_error
+    assert worker.stats()["retried"] == 1 and worker.stats()["failed"] == 1
+    assert (await models.UploadJob.backlog(db_session))["failed"] == 1
+
+@pytest.mark.asyncio
+async def test_uploads_respect_provider_concurrency(db_session, provider):
+    for n in range(6):
+        await _finalize(db_session, {"n": n})
+    worker = _worker(db_session, concurrency={"vault": 2})
+    assert await worker.drain() == 6
+    assert provider.peak == 2
+
+@pytest.mark.asyncio
+async def test_background_pool_drains_queue(tmp_path, provider):
+    # Concurrent pollers need their own connections, which :memory: cannot share
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/queue.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    worker = _worker(None, workers=2, batch_size=2, session_factory=factory)
+    worker.start()
+    async with factory() as db:
+        for n in range(5):
+            await _finalize(db, {"n": n})
+    for _ in range(200):
+        if worker.uploaded == 5:
+            break
+        await asyncio.sleep(0.01)
+    await worker.close()
+    await engine.dispose()
+    assert worker.uploaded == 5
+    assert worker.stats()["workers"] == 0
@@ -0,0 +1,44 @@
+import uuid
+import pytest
+from backend.apps.documents.services import DraftService
+from backend.utils import diffing
+
+CLAUSE = "The Supplier shall deliver the Services with reasonable skill and care in accordance with Good Industry Practice."
+
+def test_word_diff_keeps_context_and_marks_edits():
+    ops = diffing.word_diff(CLAUSE, CLAUSE.replace("reasonable", "all due"))
+    assert ops[1:3] == [("-", "reasonable"), ("+", "all due")]
+    assert "".join(text for op, text in ops if op != "+") == CLAUSE
+    assert diffing.word_diff(CLAUSE, CLAUSE) == [("=", CLAUSE)]
+
+def test_field_level_changes_by_path():
+    old = {"title": "MSA", "note": "x", "parties": ["A", "B"], "terms": {"clause": CLAUSE, "days": 30}}
+    new = {"title": "MSA v2", "parties": ["Z", "A", "B"], "terms": {"clause": CLAUSE + " Time is of the essence.", "days": 30}}
+    changes = {change["path"]: change for change in diffing.diff_contents(old, new)}
+    assert set(changes) == {"title", "note", "parties.0", "terms.clause"}
+    assert changes["note"]["change"] == "removed"
+    assert changes["parties.0"] == {"path": "parties.0", "change": "added", "old": None, "new": "Z", "words": None}
+    assert changes["terms.clause"]["words"][-1] == ("+", " Time is of the essence.")
+
+@pytest.mark.asyncio
+async def test_diffs_are_cached_by_version_pair(db_session, monkeypatch):
+    monkeypatch.setattr("backend.core.config.settings.VERSION_SNAPSHOT_INTERVAL", 3)
+    draft_id = uuid.uuid4()
+    for n in range(7):
+        await DraftService.save_version(db_session, draft_id, {"clause": CLAUSE + f" Revision {n}.", "n": n})
+    differ = diffing.VersionDiffer(16)
+
+    diff = await DraftService.diff_versions(db_session, draft_id, 1, 5, differ)
+    assert [change["path"] for change in diff["changes"]] == ["clause", "n"]
+    assert (diff["from_version"]["sequence"], diff["to_version"]["sequence"]) == (1, 5)
+    await DraftService.diff_versions(db_session, draft_id, 1, 5, differ)
+    assert differ.computed == 1
+    assert await DraftService.diff_versions(db_session, draft_id, 1, 9, differ) is None
+
+    history = await DraftService.version_history(db_session, draft_id, 1, 4, differ)
+    assert [d["to_version"]["sequence"] for d in history["diffs"]] == [1, 2, 3, 4]
+    assert history["diffs"][2]["changes"][1] == {"path": "n", "change": "changed", "old": 2, "new": 3, "words": None}
+    assert history["next_start"] == 5
+    last = await DraftService.version_history(db_session, draft_id, 5, 4, differ)
+    assert len(last["diffs"]) == 2 and last["next_start"] is None
+    assert differ.computed == 7
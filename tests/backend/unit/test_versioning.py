@@ -0,0 +1,35 @@
+import uuid
+import pytest
+from backend.apps.documents.services import DraftService
+from backend.utils import versioning
+
+CLAUSE = "The Supplier shall deliver the Services with reasonable skill and care in accordance with Good Industry Practice."
+
+def test_diff_and_apply_round_trip():
+    old = {"title": "MSA", "note": "x", "clauses": {"1": CLAUSE, "2": CLAUSE}, "parties": ["A"]}
+    new = {"title": "MSA v2", "clauses": {"1": CLAUSE.replace("reasonable", "all due"), "2": CLAUSE}, "parties": ["A", "B"]}
+    delta = versioning.diff(old, new)
+    assert versioning.apply(old, delta) == new
+    assert delta["unset"] == ["note"]
+    assert isinstance(delta["patch"]["clauses"]["patch"]["1"], list)
+    assert versioning.diff(new, new) == {}
+
+def test_text_delta_is_small_for_small_edits():
+    old = " ".join([CLAUSE] * 20)
+    new = old.replace("Services", "Deliverables", 1)
+    ops = versioning.text_diff(old, new)
+    assert versioning.apply_text(old, ops) == new
+    assert versioning.encoded_size(ops) < 60
+
+@pytest.mark.asyncio
+async def test_versions_are_rebuilt_from_nearest_snapshot(db_session, monkeypatch):
+    monkeypatch.setattr("backend.core.config.settings.VERSION_SNAPSHOT_INTERVAL", 4)
+    draft_id = uuid.uuid4()
+    contents = [{"clause": CLAUSE + f" Revision {n}.", "n": n} for n in range(10)]
+    versions = [await DraftService.save_version(db_session, draft_id, content) for content in contents]
+
+    assert [v.kind for v in versions[:5]] == ["snapshot", "delta", "delta", "delta", "snapshot"]
+    assert versions[1].content is None
+    for sequence, content in enumerate(contents):
+        assert await DraftService.get_version_content(db_session, draft_id, sequence) == content
+    assert await DraftService.get_version_content(db_session, draft_id) == contents[-1]